@@ -1,5 +1,7 @@
 import numpy as np
 import scipy as sp
+import scipy.linalg
+import scipy.sparse
 import matplotlib.pyplot as plt
 from typhon.arts.catalogues import Sparse
 import ctypes as c
@@ -148,6 +150,191 @@ class Block(object):
         xmlwriter.write_xml(self.matrix)
         xmlwriter.close_tag()
 
+class _BlockCholesky:
+    """Block-Cholesky factorization of a symmetric block matrix
+
+    The matrix is partitioned along its diagonal blocks. Each diagonal
+    block is factorized on its own, blocks that are sparse and diagonal
+    only by taking the square root of their diagonal. Off-diagonal
+    factor blocks are only computed where the matrix couples the
+    corresponding diagonal blocks.
+
+    Parameters:
+        blocks(list): The :class:`Block` objects on and above the diagonal
+            of the matrix.
+    """
+    def __init__(self, blocks):
+        self.starts, self.sizes = _diagonal_partition(blocks)
+        index = {start: k for k, start in enumerate(self.starts)}
+
+        # The lower triangular blocks of the matrix:
+        lower = {}
+        for b in blocks:
+            try:
+                k, m = index[b.row_start], index[b.column_start]
+            except KeyError:
+                raise ValueError(
+                    "Off-diagonal block ({}, {}) does not align with the "
+                    "diagonal blocks.".format(b.i, b.j))
+            if k < m:
+                lower[m, k] = b.matrix.T
+            else:
+                lower[k, m] = b.matrix
+
+        n_blocks = len(self.starts)
+        self.factor = {}
+        for k in range(n_blocks):
+            coupled = [m for m in range(k) if (k, m) in self.factor]
+            a_kk = lower[k, k]
+            if not coupled and _is_diagonal(a_kk):
+                self.factor[k, k] = np.sqrt(a_kk.diagonal())
+            else:
+                a_kk = _dense(a_kk)
+                for m in coupled:
+                    a_kk = a_kk - self.factor[k, m] @ self.factor[k, m].T
+                self.factor[k, k] = sp.linalg.cholesky(a_kk, lower=True)
+
+            for i in range(k + 1, n_blocks):
+                a_ik = _dense(lower[i, k]) if (i, k) in lower else None
+                for m in coupled:
+                    if (i, m) in self.factor:
+                        update = self.factor[i, m] @ self.factor[k, m].T
+                        a_ik = -update if a_ik is None else a_ik - update
+                if a_ik is not None:
+                    # L_ik = A_ik L_kk^-T
+                    self.factor[i, k] = _triangular_solve(
+                        self.factor[k, k], a_ik.T).T
+
+    @property
+    def is_block_diagonal(self):
+        return all(k == m for k, m in self.factor)
+
+    def _segment(self, x, k):
+        return x[self.starts[k]:self.starts[k] + self.sizes[k]]
+
+    def _has_inverse(self):
+        """Whether the inverse blocks give the whole inverse matrix"""
+        return _covers_diagonal(self.inverse_blocks, self.shape[0])
+
+    def solve(self, b):
+        """Solve the linear system :math:`A x = b`."""
+        n_blocks = len(self.starts)
+        b = np.asarray(b, dtype=float)
+
+        # Forward substitution: L y = b
+        y = np.empty_like(b)
+        for k in range(n_blocks):
+            rhs = self._segment(b, k)
+            for m in range(k):
+                if (k, m) in self.factor:
+                    rhs = rhs - self.factor[k, m] @ self._segment(y, m)
+            self._segment(y, k)[...] = _triangular_solve(
+                self.factor[k, k], rhs)
+
+        # Backward substitution: L^T x = y
+        x = np.empty_like(b)
+        for k in reversed(range(n_blocks)):
+            rhs = self._segment(y, k)
+            for i in range(k + 1, n_blocks):
+                if (i, k) in self.factor:
+                    rhs = rhs - self.factor[i, k].T @ self._segment(x, i)
+            self._segment(x, k)[...] = _triangular_solve(
+                self.factor[k, k], rhs, trans=True)
+        return x
+
+    def logdet(self):
+        """The logarithm of the determinant of the matrix."""
+        logdet = 0.0
+        for k in range(len(self.starts)):
+            l_kk = self.factor[k, k]
+            diagonal = l_kk if l_kk.ndim == 1 else np.diagonal(l_kk)
+            logdet += 2.0 * np.sum(np.log(diagonal))
+        return logdet
+
+    def inverse_diagonal(self):
+        """The diagonal of the inverse of the matrix."""
+        diagonal = np.empty(sum(self.sizes))
+        for k in range(len(self.starts)):
+            l_kk = self.factor[k, k]
+            if self.is_block_diagonal:
+                if l_kk.ndim == 1:
+                    d = 1.0 / l_kk ** 2
+                else:
+                    # diag(A^-1) = column sums of (L^-1)**2
+                    l_inv = sp.linalg.solve_triangular(
+                        l_kk, np.eye(l_kk.shape[0]), lower=True)
+                    d = np.sum(l_inv ** 2, axis=0)
+            else:
+                unit = np.zeros((diagonal.size, self.sizes[k]))
+                self._segment(unit, k)[...] = np.eye(self.sizes[k])
+                d = np.diagonal(self._segment(self.solve(unit), k))
+            self._segment(diagonal, k)[...] = d
+        return diagonal
+
+
+def _diagonal_partition(blocks):
+    """Start indices and sizes of the diagonal blocks of a block matrix"""
+    diagonal = sorted(
+        (b.row_start, b.matrix.shape[0]) for b in blocks
+        if b.row_start == b.column_start
+    )
+    starts = [start for start, _ in diagonal]
+    sizes = [size for _, size in diagonal]
+    if starts[0] != 0 or any(
+            s + n != s_next
+            for s, n, s_next in zip(starts, sizes, starts[1:])):
+        raise ValueError(
+            "The diagonal blocks do not cover the whole diagonal.")
+    return starts, sizes
+
+
+def _covers_diagonal(blocks, n):
+    """Whether the diagonal blocks cover the whole diagonal of size n"""
+    end = 0
+    for start, size in sorted(
+            (b.row_start, b.matrix.shape[0]) for b in blocks
+            if b.row_start == b.column_start):
+        if start != end:
+            return False
+        end += size
+    return end == n
+
+
+def _is_diagonal(matrix):
+    """Whether a sparse matrix has only diagonal elements"""
+    if not sp.sparse.issparse(matrix):
+        return False
+    matrix = matrix.tocoo()
+    return np.all(matrix.row[matrix.data != 0] == matrix.col[matrix.data != 0])
+
+
+def _dense(matrix):
+    if sp.sparse.issparse(matrix):
+        return matrix.toarray()
+    return np.asarray(matrix)
+
+
+def _triangular_solve(factor, b, trans=False):
+    """Solve with a diagonal (1D) or lower triangular (2D) factor"""
+    if factor.ndim == 1:
+        return b / (factor if b.ndim == 1 else factor[:, np.newaxis])
+    return sp.linalg.solve_triangular(factor, b, lower=True,
+                                      trans="T" if trans else "N")
+
+
+def _block_matvec(blocks, x):
+    """Multiply the symmetric matrix given by its upper blocks with x"""
+    x = np.asarray(x)
+    y = np.zeros(x.shape, dtype=np.result_type(x, float))
+    for b in blocks:
+        rows = slice(b.row_start, b.row_start + b.matrix.shape[0])
+        columns = slice(b.column_start, b.column_start + b.matrix.shape[1])
+        y[rows] += b.matrix @ x[columns]
+        if b.row_start != b.column_start:
+            y[columns] += b.matrix.T @ x[rows]
+    return y
+
+
 class CovarianceMatrix(object):
     """:class:`CovarianceMatrix` representing the ARTS group of the same name
 
@@ -204,11 +391,11 @@ class CovarianceMatrix(object):
         inv_blocks = []
         for b in list(xmlelement):
 
-            i = b.get("row_index")
-            j = b.get("column_index")
+            i = int(b.get("row_index"))
+            j = int(b.get("column_index"))
             row_start    = int(b.get("row_start"))
             column_start = int(b.get("column_start"))
-            inverse = bool(b.get("is_inverse"))
+            inverse = bool(int(b.get("is_inverse")))
             matrix = b[0].value()
 
             b = Block(i, j, row_start, column_start, inverse, matrix)
@@ -234,6 +421,7 @@ class CovarianceMatrix(object):
         self._blocks         = blocks
         self._inverse_blocks = inverse_blocks
         self._workspace      = None
+        self._cholesky       = None
 
     #
     # Read-only properties
@@ -251,6 +439,90 @@ class CovarianceMatrix(object):
     def workspace(self):
         return self._workspace
 
+    @property
+    def shape(self):
+        n = max([b.row_start + b.matrix.shape[0] for b in self.blocks])
+        return (n, n)
+
+    #
+    # Linear algebra
+    #
+
+    def matvec(self, x):
+        """Matrix-vector product.
+
+        Multiplies the covariance matrix with a vector or a matrix without
+        converting it to a dense matrix. Blocks above the diagonal are also
+        applied as their transposed counterparts below the diagonal.
+
+        Parameters:
+            x(numpy.ndarray): Vector of shape (n,) or matrix of shape (n, k).
+
+        Returns:
+            The product as numpy.ndarray with the same shape as x.
+        """
+        return _block_matvec(self.blocks, x)
+
+    def cholesky(self):
+        """Block-Cholesky factorization of the covariance matrix.
+
+        The factorization works block-wise along the diagonal blocks.
+        Diagonal blocks that are not coupled to other blocks are factorized
+        independently and sparse diagonal blocks only need the square root
+        of their diagonal. The result is computed only once.
+
+        Returns:
+            The factorization object that provides the methods ``solve``,
+            ``logdet`` and ``inverse_diagonal``.
+        """
+        if self._cholesky is None:
+            self._cholesky = _BlockCholesky(self.blocks)
+        return self._cholesky
+
+    def _has_inverse(self):
+        """Whether the inverse blocks give the whole inverse matrix"""
+        return _covers_diagonal(self.inverse_blocks, self.shape[0])
+
+    def solve(self, b):
+        """Solve the linear system :math:`S x = b`.
+
+        If the blocks of the inverse covariance matrix cover its whole
+        diagonal, this is a multiplication with the inverse. Otherwise, it
+        uses the block-Cholesky factorization of the covariance matrix.
+
+        Parameters:
+            b(numpy.ndarray): Right-hand side of shape (n,) or (n, k).
+
+        Returns:
+            The solution :math:`S^{-1} b` with the same shape as b.
+        """
+        if self._has_inverse():
+            return _block_matvec(self.inverse_blocks, b)
+        return self.cholesky().solve(b)
+
+    def logdet(self):
+        """The natural logarithm of the determinant of the covariance matrix.
+        """
+        return self.cholesky().logdet()
+
+    def inverse_diagonal(self):
+        """The diagonal of the inverse covariance matrix.
+
+        Like :meth:`solve`, this uses the blocks of the inverse covariance
+        matrix only if they cover its whole diagonal.
+
+        Returns:
+            numpy.ndarray with the diagonal elements of :math:`S^{-1}`.
+        """
+        if self._has_inverse():
+            diagonal = np.zeros(self.shape[0])
+            for b in self.inverse_blocks:
+                if b.row_start == b.column_start:
+                    diagonal[b.row_start:b.row_start + b.matrix.shape[0]] = \
+                        b.matrix.diagonal()
+            return diagonal
+        return self.cholesky().inverse_diagonal()
+
     #
     # Serialization
     #
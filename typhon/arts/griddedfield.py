@@ -3,6 +3,7 @@ import copy
 import numbers
 
 import netCDF4
+import numba
 import numpy as np
 import xarray
 from scipy import interpolate
@@ -16,6 +17,7 @@ __all__ = [
     'GriddedField4',
     'GriddedField5',
     'GriddedField6',
+    'Regridder',
     'griddedfield_from_netcdf',
     'griddedfield_from_xarray',
 ]
@@ -394,6 +396,31 @@ class _GriddedField:
 
         return self
 
+    def regrid(self, new_grids, fun=np.array, **kwargs):
+        """Interpolate several axes of the GriddedField to new grids at once.
+
+        Unlike :meth:`refine_grid`, all axes are interpolated linearly in one
+        pass and a new GriddedField is returned. To interpolate many fields
+        with the same grids, create a :class:`Regridder` once and call it
+        with each field.
+
+        Parameters:
+            new_grids (list): The new grids, one for each axis. Axes with
+                None (or beyond the end of the list) keep their grid.
+            fun (numpy.ufunc, or similar): Function to apply to the grids
+                before interpolation, e.g. np.log for pressure grids. Either
+                one function for all axes or a list with one function for
+                each axis.
+            **kwargs: Keyword arguments passed to :class:`Regridder`.
+
+        Returns: :class:`typhon.arts.griddedfield.GriddedField`
+
+        Examples:
+            >>> regridded = gf3.regrid(
+            ...     [p_grid, lat_grid, lon_grid], fun=[np.log, None, None])
+        """
+        return Regridder(self.grids, new_grids, fun, **kwargs)(self)
+
     def get(self, key, default=None, keep_dims=True):
         """Return data from field with given fieldname.
 
@@ -738,3 +765,243 @@ def griddedfield_from_xarray(dataarray):
         : Appropriate ARTS GriddedField.
     """
     return _griddedfield_from_ndim(dataarray.ndim).from_xarray(dataarray)
+
+
+@numba.njit
+def _regrid(data, strides, indices, weights, counts, outside, fill_value,
+            out):
+    """Interpolate all axes of a flattened array in one pass.
+
+    Each output element is the weighted sum of its neighbours in the input
+    array, i.e. of the 2**n corners of the cell around it for n interpolated
+    axes (axes that are not interpolated have only one neighbour). The
+    corners in the outer axes are combined once for each row of the output,
+    which is then filled along the last axis.
+    """
+    last = out.ndim - 1
+    n_outer = 2 ** last
+    rows = out.reshape(-1, out.shape[last])
+    for row in range(rows.shape[0]):
+        position = np.empty(max(last, 1), dtype=np.intp)
+        row_outside = False
+        inner_size = 1
+        for axis in range(last - 1, -1, -1):
+            position[axis] = (row // inner_size) % out.shape[axis]
+            inner_size *= out.shape[axis]
+            if outside[axis, position[axis]]:
+                row_outside = True
+
+        if row_outside:
+            rows[row, :] = fill_value
+            continue
+
+        # The weights and offsets of the corners in the outer axes:
+        corner_weights = np.empty(n_outer)
+        corner_offsets = np.empty(n_outer, dtype=np.intp)
+        n_corners = 0
+        for corner in range(n_outer):
+            weight = 1.
+            offset = 0
+            for axis in range(last):
+                neighbour = (corner >> axis) & 1
+                if neighbour >= counts[axis]:
+                    weight = 0.
+                    break
+                weight *= weights[axis, position[axis], neighbour]
+                offset += indices[axis, position[axis], neighbour] \
+                    * strides[axis]
+            if weight != 0.:
+                corner_weights[n_corners] = weight
+                corner_offsets[n_corners] = offset
+                n_corners += 1
+
+        for i in range(out.shape[last]):
+            if outside[last, i]:
+                rows[row, i] = fill_value
+                continue
+
+            lower = indices[last, i, 0] * strides[last]
+            lower_weight = weights[last, i, 0]
+            total = 0.
+            if counts[last] == 2:
+                upper = indices[last, i, 1] * strides[last]
+                upper_weight = weights[last, i, 1]
+                for corner in range(n_corners):
+                    offset = corner_offsets[corner]
+                    total += corner_weights[corner] * (
+                        lower_weight * data[offset + lower]
+                        + upper_weight * data[offset + upper])
+            else:
+                for corner in range(n_corners):
+                    total += corner_weights[corner] * lower_weight \
+                        * data[corner_offsets[corner] + lower]
+            rows[row, i] = total
+
+
+class Regridder:
+    """Linear interpolation of GriddedFields to new grids along several axes
+
+    The interpolation weights are computed once for each axis when the
+    regridder is created: each point of a new grid gets the indices and the
+    weights of its two neighbours in the old grid. Calling the regridder
+    with a GriddedField (or a plain array) with the old grids combines the
+    weights of all axes and computes every output value directly from the
+    input in one compiled pass. No intermediate arrays are created and the
+    input is not changed.
+
+    The same regridder can be used for any number of fields with the same
+    grids, e.g. for all fields of an atmospheric scenario.
+
+    Examples:
+
+    .. code-block:: python
+
+        from typhon.arts.griddedfield import Regridder
+
+        # Interpolate in log-pressure, latitude and longitude:
+        regridder = Regridder(
+            fields[0].grids, [p_grid, lat_grid, lon_grid],
+            fun=[np.log, None, None])
+        regridded = [regridder(field) for field in fields]
+    """
+
+    def __init__(self, old_grids, new_grids, fun=np.array,
+                 bounds_error=True, fill_value=np.nan):
+        """Compute the interpolation weights
+
+        Parameters:
+            old_grids (list): The current grids of all axes.
+            new_grids (list): The new grids. Axes with None (or beyond the
+                end of the list) keep their grid.
+            fun (numpy.ufunc, or similar): Function to apply to the grids
+                before interpolation, e.g. np.log for pressure grids. Either
+                one function for all axes or a list with one function (or
+                None) for each axis.
+            bounds_error (bool): If True (default), a ValueError is raised
+                if a new grid exceeds an old grid, as by
+                :func:`scipy.interpolate.interp1d`.
+            fill_value: Value for points outside of the old grids if
+                *bounds_error* is False. If "extrapolate", the values are
+                extrapolated linearly.
+        """
+        if len(new_grids) > len(old_grids):
+            raise ValueError("There are more new grids than old grids!")
+        new_grids = list(new_grids) \
+            + [None] * (len(old_grids) - len(new_grids))
+        if callable(fun) or fun is None:
+            fun = [fun] * len(old_grids)
+
+        self.old_grids = list(old_grids)
+        self.new_grids = [
+            old if new is None else np.asarray(new, dtype=float)
+            for old, new in zip(self.old_grids, new_grids)
+        ]
+        extrapolate = isinstance(fill_value, str) \
+            and fill_value == "extrapolate"
+        self.fill_value = np.nan if extrapolate else fill_value
+
+        # The grids that are not interpolated keep each point:
+        axes = []
+        for axis, (old, new, axis_fun) in enumerate(
+                zip(old_grids, new_grids, fun)):
+            if new is None:
+                size = np.size(old) or 1
+                axes.append((
+                    np.arange(size)[:, np.newaxis], np.ones((size, 1)),
+                    np.zeros(size, dtype=bool)
+                ))
+            else:
+                if axis_fun is None:
+                    axis_fun = np.array
+                axes.append(self._axis_weights(
+                    axis_fun(old), axis_fun(new), bounds_error, extrapolate,
+                    axis
+                ))
+
+        self.shape = tuple(np.size(old) or 1 for old in self.old_grids)
+        self.new_shape = tuple(len(indices) for indices, _, _ in axes)
+
+        # Pad the weights of all axes to arrays that the kernel can use:
+        size = max(self.new_shape)
+        ndim = len(axes)
+        self._indices = np.zeros((ndim, size, 2), dtype=np.intp)
+        self._weights = np.zeros((ndim, size, 2))
+        self._outside = np.zeros((ndim, size), dtype=bool)
+        self._counts = np.zeros(ndim, dtype=np.intp)
+        for axis, (indices, weights, outside) in enumerate(axes):
+            self._counts[axis] = indices.shape[1]
+            self._indices[axis, :len(indices), :indices.shape[1]] = indices
+            self._weights[axis, :len(indices), :indices.shape[1]] = weights
+            self._outside[axis, :len(indices)] = outside
+
+    @staticmethod
+    def _axis_weights(old, new, bounds_error, extrapolate, axis):
+        """Indices and weights of the neighbours of each new grid point"""
+        old = np.asarray(old, dtype=float).ravel()
+        new = np.asarray(new, dtype=float).ravel()
+
+        if old.size == 1:
+            # As in refine_grid, the data is repeated:
+            return (
+                np.zeros((new.size, 1), dtype=np.intp),
+                np.ones((new.size, 1)), np.zeros(new.size, dtype=bool)
+            )
+
+        # The old grid may be in any order (e.g. decreasing pressure):
+        order = np.argsort(old, kind="stable")
+        old = old[order]
+
+        outside = ~((new >= old[0]) & (new <= old[-1]))
+        if bounds_error and outside.any():
+            raise ValueError(
+                f"A value of the new grid of axis {axis} is outside of the "
+                f"old grid [{old[0]}, {old[-1]}].")
+
+        lower = np.clip(
+            np.searchsorted(old, new, side="right") - 1, 0, old.size - 2)
+        upper_weight = (new - old[lower]) / (old[lower + 1] - old[lower])
+        indices = np.stack([order[lower], order[lower + 1]], axis=1)
+        weights = np.stack([1 - upper_weight, upper_weight], axis=1)
+
+        if extrapolate:
+            outside[:] = False
+        return indices, weights, outside
+
+    def __call__(self, field):
+        """Interpolate a GriddedField or an array
+
+        Parameters:
+            field: A GriddedField or a numpy array with the old grids.
+
+        Returns:
+            A new GriddedField (or numpy array) with the new grids.
+        """
+        if isinstance(field, _GriddedField):
+            for old, grid in zip(self.old_grids, field.grids):
+                if not np.array_equal(old, grid):
+                    raise ValueError(
+                        "The grids of the GriddedField differ from the old "
+                        "grids of the regridder!")
+            regridded = copy.copy(field)
+            regridded.grids = [copy.copy(grid) for grid in self.new_grids]
+            regridded.gridnames = copy.copy(field.gridnames)
+            regridded.data = self(field.data)
+            return regridded
+
+        data = np.asarray(field)
+        if data.shape != self.shape:
+            raise ValueError(
+                f"The data has the shape {data.shape} but the old grids "
+                f"have the shape {self.shape}!")
+
+        data = np.ascontiguousarray(data)
+        out = np.empty(
+            self.new_shape, dtype=np.result_type(data.dtype, np.float32))
+        if out.size:
+            _regrid(
+                data.reshape(-1),
+                np.array(data.strides, dtype=np.intp) // data.itemsize,
+                self._indices, self._weights, self._counts, self._outside,
+                self.fill_value, out
+            )
+        return out
@@ -13,6 +13,7 @@ import numpy as np
 
 __all__ = ['SingleScatteringData',
            'ScatteringMetaData',
+           'scattering_properties',
            ]
 
 PARTICLE_TYPE_GENERAL = 10
@@ -46,6 +47,10 @@ _valid_ptypes = [
 ]
 
 
+# ptypes of SingleScatteringData version 3 and 2:
+_totally_random_ptypes = ("totally_random", "macroscopically_isotropic")
+
+
 def dict_combine_with_default(in_dict, default_dict):
     """A useful function for dealing with dictionary function input.  Combines
     parameters from in_dict with those from default_dict with the output
@@ -338,15 +343,24 @@ class SingleScatteringData:
 
     def normalise(self):
         """Normalises Z to E-A.
+
+        All elements of the phase matrix are scaled, so that the integral of
+        Z11 over all scattering directions equals the extinction minus the
+        absorption (for all frequencies and temperatures at once).
+        Read-only (e.g. memory-mapped) phase matrices are replaced by a
+        scaled copy.
         """
 
         Z_int = self.integrate()
-        E_min_A = self.ext_mat_data.squeeze() - self.abs_vec_data.squeeze()
+        E_min_A = (self.ext_mat_data[:, :, 0, 0, 0]
+                   - self.abs_vec_data[:, :, 0, 0, 0])
         # use where to prevent divide by zero
         factor = E_min_A / np.where(Z_int == 0, 1, Z_int)
-        factor.shape = (factor.size, 1, 1, 1, 1, 1)
-        self.pha_mat_data[..., 0] *= factor
-        # self.pha_mat_data[..., 0] = self.pha_mat_data[..., 0] * factor
+        factor = factor.reshape(factor.shape + (1,) * 5)
+        if self.pha_mat_data.flags.writeable:
+            self.pha_mat_data *= factor
+        else:
+            self.pha_mat_data = self.pha_mat_data * factor
 
     def normalised(self):
         """Returns normalised copy
@@ -363,10 +377,10 @@ class SingleScatteringData:
         Only implemented for randomly oriented particles.
         """
 
-        if self.ptype != PARTICLE_TYPE_TOTALLY_RANDOM:
-            raise RuntimeError("Slicing implemented only for"
-                               "ptype = %d. Found ptype = %d" %
-                               (PARTICLE_TYPE_TOTALLY_RANDOM, self.ptype))
+        if self.ptype not in _totally_random_ptypes:
+            raise RuntimeError("Slicing implemented only for "
+                               "ptype = %s. Found ptype = %s" %
+                               (_totally_random_ptypes[0], self.ptype))
         v2 = list(v)
         for i, el in enumerate(v):
             # to preserve the rank of the data, [n] -> [n:n+1]
@@ -431,49 +445,69 @@ class SingleScatteringData:
         zero is returned for these cases.
 
         Returns:
-            Backscattering coefficients, one value for each frequency and
-            temperature in S. [m2]
+            Asymmetry parameters, one value for each frequency and
+            temperature in S. [-]
 
         """
-        g = np.zeros((len(self.f_grid), len(self.T_grid)))
         # ARTS uses pure phase matrix values, and not a normalised phase
-        # function, and we need to include a normalisation.
+        # function, and we need to include a normalisation. All frequencies
+        # and temperatures are integrated at once:
+        za_rad_grid = np.radians(self.za_grid)
+        phase_grid = self.pha_mat_data[:, :, :, 0, 0, 0, 0] \
+            * np.abs(np.sin(za_rad_grid))
+
+        normFac = np.trapz(phase_grid, za_rad_grid, axis=-1)
+        cosPhase = np.trapz(phase_grid * np.cos(za_rad_grid), za_rad_grid,
+                            axis=-1)
 
-        za_rad_grid = np.radians([self.za_grid])
+        # If normFac is zero, this means that phase_grid==0 and should
+        # indicate very small particles that have g=0.
+        return np.where(
+            normFac == 0, 0, cosPhase / np.where(normFac == 0, 1, normFac))
 
-        aziWeight = abs(np.sin(za_rad_grid))
-        cosTerm = np.cos(za_rad_grid)
+    def assp2ssa(self):
+        """The single scattering albedo, i.e. the ratio of the scattering to
+        the extinction cross section.
+
+        Returns:
+            Single scattering albedos, one value for each frequency and
+            temperature in S. Zero where the extinction is zero. [-]
 
-        for j in range(0, len(self.f_grid)):
-            for i in range(0, len(self.T_grid)):
-                phase_grid = self.pha_mat_data[j, i, :, 0, 0, 0, 0]
+        """
+        extinction = self.ext_mat_data[:, :, 0, 0, 0]
+        absorption = self.abs_vec_data[:, :, 0, 0, 0]
+        return np.where(
+            extinction == 0, 0,
+            1 - absorption / np.where(extinction == 0, 1, extinction))
 
-                normFac = np.trapz(np.multiply(
-                    phase_grid, aziWeight), za_rad_grid)
+    def integrate(self):
+        """Integrate Z11 over all scattering directions.
 
-                if normFac == 0:
-                    # If normFac is zero, this means that phase_grid==0 and
-                    # should indicate very small particles that have g=0.
-                    g[j, i] = 0
-                else:
-                    temp_cosPhase = np.multiply(cosTerm, phase_grid)
+        For a normalised phase matrix, this is the scattering cross section,
+        i.e. the extinction minus the absorption.
 
-                    temp = np.trapz(np.multiply(temp_cosPhase, aziWeight),
-                                    za_rad_grid)
+        Returns:
+            Integrated phase function, one value for each frequency and
+            temperature in S. [m2]
 
-                    g[j, i] = np.divide(temp, normFac)
-        return g
+        """
+        self.checkassp()
+
+        za_rad_grid = np.radians(self.za_grid)
+        return 2 * np.pi * np.trapz(
+            self.pha_mat_data[:, :, :, 0, 0, 0, 0] * np.sin(za_rad_grid),
+            za_rad_grid, axis=-1)
 
     def checkassp(self):
         """Verfies properties of SSP.
 
         Raises:
-            PyARTSError: If ptype is not macroscopically isotropic, or if first
-                and last value of za_grid does not equal exactly 0 and 180
-                respectively.
+            PyARTSError: If ptype is not totally random (or macroscopically
+                isotropic), or if first and last value of za_grid does not
+                equal exactly 0 and 180 respectively.
         """
 
-        if self.ptype != "macroscopically_isotropic":
+        if self.ptype not in _totally_random_ptypes:
             raise RuntimeError(
                 "So far just complete random orientation is handled.")
 
@@ -1124,3 +1158,59 @@ class ScatteringMetaData:
         xmlwriter.write_xml(self.diameter_volume_equ)
         xmlwriter.write_xml(self.diameter_area_equ_aerodynamical)
         xmlwriter.close_tag()
+
+
+_scattering_property_methods = {
+    'g': SingleScatteringData.assp2g,
+    'backscatter': SingleScatteringData.assp2backcoef,
+    'ssa': SingleScatteringData.assp2ssa,
+    'scattering': SingleScatteringData.integrate,
+}
+
+
+def scattering_properties(scattering_data, properties=None):
+    """Derive scattering properties of many particles.
+
+    Parameters:
+        scattering_data: A SingleScatteringData object, a (nested) list of
+            them, e.g. an ArrayOfArrayOfSingleScatteringData for several
+            habits, or the name of an ARTS XML file with such data. Binary
+            XML files are memory-mapped, so only the phase matrix elements
+            that are needed are read from the disk.
+        properties (list): Names of the properties to derive. Allowed are
+            *g* (:meth:`~SingleScatteringData.assp2g`), *backscatter*
+            (:meth:`~SingleScatteringData.assp2backcoef`), *ssa*
+            (:meth:`~SingleScatteringData.assp2ssa`) and *scattering*
+            (:meth:`~SingleScatteringData.integrate`). Default are all.
+
+    Returns:
+        dict: The property names are keys for the derived properties. They
+        have the same nesting as *scattering_data* with one array of shape
+        (f_grid, T_grid) for each particle.
+
+    Example:
+        >>> props = scattering_properties('scat_data.xml', ['g', 'ssa'])
+        >>> props['g'][0][3]  # habit 0, particle 3
+    """
+    if isinstance(scattering_data, str):
+        # The scattering types are imported by typhon.arts.xml:
+        from .xml import load
+        scattering_data = load(scattering_data, mmap=True)
+
+    if properties is None:
+        properties = list(_scattering_property_methods)
+    for name in properties:
+        if name not in _scattering_property_methods:
+            raise ValueError(
+                "Unknown scattering property '{}'! Allowed are: {}".format(
+                    name, ", ".join(_scattering_property_methods)))
+
+    def derive(data, method):
+        if isinstance(data, SingleScatteringData):
+            return method(data)
+        return [derive(item, method) for item in data]
+
+    return {
+        name: derive(scattering_data, _scattering_property_methods[name])
+        for name in properties
+    }
@@ -5,20 +5,28 @@
 
 from __future__ import absolute_import
 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import functools
 import gzip
 import glob
 import itertools
+import json
 import os
 from os.path import isfile, join, basename, splitext, dirname
+import tempfile
+from xml.etree import ElementTree
 
 from . import read
 from . import write
+from .names import dimension_names
 
 __all__ = [
     'load',
     'save',
     'load_directory',
+    'load_files',
     'load_indexed',
+    'make_manifest',
     'make_binary',
     'make_directory_binary',
 ]
@@ -77,13 +85,16 @@ def save(var, filename, precision='.7e', format='ascii', comment=None,
             raise RuntimeError('Unknown output format "{}".'.format(format))
 
 
-def load(filename):
+def load(filename, mmap=False):
     """Load a variable from an ARTS XML file.
 
     The input file can be either a plain or gzipped XML file
 
     Args:
         filename (str): Name of ARTS XML file.
+        mmap (bool): If the data is in binary format, memory-map all
+            matrices and tensors read-only instead of reading them. Only the
+            parts of them that are accessed are read from the disk.
 
     Returns:
         Data from the XML file. Type depends on data in file.
@@ -110,29 +121,58 @@ def load(filename):
     with xmlopen(filename, 'rb') as fp:
         if isfile(binaryfilename):
             with open(binaryfilename, 'rb',) as binaryfp:
-                return read.parse(fp, binaryfp).getroot().value()
+                return read.parse(fp, binaryfp, mmap).getroot().value()
         else:
             return read.parse(fp).getroot().value()
 
 
-def load_directory(directory, exclude=None):
-    """Load all XML files in a given directory.
-
-    Search given directory  for files with ``.xml`` or ``.xml.gz`` extension
-    and try to load them using :func:`load`.
+def load_files(filenames, max_workers=None, worker_type='thread',
+               mmap=False):
+    """Load several ARTS XML files, optionally in parallel.
 
     Parameters:
-        directory (str): Path to the directory.
-        exclude (Container[str]): Filenames to exclude.
+        filenames (Iterable[str]): Names of the ARTS XML files.
+        max_workers (int): Number of threads or processes that load the
+            files in parallel. By default, the files are loaded one after
+            another.
+        worker_type (str): Either 'thread' (default) or 'process'. Threads
+            share the memory with the caller, but the parsing of ASCII files
+            holds the global interpreter lock. Processes parse in parallel
+            but their results have to be pickled back.
+        mmap (bool): Memory-map the tensors of binary files, see
+            :func:`load`.
 
     Returns:
-        dict: Filenames without extension are keys for the file content.
+        list: The file contents in the order of *filenames*.
 
     Example:
-        Load all files in ``foo`` except for the lookup table in
-        ``abs_lookup.xml.``
+        >>> load_files(['a.xml', 'b.xml'], max_workers=4)
+    """
+    return _map(functools.partial(load, mmap=mmap), list(filenames),
+                max_workers, worker_type)
 
-        >>> load_directory('foo', exclude=['abs_lookup.xml'])
+
+def _map(function, arguments, max_workers, worker_type):
+    """Call function for all arguments in a pool and keep their order."""
+    if max_workers is None or len(arguments) < 2:
+        return [function(argument) for argument in arguments]
+
+    if worker_type == 'thread':
+        pool_class = ThreadPoolExecutor
+    elif worker_type == 'process':
+        pool_class = ProcessPoolExecutor
+    else:
+        raise ValueError('Unknown worker type "{}".'.format(worker_type))
+
+    with pool_class(max_workers) as pool:
+        return list(pool.map(function, arguments))
+
+
+def _find_xml_files(directory, exclude=None):
+    """Find all XML files in a given directory.
+
+    Returns:
+        dict: Filenames without extension are keys for the file paths.
     """
     def includefile(f):
         """Check if to include file."""
@@ -150,12 +190,202 @@ def load_directory(directory, exclude=None):
     gzfiles = filter(includefile, glob.iglob(join(directory, '*.xml.gz')))
     gzfiles = map(stripext, gzfiles)
 
-    # Store XML file contents in a dictionary, using the filename as key.
-    return {stripext(basename(f)): load(f)
+    return {stripext(basename(f)): f
             for f in itertools.chain(xmlfiles, gzfiles)}
 
 
-def load_indexed(filename):
+def _file_status(filename):
+    """Return the total size and the latest modification time of an XML file
+    and its binary file."""
+    if not isfile(filename) and isfile(filename + '.gz'):
+        filename += '.gz'
+
+    stats = [os.stat(filename)]
+    if isfile(filename + '.bin'):
+        stats.append(os.stat(filename + '.bin'))
+    return (sum(stat.st_size for stat in stats),
+            max(stat.st_mtime_ns for stat in stats))
+
+
+def _file_header(filename):
+    """Read the type and shape of the variable in an XML file.
+
+    Only the beginning of the file is parsed.
+    """
+    if not isfile(filename) and isfile(filename + '.gz'):
+        filename += '.gz'
+    xmlopen = gzip.open if filename.endswith('.gz') else open
+
+    with xmlopen(filename, 'rb') as fp:
+        for _, elem in ElementTree.iterparse(fp, events=('start',)):
+            if elem.tag not in ('arts', 'comment'):
+                break
+        else:
+            return None, None
+
+    if elem.tag == 'Array':
+        return 'ArrayOf' + elem.attrib['type'], [int(elem.attrib['nelem'])]
+    if 'nelem' in elem.attrib:
+        return elem.tag, [int(elem.attrib['nelem'])]
+    # turn dims around: in ARTS, [10 x 1 x 1] means 10 pages, 1 row, 1 col
+    shape = [int(elem.attrib[dim]) for dim in dimension_names
+             if dim in elem.attrib][::-1]
+    return elem.tag, shape
+
+
+def make_manifest(directory, manifest=None, exclude=None):
+    """Create or update the manifest of an XML directory.
+
+    The manifest lists all XML files in the directory with their size,
+    modification time, ARTS type and shape. Only the headers of new or
+    modified files are read. :func:`load_directory` can use the manifest
+    instead of searching the directory.
+
+    Parameters:
+        directory (str): Path to the directory.
+        manifest (str): Path to a JSON file where the manifest is stored.
+            If it exists, it is updated.
+        exclude (Container[str]): Filenames to exclude.
+
+    Returns:
+        dict: Filenames without extension are keys for dictionaries with
+        the *file* name (relative to the directory), *size*, *mtime*
+        (in nanoseconds), *type* and *shape*.
+
+    Example:
+        >>> make_manifest('scattering', 'scattering/manifest.json')
+        {'ssd_0': {'file': 'ssd_0.xml', 'size': 74012, 'mtime': ...,
+                   'type': 'SingleScatteringData', 'shape': []}, ...}
+    """
+    entries = {}
+    if manifest is not None and isfile(manifest):
+        entries = _read_manifest(manifest)
+
+    files = _find_xml_files(directory, exclude)
+    entries = {
+        name: _manifest_entry(directory, filename, entries.get(name))
+        for name, filename in sorted(files.items())
+    }
+
+    if manifest is not None:
+        _write_manifest(manifest, entries)
+    return entries
+
+
+def _manifest_entry(directory, filename, entry=None):
+    """Return the manifest entry of a file (updated if it has changed)."""
+    size, mtime = _file_status(filename)
+    if entry is not None and entry['size'] == size \
+            and entry['mtime'] == mtime:
+        return entry
+
+    datatype, shape = _file_header(filename)
+    return {
+        'file': os.path.relpath(filename, directory),
+        'size': size,
+        'mtime': mtime,
+        'type': datatype,
+        'shape': shape,
+    }
+
+
+def _read_manifest(manifest):
+    with open(manifest) as file:
+        return json.load(file)['entries']
+
+
+def _write_manifest(manifest, entries):
+    # Write to a temporary file first, so that other processes never see an
+    # incomplete manifest:
+    fd, tmpfile = tempfile.mkstemp(
+        dir=dirname(os.path.abspath(manifest)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as file:
+            json.dump({'entries': entries}, file, indent=1)
+        os.replace(tmpfile, manifest)
+    except BaseException:
+        os.remove(tmpfile)
+        raise
+
+
+def load_directory(directory, exclude=None, names=None, manifest=None,
+                   max_workers=None, worker_type='thread', mmap=False):
+    """Load all XML files in a given directory.
+
+    Search given directory  for files with ``.xml`` or ``.xml.gz`` extension
+    and try to load them using :func:`load`.
+
+    If a *manifest* is given (see :func:`make_manifest`), the files are
+    taken from it instead of searching the directory. The manifest is
+    created if it does not exist yet. Entries of files that have changed
+    since are updated.
+
+    Parameters:
+        directory (str): Path to the directory.
+        exclude (Container[str]): Filenames to exclude.
+        names (Iterable[str]): Load only the files with these names (without
+            extension).
+        manifest (str): Path to a JSON file with the manifest of the
+            directory.
+        max_workers (int): Number of threads or processes that load the
+            files in parallel, see :func:`load_files`. By default, the files
+            are loaded one after another.
+        worker_type (str): Either 'thread' (default) or 'process'.
+        mmap (bool): Memory-map the tensors of binary files, see
+            :func:`load`.
+
+    Returns:
+        dict: Filenames without extension are keys for the file content.
+        The keys are sorted.
+
+    Example:
+        Load all files in ``foo`` except for the lookup table in
+        ``abs_lookup.xml.``
+
+        >>> load_directory('foo', exclude=['abs_lookup.xml'])
+
+        Load two files of a large directory with a manifest:
+
+        >>> load_directory('foo', names=['t_field', 'z_field'],
+        ...                manifest='foo/manifest.json')
+    """
+    if manifest is None:
+        files = _find_xml_files(directory, exclude)
+    else:
+        if isfile(manifest):
+            entries = _read_manifest(manifest)
+        else:
+            entries = make_manifest(directory, manifest)
+        files = {
+            name: join(directory, entry['file'])
+            for name, entry in entries.items()
+            if exclude is None or basename(entry['file']) not in exclude
+        }
+
+    if names is None:
+        names = sorted(files)
+    else:
+        names = list(names)
+        missing = [name for name in names if name not in files]
+        if missing:
+            raise KeyError('No XML files for {}.'.format(', '.join(missing)))
+
+    if manifest is not None:
+        # Only the files that are loaded are checked:
+        changed = {
+            name: _manifest_entry(directory, files[name], entries[name])
+            for name in names
+        }
+        if any(entry is not entries[name] for name, entry in changed.items()):
+            _write_manifest(manifest, {**entries, **changed})
+
+    contents = load_files([files[name] for name in names], max_workers,
+                          worker_type, mmap)
+    return dict(zip(names, contents))
+
+
+def load_indexed(filename, max_workers=None, worker_type='thread',
+                 mmap=False):
     """Load all indexed XML files matching the given filename.
 
     The function searches all files matching the pattern
@@ -166,6 +396,12 @@ def load_indexed(filename):
 
     Parameters:
         filename (str): Filename.
+        max_workers (int): Number of threads or processes that load the
+            files in parallel, see :func:`load_files`. By default, the files
+            are loaded one after another.
+        worker_type (str): Either 'thread' (default) or 'process'.
+        mmap (bool): Memory-map the tensors of binary files, see
+            :func:`load`.
 
     Returns:
         list: List of file contents.
@@ -193,9 +429,10 @@ def load_indexed(filename):
     ret = (maxindex + 1) * [None]
 
     # Fill list with file contents (file index matching list index).
-    for f in files:
-        findex = int(f.split('.')[iidx])
-        ret[findex] = load(f)
+    indices = [int(f.split('.')[iidx]) for f in files]
+    contents = load_files(files, max_workers, worker_type, mmap)
+    for findex, content in zip(indices, contents):
+        ret[findex] = content
 
     return ret
 
@@ -17,6 +17,17 @@ from .. import types
 __all__ = ['parse']
 
 
+def _memmap(binaryfp, dtype, dims):
+    """Map an array at the current position of a binary file into memory.
+
+    The file position is moved behind the array as if it had been read.
+    """
+    array = np.memmap(binaryfp.name, dtype=dtype, mode='r',
+                      offset=binaryfp.tell(), shape=tuple(dims))
+    binaryfp.seek(array.nbytes, 1)
+    return array
+
+
 class ARTSTypesLoadMultiplexer:
     """Used by the xml.etree.ElementTree to parse ARTS variables.
 
@@ -124,6 +135,8 @@ class ARTSTypesLoadMultiplexer:
         dims = [int(elem.attrib[dim]) for dim in dimnames]
         if np.prod(dims) == 0:
             flatarr = np.ndarray(dims)
+        elif elem.binaryfp is not None and elem.mmap:
+            flatarr = _memmap(elem.binaryfp, np.float64, dims)
         elif elem.binaryfp is not None:
             flatarr = np.fromfile(elem.binaryfp, dtype=np.float64,
                                   count=np.prod(np.array(dims)))
@@ -141,6 +154,8 @@ class ARTSTypesLoadMultiplexer:
         dims = [int(elem.attrib[dim]) for dim in dimnames]
         if np.prod(dims) == 0:
             flatarr = np.ndarray(dims, dtype=np.complex128)
+        elif elem.binaryfp is not None and elem.mmap:
+            flatarr = _memmap(elem.binaryfp, np.complex128, dims)
         elif elem.binaryfp is not None:
             flatarr = np.fromfile(elem.binaryfp, dtype=np.complex128,
                                   count=np.prod(np.array(dims)))
@@ -158,6 +173,7 @@ class ARTSTypesLoadMultiplexer:
 class ARTSElement(ElementTree.Element):
     """Element with value interpretation."""
     binaryfp = None
+    mmap = False
 
     def value(self):
         if hasattr(types, self.tag):
@@ -173,11 +189,14 @@ class ARTSElement(ElementTree.Element):
                 raise RuntimeError('Unknown ARTS type {}'.format(self.tag))
 
 
-def parse(source, binaryfp=None):
+def parse(source, binaryfp=None, mmap=False):
     """Parse ArtsXML file from source.
 
     Args:
         source (str): Filename or file pointer.
+        binaryfp: File pointer of the binary file with the data.
+        mmap (bool): Memory-map the matrices and tensors in the binary file
+            instead of reading them.
 
     Returns:
         xml.etree.ElementTree: XML Tree of the ARTS data file.
@@ -187,6 +206,7 @@ def parse(source, binaryfp=None):
                         ARTSElement.__bases__,
                         dict(ARTSElement.__dict__))
     arts_element.binaryfp = binaryfp
+    arts_element.mmap = mmap
     return ElementTree.parse(source,
                              parser=ElementTree.XMLParser(
                                  target=ElementTree.TreeBuilder(
@@ -8,10 +8,10 @@ import traceback
 
 import numpy as np
 import pandas as pd
-from typhon.geodesy import great_circle_distance
+from typhon.fastgeodesy import great_circle_distance
 from typhon.geographical import GeoIndex
 from typhon.utils import add_xarray_groups, get_xarray_groups
-from typhon.utils.timeutils import to_datetime, to_timedelta, Timer
+from typhon.utils.timeutils import timings, to_datetime, to_timedelta, Timer
 import xarray as xr
 
 __all__ = [
@@ -234,6 +234,7 @@ class Collocator:
             "skip_file_errors": skip_file_errors,
             "post_processor": post_processor,
             "post_processor_kwargs": post_processor_kwargs,
+            "collect_timings": timings.enabled,
         })
 
         # This list contains all running processes
@@ -279,7 +280,12 @@ class Collocator:
 
             # Get all results from the result queue
             while not results.empty():
-                process, progress, result = results.get()
+                process, progress, result, process_timings = results.get()
+
+                # The processes send the timings they collected since their
+                # last message:
+                if process_timings is not None:
+                    timings.merge(process_timings)
 
                 # The process might be crashed. To keep the remaining time
                 # estimation useful, we exclude the crashed process from the
@@ -346,15 +352,16 @@ class Collocator:
     @staticmethod
     def _process_caller(
             self, results, errors, name, output, bundle, post_processor,
-            post_processor_kwargs, **kwargs):
+            post_processor_kwargs, collect_timings=False, **kwargs):
         """Wrapper around _collocate_matches
 
         This function is called for each process. It communicates with the main
         process via the result and error queue.
 
         Result Queue:
-            Adds for each collocated file match the process name, its progress
-            and the actual results.
+            Adds for each collocated file match the process name, its progress,
+            the actual results and the timings collected since the last
+            message (or None if *collect_timings* is false).
 
         Error Queue:
             If an error is raised, the name of this proces and the error
@@ -362,6 +369,17 @@ class Collocator:
         """
         self.name = name
 
+        if collect_timings:
+            timings.reset()
+            timings.enable()
+
+        def put(progress, result):
+            process_timings = None
+            if collect_timings:
+                process_timings = timings.snapshot()
+                timings.reset()
+            results.put([name, progress, result, process_timings])
+
         # We keep track of how many file pairs we have already processed to
         # make the error debugging easier. We need the match in flat form:
         matches = [
@@ -386,7 +404,7 @@ class Collocator:
                 progress = 100 * processed / len(matches)
 
                 if collocations is None:
-                    results.put([name, progress, None])
+                    put(progress, None)
                     continue
 
                 # The user does not want to bundle anything therefore just save
@@ -396,7 +414,7 @@ class Collocator:
                             collocations, attributes, output,
                             post_processor, post_processor_kwargs
                     )
-                    results.put([name, progress, result])
+                    put(progress, result)
                     continue
 
                 # The user may want to bundle the collocations before writing
@@ -412,7 +430,7 @@ class Collocator:
                         cached_attributes, output,
                         post_processor, post_processor_kwargs
                     )
-                    results.put([name, progress, result])
+                    put(progress, result)
 
                     cached_data = []
                     cached_attributes = {}
@@ -435,14 +453,12 @@ class Collocator:
                     cached_attributes, output,
                     post_processor, post_processor_kwargs
                 )
-                results.put([name, progress, result])
+                put(progress, result)
 
         except Exception as exception:
             # Tell the main process to stop considering this process for the 
             # remaining processing time:
-            results.put(
-                [name, 100., ProcessCrashed]
-            )
+            put(100., ProcessCrashed)
 
             self._error("ERROR: I got a problem and terminate!")
 
@@ -593,6 +609,7 @@ class Collocator:
             yield collocations, attributes
 
 
+    @timings.timed("Collocator.collocate")
     def collocate(
             self, primary, secondary, max_interval=None, max_distance=None,
             bin_factor=1, magnitude_factor=10, tunnel_limit=None, start=None,
@@ -883,6 +900,7 @@ class Collocator:
 
         return primary_name, primary, secondary_name, secondary
 
+    @timings.timed("Collocator._prepare_data")
     def _prepare_data(self, primary, secondary, max_interval, start, end):
         """Prepare the data for the collocation search
         
@@ -1050,6 +1068,7 @@ class Collocator:
         #     new_dims.append(new_dim)
         return data.stack(collocation=dims)
 
+    @timings.timed("Collocator._create_return")
     def _create_return(
             self, primary, secondary, primary_name, secondary_name,
             original_pairs, intervals, distances,
@@ -1197,6 +1216,7 @@ class Collocator:
     def get_meta_group():
         return f"Collocations"
 
+    @timings.timed("Collocator.spatial_search_with_temporal_binning")
     def spatial_search_with_temporal_binning(
             self, primary, secondary, max_distance, max_interval
     ):
@@ -1292,6 +1312,7 @@ class Collocator:
         pairs[1] += offset2
         return pairs, distances
 
+    @timings.timed("Collocator.spatial_search")
     def spatial_search(self, lat1, lon1, lat2, lon2, max_distance):
         # Finding collocations is expensive, therefore we want to optimize it
         # and have to decide which points to use for the index building.
@@ -1389,10 +1410,12 @@ class Collocator:
         # Otherwise, just use the larger dataset:
         return primary[0].size > secondary[0].size
 
+    @timings.timed("Collocator.temporal_search")
     def temporal_search(self, primary, secondary, max_interval):
         raise NotImplementedError("Not yet implemented!")
         #return self.no_pairs, self.no_intervals
 
+    @timings.timed("Collocator._temporal_check")
     def _temporal_check(
             self, primary_time, secondary_time, max_interval
     ):
@@ -19,6 +19,7 @@ __all__ = [
     "Collocator",
     "Collocations",
     "expand",
+    "register_collapser",
 ]
 
 
@@ -215,11 +216,11 @@ class Collocations(FileSet):
         print(f"{timer} for finding all collocations")
 
 
-@numba.jit
+@numba.jit(nopython=True)
 def _rows_for_secondaries_numba(primary):
     """Helper function for collapse - numba optimized"""
-    current_row = np.zeros(primary.size, dtype=int)
-    rows = np.zeros(primary.size, dtype=int)
+    current_row = np.zeros(primary.size, dtype=np.int64)
+    rows = np.zeros(primary.size, dtype=np.int64)
     i = 0
     for p in primary:
         rows[i] = current_row[p]
@@ -240,6 +241,159 @@ def _rows_for_secondaries(primary):
     return rows
 
 
+def _csr_layout(primary_indices):
+    """Helper function for collapse
+
+    Creates a CSR (compressed sparse row) layout for the secondaries: all
+    secondaries of the i-th primary are stored in the segment
+    ``offsets[i]:offsets[i+1]``.
+
+    Args:
+        primary_indices: Index of the primary for each collocation.
+
+    Returns:
+        The segment offsets (length: number of primaries + 1) and the position
+        of each collocation in the CSR layout.
+    """
+    # Numba produces an overhead, hence we use the pure-python version for
+    # small datasets:
+    if len(primary_indices) < 1000:
+        rows_in_bins = _rows_for_secondaries(primary_indices)
+    else:
+        rows_in_bins = _rows_for_secondaries_numba(primary_indices)
+
+    offsets = np.zeros(np.max(primary_indices) + 2, dtype=int)
+    np.cumsum(np.bincount(primary_indices), out=offsets[1:])
+
+    return offsets, offsets[primary_indices] + rows_in_bins
+
+
+@numba.jit(nopython=True)
+def _segment_statistics(values, offsets, with_median):
+    """Helper function for collapse - apply the standard collapsers
+
+    Calculates the number of valid points, mean, standard deviation, minimum,
+    maximum and (optionally) median of each segment and column in one pass.
+    NaNs are ignored.
+    """
+    n_segments = offsets.size - 1
+    n_columns = values.shape[1]
+    number = np.zeros((n_segments, n_columns), dtype=np.int64)
+    statistics = np.full((5, n_segments, n_columns), np.nan)
+    buffer = np.empty(values.shape[0])
+
+    for i in range(n_segments):
+        for j in range(n_columns):
+            count = 0
+            mean = 0.
+            m2 = 0.
+            minimum = np.inf
+            maximum = -np.inf
+            for k in range(offsets[i], offsets[i+1]):
+                value = values[k, j]
+                if np.isnan(value):
+                    continue
+                buffer[count] = value
+                count += 1
+                # Welford's algorithm for numerical stability
+                delta = value - mean
+                mean += delta / count
+                m2 += delta * (value - mean)
+                minimum = min(minimum, value)
+                maximum = max(maximum, value)
+
+            number[i, j] = count
+            if count == 0:
+                continue
+            statistics[0, i, j] = mean
+            statistics[1, i, j] = np.sqrt(m2 / count)
+            statistics[2, i, j] = minimum
+            statistics[3, i, j] = maximum
+            if with_median:
+                statistics[4, i, j] = np.median(buffer[:count])
+
+    return number, statistics
+
+
+@numba.jit(nopython=True)
+def _segment_reduce(kernel, values, offsets):
+    """Helper function for collapse - apply a user-registered collapser"""
+    n_segments = offsets.size - 1
+    n_columns = values.shape[1]
+    reduced = np.full((n_segments, n_columns), np.nan)
+    buffer = np.empty(values.shape[0])
+
+    for i in range(n_segments):
+        for j in range(n_columns):
+            count = 0
+            for k in range(offsets[i], offsets[i+1]):
+                if not np.isnan(values[k, j]):
+                    buffer[count] = values[k, j]
+                    count += 1
+            if count:
+                reduced[i, j] = kernel(buffer[:count])
+
+    return reduced
+
+
+# The standard collapsers are computed together by _segment_statistics:
+_STANDARD_COLLAPSERS = ("number", "mean", "std", "min", "max", "median")
+
+# Collapsers registered via register_collapser:
+_REGISTERED_COLLAPSERS = {}
+
+
+def register_collapser(name, kernel):
+    """Register a new collapser function for :func:`collapse`
+
+    Args:
+        name: Name of the collapser. This is used as suffix for the collapsed
+            variables.
+        kernel: A numba-compiled function (e.g. decorated with
+            ``numba.njit``) that gets a 1-D float array with all valid
+            (non-NaN) secondary values of one primary and returns a scalar.
+
+    Returns:
+        None
+
+    Examples:
+        .. code-block:: python
+
+            import numba
+            from typhon.collocations import collapse, register_collapser
+
+            @numba.njit
+            def value_range(values):
+                return values.max() - values.min()
+
+            register_collapser("range", value_range)
+
+            collapsed = collapse(collocations, collapser=["mean", "range"])
+    """
+    if name in _STANDARD_COLLAPSERS:
+        raise ValueError(
+            f"'{name}' is a standard collapser and cannot be overwritten!")
+    if not hasattr(kernel, "py_func"):
+        raise ValueError(
+            f"The collapser '{name}' must be a numba-compiled function!")
+
+    _REGISTERED_COLLAPSERS[name] = kernel
+
+
+def _collapse_densely(func, values, rows_in_bins, primary_indices, shape):
+    """Helper function for collapse - apply a legacy collapser function
+
+    Legacy collapser functions expect a NaN-padded matrix with the shape
+    N(max. number of secondaries per primary) x N(primaries) x ...
+    """
+    binned_data = np.full(
+        [np.max(rows_in_bins) + 1, np.max(primary_indices) + 1, *shape],
+        np.nan
+    )
+    binned_data[rows_in_bins, primary_indices] = values
+    return func(binned_data, 0)
+
+
 def collapse(data, reference=None, collapser=None):
     """Collapse all multiple collocation points to a single data point
 
@@ -255,9 +409,18 @@ def collapse(data, reference=None, collapser=None):
         data:
         reference: Normally the name of the dataset with the largest
             footprints. All other dataset will be collapsed to its data points.
-        collapser: Dictionary with names of collapser functions to apply and
-            references to them. Defaults collpaser functions are *mean*, *std*
-            and *number* (count of valid data points).
+        collapser: Either a list with names of collapser functions to apply
+            or a dictionary with names of collapser functions and references
+            to them (they are applied in addition to the default collapser
+            functions). Available collapser functions are *mean*, *std*,
+            *number* (count of valid data points), *min*, *max*, *median*
+            and all functions registered with :func:`register_collapser`.
+            Default collapser functions are *mean*, *std* and *number*.
+            Functions in the dictionary can be numba-compiled functions as
+            for :func:`register_collapser` or functions with the signature
+            ``func(matrix, axis)`` that get a NaN-padded matrix. The latter
+            are deprecated since the matrix needs memory proportional to
+            N(primaries) x N(max. secondaries per primary).
 
     Returns:
         A xr.Dataset object with the collapsed data
@@ -295,54 +458,46 @@ def collapse(data, reference=None, collapser=None):
     primary_indices = pairs[int(reference_index)]
     secondary_indices = pairs[int(not reference_index)]
 
+    # The user may give his own collapser functions:
+    if collapser is None:
+        collapser = {}
+    if isinstance(collapser, dict):
+        collapser = {
+            "mean": "mean",
+            "std": "std",
+            "number": "number",
+            **collapser,
+        }
+    else:
+        collapser = {name: name for name in collapser}
+
+    for func_name, func in collapser.items():
+        if isinstance(func, str) and func not in _STANDARD_COLLAPSERS \
+                and func not in _REGISTERED_COLLAPSERS:
+            raise ValueError(
+                f"Unknown collapser '{func}'! Available collapsers are "
+                f"{list(_STANDARD_COLLAPSERS)} and the registered ones: "
+                f"{list(_REGISTERED_COLLAPSERS)}."
+            )
+
     # THE GOAL: We want to bin the secondary data according to the
     # primary indices and apply a collapse function (e.g. mean) to it.
     # THE PROBLEM: We might to group the data in many (!) bins that might
     # not have the same size and we have to apply a function onto each of
     # these bins. How to make this efficient?
-    # APPROACH 1: pandas and xarray provide the powerful groupby method
-    # which allows grouping by bins and applying a function to it.
-    # -> This does not scale well with big datasets (100k of primaries
-    # takes ~15 seconds).
-    # APPROACH 2: Applying functions onto matrix columns is very fast in
-    # numpy even if the matrix is big. We could create a matrix where each
-    # column acts as a primary bin, the number of its rows is the maximum
-    # number of secondaries per bin. Then, we fill the secondary data into
-    # the corresponding bins. Since they might be a different number of
-    # secondaries for each bin, there will be unfilled slots. We fill these
-    # slots with NaN values (so they won't affect the outcome of the
-    # collapser function). Now, we can apply the collapser function on the
-    # whole matrix along the columns.
-    # -> This approach is very fast but might need more space.
-    # We follow approach 2, since it may scale better than approach 1 and
-    # we normally do not have to worry about memory space. Gerrit's
-    # collocation toolkit in atmlab also follows a similar approach.
-    # Ok, let's start!
-
-    # The matrix has the shape of N(max. number of secondaries per primary)
-    # x N(unique primaries). So the columns are the primary bins. We know at
-    # which column to put the secondary data by using primary_indices. Now, we
-    # have to find out at which row to put them. For big datasets, this might
-    # be a very expensive function. Therefore, we have have two version: One
-    # (pure-python), which we use for small datasets, and one (numba-optimized)
-    # for big datasets because Numba produces an overhead:
-    #timer = time.time()
-    if len(primary_indices) < 1000:
-        rows_in_bins = _rows_for_secondaries(primary_indices)
-    #    print(f"{time.time()-timer:.2f} seconds for pure-python")
-    else:
-        rows_in_bins = _rows_for_secondaries_numba(primary_indices)
-    #    print(f"{time.time()-timer:.2f} seconds for numba")
-
-    # The user may give his own collapser functions:
-    if collapser is None:
-        collapser = {}
-    collapser = {
-        "mean": lambda m, a: np.nanmean(m, axis=a),
-        "std": lambda m, a: np.nanstd(m, axis=a),
-        "number": lambda m, a: np.count_nonzero(~np.isnan(m), axis=a),
-        **collapser,
-    }
+    # THE APPROACH: We sort the secondary data of all variables into one
+    # matrix with a CSR (compressed sparse row) layout, i.e. all secondaries
+    # of one primary are stored contiguously in one segment. The segment
+    # boundaries are given by offsets. Then numba kernels walk over all
+    # segments and columns and apply the collapser functions. In contrast to
+    # a NaN-padded matrix of N(max. number of secondaries per primary) x
+    # N(primaries), the memory scales only with the number of collocations.
+    offsets, positions = _csr_layout(primary_indices)
+
+    # All variables that have to be collapsed (their name, dimensions, shape
+    # and their start column in the CSR matrix):
+    to_collapse = []
+    columns = 0
 
     for var_name, var_data in data.variables.items():
         group, local_name = var_name.split("/", 1)
@@ -397,34 +552,57 @@ def collapse(data, reference=None, collapser=None):
         if local_name in ("time", "lat", "lon") or local_name.startswith("__"):
             continue
 
-        # The dimensions of the binner matrix:
-        binner_dims = [
-            np.max(rows_in_bins) + 1,
-            np.unique(primary_indices).size
-        ]
-
         # The data might have additional dimensions (e.g. brightness
-        # temperatures from MHS have 5 channels). We must now how many
-        # additional dimensions the data have and what their length is.
-        add_dim_sizes = [
-            var_data.shape[i]
-            for i, dim in enumerate(var_data.dims)
-            if dim != "collocation"
-        ]
-        binner_dims.extend(add_dim_sizes)
-
-        # Fill the data in the bins:
-        # Create an empty matrix:
-        binned_data = np.empty(binner_dims)
-
-        # Fill all slots with NaNs:
-        binned_data[:] = np.nan
-        binned_data[rows_in_bins, primary_indices] \
-            = var_data.isel(collocation=secondary_indices).values
-
+        # temperatures from MHS have 5 channels). They are flattened to
+        # additional columns in the CSR matrix.
+        shape = var_data.shape[1:]
+        to_collapse.append((var_name, var_data, shape, columns))
+        columns += int(np.prod(shape))
+
+    if not to_collapse:
+        return collapsed
+
+    # Fill the secondary data of all variables into the CSR matrix:
+    values = np.empty((positions.size, columns))
+    for _, var_data, shape, start in to_collapse:
+        values[positions, start:start+int(np.prod(shape))] = \
+            var_data.values[secondary_indices].reshape(positions.size, -1)
+
+    # Apply all standard collapsers at once:
+    number, statistics = _segment_statistics(
+        values, offsets, "median" in collapser.values()
+    )
+    results = {"number": number}
+    results.update(zip(_STANDARD_COLLAPSERS[1:], statistics))
+
+    # Apply the numba-compiled collapsers that were registered or passed
+    # directly:
+    for func_name, func in collapser.items():
+        if isinstance(func, str):
+            if func not in results:
+                results[func] = _segment_reduce(
+                    _REGISTERED_COLLAPSERS[func], values, offsets
+                )
+        elif hasattr(func, "py_func"):
+            results[func] = _segment_reduce(func, values, offsets)
+
+    for var_name, var_data, shape, start in to_collapse:
+        end = start + int(np.prod(shape))
         for func_name, func in collapser.items():
+            if func in results:
+                result = results[func][:, start:end]
+            else:
+                collapsed[f"{var_name}_{func_name}"] = \
+                    var_data.dims, _collapse_densely(
+                        func, values[positions, start:end].reshape(
+                            positions.size, *shape),
+                        positions - offsets[primary_indices],
+                        primary_indices, shape
+                    )
+                continue
+
             collapsed[f"{var_name}_{func_name}"] = \
-                var_data.dims, func(binned_data, 0)
+                var_data.dims, result.reshape(-1, *shape)
 
     return collapsed
 
@@ -21,6 +21,7 @@ import tempfile
 import datetime
 import sys
 import collections
+import concurrent.futures
 import warnings
 
 import numpy
@@ -80,6 +81,145 @@ class InvalidDataError(DataFileError):
 
 all_datasets = {}
 
+# Maximum number of candidate pairs sorted_merge_join checks at once
+_MAX_CANDIDATES = 1 << 24
+
+def _key_window(sorted_right, left, timetol):
+    """Positions in sorted_right of all candidates for matching left
+
+    Datetimes match if they differ by less than timetol, floats if they
+    are close according to `numpy.isclose`, everything else if it is
+    equal.  The windows for floats are slightly too wide, the candidates
+    still have to be checked with `_keys_match`.  A window has no upper
+    bound on its size: if many records share the first key, each of them
+    has all of them as candidates.
+    """
+    if left.dtype.kind == "M":
+        lower = left - timetol
+        upper = left + timetol
+        dtype = numpy.result_type(sorted_right.dtype, lower.dtype)
+        sorted_right = sorted_right.astype(dtype)
+        return (sorted_right.searchsorted(lower.astype(dtype), "right"),
+                sorted_right.searchsorted(upper.astype(dtype), "left"))
+    elif left.dtype.kind in "fc":
+        # |a - b| <= atol + rtol*|b| implies that b lies in this interval:
+        with numpy.errstate(invalid="ignore"):
+            width = (1e-8 + 1e-5*abs(left)) / (1 - 1e-5)
+        return (sorted_right.searchsorted(left - width, "left"),
+                sorted_right.searchsorted(left + width, "right"))
+    else:
+        return (sorted_right.searchsorted(left, "left"),
+                sorted_right.searchsorted(left, "right"))
+
+
+def _keys_match(left, right, timetol):
+    """Compare keys element-wise with the rules of `_key_window`"""
+    if left.dtype.kind == "M":
+        return abs(left - right) < timetol
+    elif left.dtype.kind in "fc":
+        return numpy.isclose(left, right)
+    else:
+        return left == right
+
+
+def sorted_merge_join(left_keys, right_keys,
+                      timetol=numpy.timedelta64(1, 's')):
+    """Find all pairs of records with matching keys
+
+    The records on both sides are sorted by their first key.  For each
+    record on the left, a binary search then finds the range of records on
+    the right whose first key matches.  These candidates are checked for the
+    other keys.  This takes O((n + m) log m) time for n records on the left
+    and m on the right, plus the number of candidates.  Every record may
+    match any number of records on the other side.
+
+    The number of candidates is not bounded: if k records on each side
+    share (almost) the same first key, all k**2 pairs are candidates.  They
+    are checked in blocks of at most about 16 million pairs, so that only
+    the matches have to fit into memory.
+
+    Datetimes match if they differ by less than `timetol`, floats if they
+    are close according to `numpy.isclose` and all other types if they are
+    equal.  Put the most selective key first, such as the time.
+
+    Arguments:
+
+        left_keys (Sequence[ndarray]): 1-D arrays with the keys of the
+            records on the left side, all of the same length.
+
+        right_keys (Sequence[ndarray]): 1-D arrays with the keys of the
+            records on the right side, in the same order as `left_keys`.
+
+        timetol (timedelta64): Tolerance for datetime keys.
+
+    Returns:
+
+        Tuple of two int64 arrays with the indices of all matching pairs
+        in the left and in the right records.  Pairs are sorted by the
+        left index and then by the first key of the right records.
+    """
+
+    if len(left_keys) != len(right_keys) or not left_keys:
+        raise ValueError("Need the same non-zero number of keys on both "
+                         "sides, got {:d} and {:d}".format(
+                             len(left_keys), len(right_keys)))
+    left_keys = [numpy.ma.getdata(k).ravel() for k in left_keys]
+    right_keys = [numpy.ma.getdata(k).ravel() for k in right_keys]
+
+    # Searching sorted values in a sorted array is a merge: the binary
+    # searches move through both arrays in order, which is much faster
+    # than searching in random order.
+    order = numpy.argsort(right_keys[0], kind="stable")
+    left_order = numpy.argsort(left_keys[0], kind="stable")
+    lower = numpy.empty(left_order.size, dtype=numpy.intp)
+    upper = numpy.empty(left_order.size, dtype=numpy.intp)
+    (lower[left_order], upper[left_order]) = _key_window(
+        right_keys[0][order], left_keys[0][left_order], timetol)
+    counts = (upper - lower).clip(min=0)
+
+    # Check the candidates for blocks of left records with together at most
+    # _MAX_CANDIDATES candidates (or one record with more):
+    ends = numpy.cumsum(counts)
+    pairs = [(numpy.empty(0, numpy.int64), numpy.empty(0, numpy.int64))]
+    start = 0
+    while start < counts.size:
+        stop = max(start + 1, ends.searchsorted(
+            ends[start] - counts[start] + _MAX_CANDIDATES, "right"))
+        pairs.append(_match_candidates(
+            left_keys, right_keys, order, lower[start:stop],
+            counts[start:stop], start, timetol))
+        start = stop
+
+    return (numpy.concatenate([p[0] for p in pairs]),
+            numpy.concatenate([p[1] for p in pairs]))
+
+
+def _match_candidates(left_keys, right_keys, order, lower, counts, first,
+                      timetol):
+    """Matching pairs among the candidates of a block of left records"""
+    # Expand the windows to pairs of candidates:
+    left_index = numpy.repeat(numpy.arange(counts.size), counts)
+    offsets = numpy.arange(left_index.size) - numpy.repeat(
+        numpy.cumsum(counts) - counts, counts)
+    right_index = order[numpy.repeat(lower, counts) + offsets]
+    left_index += first
+
+    matches = numpy.ones(left_index.size, dtype=bool)
+    for (left, right) in zip(left_keys, right_keys):
+        matches &= _keys_match(left[left_index], right[right_index], timetol)
+
+    return (left_index[matches].astype(numpy.int64),
+            right_index[matches].astype(numpy.int64))
+
+
+def _nearest_index(x, values):
+    """For each value, the index of the nearest element in sorted x"""
+    if x.size == 1:
+        return numpy.zeros(values.shape, dtype=numpy.int64)
+    i = numpy.searchsorted(x, values).clip(1, x.size-1)
+    return i - ((values - x[i-1]) <= (x[i] - values))
+
+
 class Dataset(metaclass=abc.ABCMeta):
     """Represents a dataset.
 
@@ -270,8 +410,8 @@ class Dataset(metaclass=abc.ABCMeta):
         ...
 
     # Cannot use functools.lru_cache because it cannot handle mutable
-    # results or arguments
-    @utils.cache.mutable_cache(maxsize=10)
+    # results or arguments.  Calls with mutable arguments are not cached.
+    @utils.cache.array_cache(maxbytes=4000*MiB, readonly=False)
     def read_period(self, start=None,
                           end=None,
                           onerror="skip",
@@ -284,7 +424,8 @@ class Dataset(metaclass=abc.ABCMeta):
                           simple_filters=(),
                           orbit_filters=None,
                           enforce_no_duplicates=True,
-                          excs=(DataFileError, filters.FilterError)):
+                          excs=(DataFileError, filters.FilterError),
+                          max_workers=None):
         """Read all granules between start and end, in bulk.
 
         Arguments:
@@ -349,6 +490,17 @@ class Dataset(metaclass=abc.ABCMeta):
             excs (Sequence[Exception]): what exceptions to try and catch
                 after every read.  Use with onorrer.
 
+            max_workers (int): Number of processes for reading
+                If larger than 1, granules are read in a pool of this
+                many worker processes.  The orbit filters, limits and
+                simple filters are applied in the calling process to
+                one granule after another, so that the results are
+                identical to reading serially, even for orbit filters
+                that keep state across granules.  At most twice as many
+                granules as workers are read ahead.  The dataset object
+                and all reading arguments must be picklable.  Defaults to
+                None (read serially).
+
         Returns:
             
             Masked array containing all data in period.  Invalid data may
@@ -396,8 +548,8 @@ class Dataset(metaclass=abc.ABCMeta):
         for of in orbit_filters:
             of.reset()
         # NB: https://stackoverflow.com/a/37585628/974555
-        extra_filter_args = collections.ChainMap(*(of.args_to_reader
-            for of in orbit_filters))
+        extra_filter_args = dict(collections.ChainMap(*(of.args_to_reader
+            for of in orbit_filters)))
 
         overlap_filters = [
             f for f in orbit_filters if isinstance(f, filters.OverlapFilter)]
@@ -405,30 +557,45 @@ class Dataset(metaclass=abc.ABCMeta):
         if len(overlap_filters) > 1:
             raise ValueError("Found {:d} overlap filters: {!s}".format(
                 len(overlap_filters), overlap_filters))
-        for (g_start, gran) in finder(start, end, return_time=True, 
-                                      include_last_before=True,
-                                      **locator_args):
-            try:
-                (cont, extra) = self.read(str(gran), fields=fields,
-                    pseudo_fields=pseudo_fields, **reader_args,
-                    **extra_filter_args)
-                for of in orbit_filters:
-                    cont = of.filter(cont, **extra)
-                # FIXME: handle cases where very few scanlines are left
-                # after filtering.  We may find errors downstream if there
-                # are very few scanlines left.
-                if (not late and
-                    cont[time].size > 0):
-
+        granules = finder(start, end, return_time=True,
+                          include_last_before=True, **locator_args)
+        read_args = (fields, pseudo_fields, reader_args, extra_filter_args,
+                     excs)
+        filter_args = (orbit_filters, late, limits, simple_filters, start,
+                       end, excs)
+        if max_workers is not None and max_workers > 1:
+            # Only read the granules in worker processes.  The filters may
+            # keep state across granules and are thus applied here in the
+            # original order.
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers)
+            futures = collections.deque()
+            results = (
+                (g, self._filter_granule_for_period(
+                    g[1], future.result(), *filter_args))
+                for (g, future) in self._submit_granules(
+                    executor, futures, granules, read_args, 2*max_workers))
+        else:
+            executor = None
+            results = (
+                (g, self._filter_granule_for_period(
+                    g[1], self._read_granule_for_period(g[1], *read_args),
+                    *filter_args))
+                for g in granules)
+        conts = []
+        try:
+            for ((g_start, gran), (cont, first)) in results:
+                try:
+                    if isinstance(cont, Exception):
+                        raise cont
                     if (enforce_no_duplicates and sorted and
-                            arr is not None and
-                            N>0 and (cont[time][0] <= latest)):
+                            first is not None and
+                            N>0 and (first <= latest)):
                         if isinstance(latest, xarray.DataArray):
                             latest = latest.values.astype("M8[ms]")
-                        if isinstance(cont[time][0], xarray.DataArray):
-                            conttime = cont[time][0].values.astype("M8[ms]")
+                        if isinstance(first, xarray.DataArray):
+                            conttime = first.values.astype("M8[ms]")
                         else:
-                            conttime = cont[time][0]
+                            conttime = first
                         raise InvalidDataError(
                             "Reading routine for {!s} returned data starting "
                             "{:%Y-%m-%d %H:%M:%S}, which precedes last entry "
@@ -441,41 +608,40 @@ class Dataset(metaclass=abc.ABCMeta):
                             "read_period.".format(gran,
                                 conttime.astype(datetime.datetime),
                                 latest.astype(datetime.datetime)))
-
-                    # NB: when datasets erroneously contain duplicate coordinates
-                    # (I'm looking at you, FIDUCEO/FCDR_HIRS#159!), this
-                    # comparison will cause a failure in xarray.  In this case,
-                    # compare values instead.
-                    arrrr = cont[time]
-                    if isinstance(arrrr, xarray.DataArray):
-                        arrrr = arrrr.values
-                    if not (arrrr[1:] >= arrrr[:-1]).all():
-                        raise InvalidDataError("Reader for {!s} returned data "
-                            "with unsorted time.  This must be fixed.".format(
-                                f))
-
-                cont = self._apply_limits_and_filters(cont, limits, simple_filters)
-
-            except excs as exc:
-                if onerror == "skip": # fields that reader relies upon
-                    logger.error("Can not read file {}: {}".format(
-                        gran, exc.args[0]))
-                    continue
+                except excs as exc:
+                    if onerror == "skip": # fields that reader relies upon
+                        logger.error("Can not read file {}: {}".format(
+                            gran, exc.args[0]))
+                        continue
+                    else:
+                        raise
                 else:
-                    raise
-            else:
-                (arr, N, latest) = self._add_gran_to_data(arr, cont, N, start,
-                                     end, g_start)
-#                contents.append(
-#                    cont[(cont[time]<=end)&(cont[time]>=start)])
-                if N > 0:
-                    anygood = True
-            if dobar:
-                bar.update(max((g_start-start) / (end-start),0))
+                    if isinstance(cont, xarray.Dataset):
+                        (arr, N, latest) = self._add_gran_to_data(arr, cont,
+                                             N, start, end, g_start)
+                    else:
+                        # Collect the granules first and copy them into
+                        # the preallocated output array in the end.
+                        conts.append(cont)
+                        N += cont.size
+                        if N > 0:
+                            latest = next(c[time][-1] for c in conts[::-1]
+                                          if c.size > 0)
+                    if N > 0:
+                        anygood = True
+                if dobar:
+                    bar.update(max((g_start-start) / (end-start),0))
+        finally:
+            if executor is not None:
+                for (_, future) in futures:
+                    future.cancel()
+                executor.shutdown()
         if dobar:
             bar.update(1)
             bar.finish()
         if anygood:
+            if conts:
+                arr = self._concatenate_granules(conts, N)
             # NB: filter finalise before or after dataset finalise?
             #
             arr = self._finalise_arr(arr, N)
@@ -489,6 +655,126 @@ class Dataset(metaclass=abc.ABCMeta):
         else:
             raise DataFileError("Can not find any valid data!")
 
+    def _submit_granules(self, executor, futures, granules, read_args,
+                         window):
+        """Read granules in an executor and yield them in order
+
+        Helper for read_period.  Not more than window granules are
+        submitted at once, so that not all of them are held in memory.
+        The pending futures are kept in futures, so that they can be
+        cancelled.
+
+        Yields:
+
+            Tuples of the granule (as from find_granules) and the future
+            of its content.
+        """
+        for g in granules:
+            futures.append((g, executor.submit(
+                self._read_granule_for_period, g[1], *read_args)))
+            if len(futures) >= window:
+                yield futures.popleft()
+        while futures:
+            yield futures.popleft()
+
+    def _read_granule_for_period(self, gran, fields, pseudo_fields,
+            reader_args, extra_filter_args, excs):
+        """Read a single granule for read_period
+
+        Helper for read_period.  This may run in a worker process, thus
+        exceptions listed in excs are returned rather than raised.
+
+        Returns:
+
+            Tuple of the content of the granule and the extra information
+            of the reader, or the caught exception.
+        """
+        try:
+            return self.read(str(gran), fields=fields,
+                pseudo_fields=pseudo_fields, **reader_args,
+                **extra_filter_args)
+        except excs as exc:
+            return exc
+
+    def _filter_granule_for_period(self, gran, result, orbit_filters, late,
+            limits, simple_filters, start, end, excs):
+        """Filter a single granule for read_period
+
+        Helper for read_period.  Always runs in the calling process, one
+        granule after another, because orbit filters may have state.
+        Exceptions listed in excs are returned rather than raised.
+
+        Returns:
+
+            Tuple of the filtered content of the granule between start and
+            end (or the caught exception) and the first time in the
+            granule before applying limits (or None if it shall not be
+            checked for duplicates).
+        """
+        time = self.time_field
+        first = None
+        if isinstance(result, Exception):
+            return (result, None)
+        (cont, extra) = result
+        try:
+            for of in orbit_filters:
+                cont = of.filter(cont, **extra)
+            # FIXME: handle cases where very few scanlines are left
+            # after filtering.  We may find errors downstream if there
+            # are very few scanlines left.
+            if (not late and
+                cont[time].size > 0):
+
+                first = cont[time][0]
+
+                # NB: when datasets erroneously contain duplicate coordinates
+                # (I'm looking at you, FIDUCEO/FCDR_HIRS#159!), this
+                # comparison will cause a failure in xarray.  In this case,
+                # compare values instead.
+                arrrr = cont[time]
+                if isinstance(arrrr, xarray.DataArray):
+                    arrrr = arrrr.values
+                if not (arrrr[1:] >= arrrr[:-1]).all():
+                    raise InvalidDataError("Reader for {!s} returned data "
+                        "with unsorted time.  This must be fixed.".format(
+                            gran))
+
+            cont = self._apply_limits_and_filters(cont, limits, simple_filters)
+        except excs as exc:
+            return (exc, None)
+        if not isinstance(cont, xarray.Dataset):
+            # only keep the segment we actually want
+            cont = cont[(cont[time]<end)&(cont[time]>=start)]
+        return (cont, first)
+
+    def _concatenate_granules(self, conts, N):
+        """Copy granules into a single preallocated array
+
+        Helper for read_period.
+        """
+        if N * conts[0].itemsize > self.maxsize:
+            raise MemoryError("This dataset is too large "
+                "for typhons little mind.  Continuing might "
+                "ultimately need {:,.0f} MiB of RAM.  This exceeds my "
+                "maximum (self.maxsize) of {:,.0f} MiB. "
+                "Sorry! ".format(
+                    N*conts[0].itemsize/MiB,
+                    self.maxsize/MiB))
+        mod = (numpy.ma if any(hasattr(c, "mask") for c in conts)
+               else numpy)
+        # The zeroed memory is only claimed when it is written to.  Each
+        # granule is released after copying it, so that the data are not
+        # held twice.
+        arr = mod.zeros(dtype=conts[0].dtype, shape=N)
+        if hasattr(conts[0], "fill_value"):
+            arr.fill_value = conts[0].fill_value
+        i = 0
+        for k in range(len(conts)):
+            cont, conts[k] = conts[k], None
+            self._add_cont_to_arr(arr, i, cont)
+            i += cont.size
+        return arr
+
     def _apply_limits_and_filters(self, cont, limits, simple_filters):
         if isinstance(cont, xarray.Dataset):
             if len(limits)>0:
@@ -647,8 +933,8 @@ class Dataset(metaclass=abc.ABCMeta):
         raise NotImplementedError()
 
     # Cannot use functools.lru_cache because it cannot handle mutable
-    # results or arguments
-    @utils.cache.mutable_cache(maxsize=10)
+    # results or arguments.  Calls with mutable arguments are not cached.
+    @utils.cache.array_cache(maxbytes=4000*MiB, readonly=False)
     def read(self, f=None, fields="all", pseudo_fields=None, **kwargs):
         """Read granule in file and do some other fixes
 
@@ -769,7 +1055,7 @@ class Dataset(metaclass=abc.ABCMeta):
 #        process=dict(
 #            my_data=lambda x: x.view(dtype="i1")))
     def combine(self, my_data, other_obj, other_data=None, other_args=None, trans=None,
-                timetol=numpy.timedelta64(1, 's'), time_name="time"):
+                timetol=numpy.timedelta64(1, 's'), time_name=None):
         """Combine with data from other dataset.
 
         Combine a set of measurements from this dataset with another
@@ -803,43 +1089,48 @@ class Dataset(metaclass=abc.ABCMeta):
                 corresponds to what field in `other_data`.  Optional; by
                 default, merges self.unique_fields and
                 other_obj.unique_fields, and assumes names between the two
-                are identical.  Order is relevant for optimal recursive
-                bisection search for matches, which is to be implemented.
+                are identical.  Order is relevant: the first pair of
+                fields is used for the sorted-merge search (see
+                `sorted_merge_join`), so it should be the most selective
+                one.  By default, this is `time_name`.
     
             timetol (timedelta64): For datetime types, `isclose` does not
                 work (https://github.com/numpy/numpy/issues/5610).  User
                 must pass an explicit tolerance, defaulting to 1 second.
 
-            time_name (str): Name for my time field.  Defaults to "time".
-                Used to determine the period to read from the other
-                dataset.
+            time_name (str): Name for my time field.  Defaults to
+                `time_field`.  Used to determine the period to read from
+                the other dataset.
 
         Returns:
 
-            Masked ndarray of same size as `my_data` and same `dtype` as
-            returned by `other_obj.read`.
+            Masked ndarray of same size and order as `my_data` and same
+            `dtype` as returned by `other_obj.read`.  If several records
+            in other match, the one nearest in the first field is used.
+            Use `combine_indices` to get all matches.
 
         TODO: Allow user to pass already-read data from other dataset.
         """
 
+        if time_name is None:
+            time_name = self.time_field
+
         if trans is None:
-            flds = list(self.unique_fields & other_obj.unique_fields)
+            flds = self._default_join_fields(other_obj, time_name)
             trans = collections.OrderedDict(zip(flds, flds))
 
         if other_args is None:
             other_args = {}
 
         if self.read_returns == "ndarray":
-            if other_data is None:
-                first = my_data[time_name].min().astype(datetime.datetime)
-                last = my_data[time_name].max().astype(datetime.datetime)
+            first = my_data[time_name].min().astype(datetime.datetime)
+            last = my_data[time_name].max().astype(datetime.datetime)
 
         elif self.read_returns == "xarray":
-            if other_data is None:
-                first = my_data[time_name].min().values.astype("M8[ms]"
-                    ).astype(datetime.datetime)
-                last = my_data[time_name].max().values.astype("M8[ms]"
-                    ).astype(datetime.datetime)
+            first = my_data[time_name].min().values.astype("M8[ms]"
+                ).astype(datetime.datetime)
+            last = my_data[time_name].max().values.astype("M8[ms]"
+                ).astype(datetime.datetime)
         else:
             raise ValueError("read_returns must be ndarray or xarray")
 
@@ -848,21 +1139,7 @@ class Dataset(metaclass=abc.ABCMeta):
                             **other_args)
         (my_prim, other_prim) = next(iter(trans.items()))
 
-        if self.read_returns == "ndarray":
-            # my_data needs to be sorted
-            try:
-                my_data._fill_value
-            except AttributeError:
-                my_data.sort(order=my_prim, kind="heapsort")
-            else:
-                # see 
-                # https://github.com/numpy/numpy/issues/8069
-                my_data.sort(order=my_prim, kind="heapsort",
-                                    fill_value=my_data._fill_value)
-
-        elif self.read_returns == "xarray":
-
-            # ensure sorted along time dimension
+        if self.read_returns == "xarray":
             if not len(my_data[my_prim].dims) == len(other_data[other_prim].dims) == 1:
                 raise ValueError(
                     "Must use 1-D index for finding combinations, "
@@ -872,37 +1149,7 @@ class Dataset(metaclass=abc.ABCMeta):
                         my_data[my_prim].dims,
                         other_prim, len(other_data[other_prim].dims),
                         other_data[other_prim].dims))
-            my_dim = my_data[my_prim].dims[0]
             other_dim = other_data[other_prim].dims[0]
-            if not (my_data[my_prim][1:] >= my_data[my_prim][:-1]).all():
-                warnings.warn("Primary/reference instrument data should "
-                    "be sorted in time to find matching data in other set. "
-                    f"Field {my_prim:s} in {self.name:s} is not sorted in "
-                    "time.  Note that this problem may be unavoidable if "
-                    "we are tasked to search for additional information "
-                    "for both pairs of collocations, and times are sorted "
-                    "according to one but not the other.  Therefore, I "
-                    "will force the sorting for now, but I'm not entirely "
-                    "sure this cannot lead to problems later.  You have "
-                    "been warned.", UserWarning)
-                my_data = my_data.loc[
-                    {my_data[my_prim].dims[0]:
-                    numpy.argsort(my_data[my_prim])}]
-
-        # through interpolation, find times in `other` closest to times in
-        # myself; hopefully that means the difference is zero
-        if issubclass(my_data[my_prim].dtype.type, numpy.datetime64):
-            x = other_data[other_prim].astype("<M8[ms]").astype("f8")
-            xx = my_data[my_prim].astype("<M8[ms]").astype("f8")
-        else:
-            x = other_data[other_prim]
-            xx = my_data[my_prim]
-
-        if self.read_returns == "ndarray":
-            ii = numpy.interp(xx, x,
-                numpy.arange(other_data[other_prim].shape[0])).round().astype(
-                    numpy.uint64)
-        else:
             if not other_data[other_prim].dtype.kind=="M":
                 raise ValueError("When finding combinations based "
                     "on xarray datasets, I can only do so based on "
@@ -914,44 +1161,50 @@ class Dataset(metaclass=abc.ABCMeta):
                         "that is not a coordinate, I'm confused, "
                         "should I interpolate it?  Assign as a coordinate "
                         "to be sure!")
-            ii = dict.fromkeys(utils.get_time_dimensions(other_data))
-            for k in ii.keys():
-                x = other_data[k].astype("<M8[ms]").astype("f8")
-                ii[k] = numpy.interp(xx, x,
-                    numpy.arange(x.shape[0])).round().astype(numpy.int64)
-
-#        if self.read_returns == "ndarray":
-#            other_combi = other_data[ii]
-#            # now go through fields to see that there is an actual match
-#        elif self.read_returns == "xarray":
-        other_combi = other_data[ii]
 
-        if self.read_returns == "ndarray":
-            near = numpy.all([(numpy.isclose(my_data[f_my], other_combi[f_oth])
-                    if issubclass(my_data[f_my].dtype.type,
-                                  numpy.inexact) else
-                    abs(my_data[f_my] - other_combi[f_oth]) < timetol
-                    if issubclass(my_data[f_my].dtype.type,
-                                  numpy.datetime64) else
-                    my_data[f_my] == other_combi[f_oth])
-                        for (f_my, f_oth) in trans.items()], 0)
-        elif self.read_returns == "xarray":
-            near = numpy.all([
-                (numpy.isclose(my_data[f_my].values,
-                               other_combi[f_oth].values)
-                    if issubclass(my_data[f_my].dtype.type,
-                                  numpy.inexact) else
-                    abs(my_data[f_my].values -
-                        other_combi[f_oth].values) < timetol
-                    if issubclass(my_data[f_my].dtype.type,
-                                  numpy.datetime64) else
-                    my_data[f_my].values == other_combi[f_oth].values)
-                        for (f_my, f_oth) in trans.items()], 0)
+        (my_index, other_index) = self.combine_indices(
+            my_data, other_data, trans=trans, timetol=timetol)
+
+        # Several records in other may match one of mine; take the one
+        # whose primary key is nearest.
+        my_keys = self._get_field(my_data, my_prim)
+        other_keys = self._get_field(other_data, other_prim)
+        if my_keys.dtype.kind == "M":
+            dtype = numpy.result_type(my_keys.dtype, other_keys.dtype)
+            distance = abs(my_keys.astype(dtype)[my_index].view("i8")
+                - other_keys.astype(dtype)[other_index].view("i8"))
+        elif my_keys.dtype.kind in "fc":
+            distance = abs(my_keys[my_index] - other_keys[other_index])
+        else:
+            distance = numpy.zeros(my_index.size)
+        if (numpy.diff(my_index) > 0).all():
+            # my_index is sorted, so each record has at most one match
+            (found, chosen) = (my_index, other_index)
+        else:
+            order = numpy.lexsort((distance, my_index))
+            (found, first) = numpy.unique(my_index[order], return_index=True)
+            chosen = other_index[order[first]]
+
+        ii = numpy.zeros(my_keys.size, dtype=numpy.int64)
+        ii[found] = chosen
+        near = numpy.zeros(my_keys.size, dtype=bool)
+        near[found] = True
+
+        if self.read_returns == "xarray":
+            # Other time dimensions (e.g. calibration cycles) do not match
+            # exactly; use the nearest time for them.
+            xx = my_data[my_prim].values
+            ii = {k: ii if k == other_dim else
+                     _nearest_index(other_data[k].values, xx)
+                  for k in utils.get_time_dimensions(other_data)}
+
+        other_combi = other_data[ii]
 
         if not near.any():
             # check time coverage
-            first_found = other_data["time"].min().values.astype("M8[ms]").astype(datetime.datetime)
-            last_found = other_data["time"].max().values.astype("M8[ms]").astype(datetime.datetime)
+            other_time = other_data[other_obj.time_field]
+            first_found = other_time.min().values.astype("M8[ms]").astype(datetime.datetime)
+            last_found = other_time.max().values.astype("M8[ms]").astype(datetime.datetime)
             if (abs(first_found - first) > timetol and
                 abs(last_found - last) > timetol):
                 raise ValueError(f"Primary covers "
@@ -982,6 +1235,65 @@ class Dataset(metaclass=abc.ABCMeta):
             
         return other_combi
 
+    def combine_indices(self, my_data, other_data, trans=None,
+                        timetol=numpy.timedelta64(1, 's')):
+        """Find all matching records in data from two datasets
+
+        Matches records like `combine`, but returns the indices of all
+        matching pairs, such that one record may match any number of
+        records in the other dataset.
+
+        Arguments:
+
+            my_data (ndarray or xarray.Dataset): Data for self.
+
+            other_data (ndarray or xarray.Dataset): Data for other.
+
+            trans (collections.OrderedDict): Dictionary of what field in
+                `my_data` corresponds to what field in `other_data`.  By
+                default, uses all fields of self.unique_fields that are
+                present in both, starting with `time_field`.
+
+            timetol (timedelta64): Tolerance for datetime fields.
+
+        Returns:
+
+            Tuple of two int64 arrays with the indices of matching records
+            in `my_data` and `other_data`, see `sorted_merge_join`.
+        """
+
+        if trans is None:
+            flds = [f for f in self._default_join_fields(
+                        self, self.time_field)
+                    if self._has_field(my_data, f)
+                    and self._has_field(other_data, f)]
+            trans = collections.OrderedDict(zip(flds, flds))
+
+        return sorted_merge_join(
+            [self._get_field(my_data, f) for f in trans.keys()],
+            [self._get_field(other_data, f) for f in trans.values()],
+            timetol=timetol)
+
+    def _default_join_fields(self, other_obj, time_name):
+        """Common unique fields, the time first and the rest sorted"""
+        flds = sorted(self.unique_fields & other_obj.unique_fields)
+        if time_name in flds:
+            flds.remove(time_name)
+            flds.insert(0, time_name)
+        return flds
+
+    @staticmethod
+    def _has_field(data, fld):
+        if isinstance(data, xarray.Dataset):
+            return fld in data.variables
+        return fld in data.dtype.names
+
+    @staticmethod
+    def _get_field(data, fld):
+        if isinstance(data, xarray.Dataset):
+            return data[fld].values
+        return numpy.ma.getdata(data[fld])
+
     def get_additional_field(self, M, fld):
         """Get additional field.
 
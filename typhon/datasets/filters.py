@@ -520,6 +520,65 @@ class HIRSBestLineFilter(OverlapFilter):
         # for (mult_ii, mult_cnt) in zip(ii[cnt>1], cnt[cnt>1]), but I
         # want to keep the indices so I can /write/ to ii
         multcnt_i_all = (cnt>1).nonzero()[0]
+        if multcnt_i_all.size == 0:
+            return arrsrt[ii]
+        if type(self).select_winner is not HIRSBestLineFilter.select_winner:
+            # subclass may choose winners differently, one set at a time
+            return self._finalise_per_set(arrsrt, ii, cnt, multcnt_i_all)
+
+        # All scanlines that are part of a set of duplicates, and for each
+        # of them the number of its set
+        mult_ii = ii[multcnt_i_all]
+        mult_cnt = cnt[multcnt_i_all]
+        starts = numpy.cumsum(mult_cnt) - mult_cnt
+        sets = numpy.repeat(numpy.arange(mult_ii.size), mult_cnt)
+        members = numpy.repeat(mult_ii - starts, mult_cnt) \
+            + numpy.arange(sets.size)
+
+        if self.warn_overlap:
+            self._warn_inconsistent_sets(arrsrt, members, starts, mult_cnt)
+
+        # flagscore is calculated per scanline, so scoring all scanlines at
+        # once gives the same scores as scoring each set.  The stable
+        # lexsort keeps the first of equal scores in front, like argmin,
+        # and masked scores are filled as by the argmin of masked arrays.
+        scores = self.ds.flagscore(arrsrt)[members]
+        scores = numpy.ma.filled(
+            scores, numpy.ma.minimum_fill_value(scores))
+        order = numpy.lexsort((scores, sets))
+        ii[multcnt_i_all] = members[order[starts]]
+        return arrsrt[ii]
+
+    def _warn_inconsistent_sets(self, arrsrt, members, starts, mult_cnt):
+        """Warn for each set of duplicates with inconsistent values
+
+        Compares each field column-wise with the first scanline of its set
+        with the same criteria as `_finalise_per_set`.
+        """
+        first = numpy.repeat(starts, mult_cnt)
+        consistent = {}
+        for nm in arrsrt.dtype.names:
+            if nm in self.knowndiff:
+                continue
+            values = arrsrt[nm][members]
+            same = (values[first]==values
+                    if values.dtype.kind[0] in "MmS"
+                    else numpy.isclose(values[first], values))
+            same = same.reshape(same.shape[0], -1).all(1)
+            consistent[nm] = numpy.logical_and.reduceat(same, starts)
+        inconsistent = ~numpy.all(
+            [v for v in consistent.values()], 0) if consistent else []
+        for i in numpy.flatnonzero(inconsistent):
+            fields_notclose = {nm for nm in consistent.keys()
+                if not consistent[nm][i]} - self.knowndiff
+            warnings.warn(
+                "Overlapping or duplicate scanlines "
+                "have inconsistent values for "
+                + ", ".join(list(fields_notclose)),
+                    UserWarning)
+
+    def _finalise_per_set(self, arrsrt, ii, cnt, multcnt_i_all):
+        """Select winners with select_winner, one set at a time"""
         for multcnt_i in multcnt_i_all:
             mult_ii = ii[multcnt_i]
             mult_cnt = cnt[multcnt_i]
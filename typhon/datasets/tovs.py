@@ -22,6 +22,7 @@ import logging
 import gzip
 import shutil
 import abc
+import hashlib
 import pathlib
 import warnings
 import xarray
@@ -49,6 +50,7 @@ from ..physics.units import ureg
 from ..physics.units import radiance_units as rad_u
 from ..physics.units import em
 from .. import config
+from ..version import __version__
 
 from . import filters
 
@@ -127,6 +129,14 @@ class HIRS(dataset.MultiSatelliteDataset, Radiometer, dataset.MultiFileDataset):
         this number is flagged, raise an exception (FIXME DOC) and throw
         away the entire granule.
 
+    Decoding, scaling and calibrating a granule is expensive.  If the
+    attribute decoded_cache_dir is set (e.g. in the typhonrc), the
+    decoded and calibrated scanlines and header of each granule are
+    stored there as uncompressed .npy files.  Later reads of the same
+    granule (same path, modification time, reading options and reader
+    version) return memory-mapped views on those files without decoding
+    anything.  The cache is never cleaned up automatically.
+
     Note that this class only reads in the standard HIRS data with its
     standard calibration.  Innovative calibrations including uncertainties
     are implemented in HIRSFCDR.
@@ -188,6 +198,12 @@ class HIRS(dataset.MultiSatelliteDataset, Radiometer, dataset.MultiFileDataset):
     max_valid_time_ptp = numpy.timedelta64(3, 'h')
     filter_calibcounts = filter_prttemps = filters.MEDMAD(10)
     flag_fields = set()
+
+    # Directory for the cache of decoded granules, see class docstring.
+    decoded_cache_dir = None
+    # Increase whenever changes to the reading routine affect the decoded
+    # content, such that old cache entries are not used anymore.
+    decoded_cache_version = 2
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -218,6 +234,102 @@ class HIRS(dataset.MultiSatelliteDataset, Radiometer, dataset.MultiFileDataset):
                     apply_scale_factors=True, 
                     apply_calibration=True,
                     radiance_units="si"):
+        if self.decoded_cache_dir:
+            (scanlines, header) = self._decode_cached(path,
+                apply_scale_factors, apply_calibration, radiance_units)
+        else:
+            (scanlines, header) = self._decode(path,
+                apply_scale_factors, apply_calibration, radiance_units)
+
+        if fields != "all":
+            # I'd like to use catch_warnings, but this triggers
+            # http://bugs.python.org/issue29672 thus flooding my screen
+            # for any *other* warning wherever this is called in a loop,
+            # which it is.  Commenting out again :(
+#            with warnings.catch_warnings():
+                # selecting multiple fields from a structured masked array
+                # leads to a FutureWarning, see
+                # https://github.com/numpy/numpy/issues/8383 .
+                # I believe this is a false alert.
+#                warnings.filterwarnings("ignore", category=FutureWarning)
+            scanlines = scanlines[fields]
+
+        # TODO:
+        # - Add other meta-information from TIP
+        extra = {"header": header}
+        return (scanlines, extra)
+
+    def _decoded_cache_path(self, path, apply_scale_factors,
+            apply_calibration, radiance_units):
+        """Get directory in decoded_cache_dir for decoded granule
+
+        The name is a hash of everything the decoded content depends
+        on: the path and modification time of the granule, the reading
+        options, and the version of the reader.
+        """
+        path = pathlib.Path(path).resolve()
+        stat = path.stat()
+        key = repr((str(path), stat.st_mtime_ns, stat.st_size,
+                    type(self).__name__, apply_scale_factors,
+                    apply_calibration, radiance_units,
+                    self.decoded_cache_version, __version__))
+        return pathlib.Path(self.decoded_cache_dir,
+                            hashlib.sha1(key.encode()).hexdigest())
+
+    def _decode_cached(self, path, apply_scale_factors, apply_calibration,
+            radiance_units):
+        """Decode granule or get it from the decoded_cache_dir
+
+        On a cache hit, return memory-mapped views on the cached arrays.
+        Those are mapped copy-on-write, so that filters may change them
+        in-place without altering the cache.  The mask and the fill value
+        of masked scanlines are restored.  On a miss, decode the granule
+        with _decode and store the result in the cache.
+        """
+        cachedir = self._decoded_cache_path(path, apply_scale_factors,
+            apply_calibration, radiance_units)
+        if cachedir.exists():
+            logger.debug("Reading decoded {!s} from {!s}".format(
+                path, cachedir))
+            scanlines = numpy.load(str(cachedir / "scanlines.npy"),
+                                   mmap_mode="c")
+            if (cachedir / "mask.npy").exists():
+                scanlines = numpy.ma.MaskedArray(scanlines,
+                    mask=numpy.load(str(cachedir / "mask.npy"),
+                                    mmap_mode="c"),
+                    fill_value=numpy.load(str(cachedir / "fill_value.npy")),
+                    copy=False)
+            header = numpy.load(str(cachedir / "header.npy"),
+                                mmap_mode="c")
+            return (scanlines, header)
+
+        (scanlines, header) = self._decode(path, apply_scale_factors,
+            apply_calibration, radiance_units)
+        # write to a temporary directory first, so that other processes
+        # will never see an incomplete entry
+        cachedir.parent.mkdir(parents=True, exist_ok=True)
+        tmpdir = pathlib.Path(tempfile.mkdtemp(dir=str(cachedir.parent)))
+        numpy.save(str(tmpdir / "scanlines.npy"),
+                   numpy.ma.getdata(scanlines))
+        if isinstance(scanlines, numpy.ma.MaskedArray):
+            numpy.save(str(tmpdir / "mask.npy"),
+                       numpy.ma.getmaskarray(scanlines))
+            numpy.save(str(tmpdir / "fill_value.npy"),
+                       scanlines.fill_value)
+        numpy.save(str(tmpdir / "header.npy"), header)
+        try:
+            tmpdir.rename(cachedir)
+        except OSError:
+            # another process was faster
+            shutil.rmtree(str(tmpdir))
+        return (scanlines, header)
+
+    def _decode(self, path, apply_scale_factors, apply_calibration,
+            radiance_units):
+        """Decode, scale and calibrate all fields of a granule
+
+        Helper for _read.  Returns the scanlines and the header.
+        """
         if path.endswith(".gz"):
             opener = gzip.open
         else:
@@ -354,23 +466,7 @@ class HIRS(dataset.MultiSatelliteDataset, Radiometer, dataset.MultiFileDataset):
                 scanlines_new[f] = scanlines[f]
             scanlines = scanlines_new
 
-        if fields != "all":
-            # I'd like to use catch_warnings, but this triggers
-            # http://bugs.python.org/issue29672 thus flooding my screen
-            # for any *other* warning wherever this is called in a loop,
-            # which it is.  Commenting out again :(
-#            with warnings.catch_warnings():
-                # selecting multiple fields from a structured masked array
-                # leads to a FutureWarning, see
-                # https://github.com/numpy/numpy/issues/8383 .
-                # I believe this is a false alert.
-#                warnings.filterwarnings("ignore", category=FutureWarning)
-            scanlines = scanlines[fields]
-
-        # TODO:
-        # - Add other meta-information from TIP
-        extra = {"header": header}
-        return (scanlines, extra)
+        return (scanlines, header)
        
     def _add_pseudo_fields(self, M, pseudo_fields, extra, f):
         if isinstance(M, tuple):
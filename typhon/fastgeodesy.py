@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+
+"""Compiled versions of the most used coordinate transforms in
+:mod:`typhon.geodesy`.
+
+Each function evaluates the whole transformation for one point in a single
+numba kernel, so no temporary arrays are allocated.  The kernels run in the
+calling thread only: numba's parallel threading layer would make processes
+that fork afterwards (e.g. process pools) hang at exit.  Results are
+computed in double precision.  They can be stored as float32 with
+``dtype="f4"`` or written into existing arrays with ``out``, which works like
+the ``out`` argument of numpy ufuncs: a tuple with one array per output.
+
+The functions have the same signatures and return values as their
+counterparts in :mod:`typhon.geodesy`, apart from the additional ``out`` and
+``dtype`` arguments.
+
+Examples:
+    >>> from typhon import fastgeodesy
+    >>> x, y, z = fastgeodesy.geocentric2cart(6371e3, lat, lon, dtype="f4")
+"""
+import numba
+import numpy as np
+
+from typhon import constants
+from typhon.geodesy import ellipsoidmodels, inrange
+
+__all__ = [
+    'cart2geodetic',
+    'geocentric2cart',
+    'geodetic2cart',
+    'great_circle_distance',
+    'tunnel_distance',
+]
+
+
+def _prepare(args, n_outputs, out, dtype):
+    """Flatten inputs and allocate or check the output arrays.
+
+    Inputs with a single element are passed on with length one and are
+    reused for all points by the kernels.  All other inputs are broadcast to
+    the common shape and flattened (without copy if they are contiguous).
+    """
+    args = [np.asarray(arg) for arg in args]
+    shape = np.broadcast(*args).shape
+    flat = [arg.reshape(1) if arg.size == 1
+            else np.broadcast_to(arg, shape).ravel() for arg in args]
+
+    if out is None:
+        out = tuple(np.empty(shape, dtype=dtype) for _ in range(n_outputs))
+    elif len(out) != n_outputs:
+        raise ValueError(f"out must be a tuple of {n_outputs} arrays.")
+    for array in out:
+        if array.shape != shape:
+            raise ValueError(
+                f"Output arrays must have the shape {shape}, not "
+                f"{array.shape}.")
+    # Kernels write into 1-D arrays, which are views on the outputs if
+    # possible (e.g. columns of an (n, 3) array) and copied back otherwise.
+    flat_out = [array.reshape(-1) if _has_flat_view(array)
+                else np.empty(array.size, dtype=array.dtype)
+                for array in out]
+    return flat, out, flat_out
+
+
+def _has_flat_view(array):
+    return array.ndim <= 1 or array.flags.c_contiguous
+
+
+def _finish(out, flat_out):
+    """Copy results into non-contiguous outputs and unwrap 0-d arrays."""
+    for array, flat in zip(out, flat_out):
+        if not _has_flat_view(array):
+            array[...] = flat.reshape(array.shape)
+    if out[0].ndim == 0:
+        out = tuple(array[()] for array in out)
+    return out if len(out) > 1 else out[0]
+
+
+def _ellipsoid(ellipsoid):
+    if ellipsoid is None:
+        ellipsoid = ellipsoidmodels()['WGS84']
+
+    errtext = 'Invalid excentricity value in ellipsoid model.'
+    inrange(ellipsoid[1], 0, 1, exclude='upper', text=errtext)
+    return float(ellipsoid[0]), float(ellipsoid[1])
+
+
+@numba.njit(inline='always')
+def _at(array, i):
+    """Element i of a flattened input, or its only element."""
+    return array[0] if array.size == 1 else array[i]
+
+
+@numba.njit
+def _geocentric2cart(r, lat, lon, x, y, z):
+    for i in range(x.size):
+        latrad = np.deg2rad(_at(lat, i))
+        lonrad = np.deg2rad(_at(lon, i))
+        ri = _at(r, i)
+        x[i] = ri * np.cos(latrad) * np.cos(lonrad)
+        y[i] = ri * np.cos(latrad) * np.sin(lonrad)
+        z[i] = ri * np.sin(latrad)
+
+
+@numba.njit
+def _geodetic2cart(h, lat, lon, a, e2, x, y, z):
+    for i in range(x.size):
+        latrad = np.deg2rad(_at(lat, i))
+        lonrad = np.deg2rad(_at(lon, i))
+        hi = _at(h, i)
+        N = a / np.sqrt(1 - e2 * np.sin(latrad)**2)
+        x[i] = (N + hi) * np.cos(latrad) * np.cos(lonrad)
+        y[i] = (N + hi) * np.cos(latrad) * np.sin(lonrad)
+        z[i] = (N * (1 - e2) + hi) * np.sin(latrad)
+
+
+@numba.njit
+def _cart2geodetic(x, y, z, a, e2, h, lat, lon):
+    for i in range(h.size):
+        xi = _at(x, i)
+        yi = _at(y, i)
+        zi = _at(z, i)
+        rho = np.hypot(xi, yi)
+        lon[i] = np.rad2deg(np.arctan2(yi, xi))
+        if e2 == 0.0:
+            r = np.sqrt(rho**2 + zi**2)
+            h[i] = r - a
+            lat[i] = np.rad2deg(np.arcsin(zi / r))
+            continue
+        if rho == 0.0:
+            # At the poles, the iteration below would divide by zero:
+            lat[i] = 90.0 if zi >= 0 else -90.0
+            h[i] = np.abs(zi) - a * np.sqrt(1 - e2)
+            continue
+
+        # Same fixed-point iteration as in geodesy.cart2geodetic, but for
+        # each point separately and until machine precision.  The height is
+        # computed with a formula that is also stable near the poles.
+        B = np.arctan2(zi, rho)
+        for _ in range(30):
+            N = a / np.sqrt(1 - e2 * np.sin(B)**2)
+            hi = rho / np.cos(B) - N
+            B_new = np.arctan(zi / rho * ((1 - e2 * N / (N + hi))**(-1)))
+            converged = np.abs(B_new - B) <= 1e-15
+            B = B_new
+            if converged:
+                break
+        h[i] = (rho * np.cos(B) + zi * np.sin(B)
+                - a * np.sqrt(1 - e2 * np.sin(B)**2))
+        lat[i] = np.rad2deg(B)
+
+
+@numba.njit
+def _great_circle_distance(lat1, lon1, lat2, lon2, r, distance):
+    for i in range(distance.size):
+        phi1 = np.deg2rad(_at(lat1, i))
+        phi2 = np.deg2rad(_at(lat2, i))
+        dlon = np.deg2rad(_at(lon2, i)) - np.deg2rad(_at(lon1, i))
+        a = (np.sin((phi2 - phi1) / 2.0)**2
+             + np.cos(phi1) * np.cos(phi2) * np.sin(dlon / 2.0)**2)
+        c = 2 * np.arcsin(np.sqrt(a))
+        distance[i] = np.rad2deg(c) if r < 0 else r * c
+
+
+@numba.njit
+def _tunnel_distance(lat1, lon1, lat2, lon2, r, distance):
+    for i in range(distance.size):
+        phi1 = np.deg2rad(_at(lat1, i))
+        phi2 = np.deg2rad(_at(lat2, i))
+        lambda1 = np.deg2rad(_at(lon1, i))
+        lambda2 = np.deg2rad(_at(lon2, i))
+        dx = (np.cos(phi2) * np.cos(lambda2)
+              - np.cos(phi1) * np.cos(lambda1))
+        dy = (np.cos(phi2) * np.sin(lambda2)
+              - np.cos(phi1) * np.sin(lambda1))
+        dz = np.sin(phi2) - np.sin(phi1)
+        distance[i] = r * np.sqrt(dx**2 + dy**2 + dz**2)
+
+
+def geocentric2cart(r, lat, lon, out=None, dtype="f8"):
+    """Convert from spherical coordinate to a cartesian position.
+
+    See :func:`typhon.geodesy.geocentric2cart`.
+
+    Parameters:
+        r: Radius.
+        lat: Latitude in degree.
+        lon: Longitude in degree.
+        out: Optional tuple of three arrays for x, y and z.
+        dtype: Data type of the output arrays if ``out`` is not given.
+
+    Returns:
+        tuple: Coordinate in x, y, z dimension.
+    """
+    if np.any(np.asarray(r) == 0):
+        raise Exception("This set of functions does not handle r = 0.")
+
+    flat, out, flat_out = _prepare((r, lat, lon), 3, out, dtype)
+    _geocentric2cart(*flat, *flat_out)
+    return _finish(out, flat_out)
+
+
+def geodetic2cart(h, lat, lon, ellipsoid=None, out=None, dtype="f8"):
+    """Convert from geodetic to geocentric cartesian coordinates.
+
+    See :func:`typhon.geodesy.geodetic2cart`.
+
+    Parameters:
+        h: Geodetic height (height above the reference ellipsoid).
+        lat: Geodetic latitude.
+        lon: Geodetic longitude.
+        ellipsoid: A tuple with the form (semimajor axis, eccentricity).
+            Default is 'WGS84' from :class:`~typhon.geodesy.ellipsoidmodels`.
+        out: Optional tuple of three arrays for x, y and z.
+        dtype: Data type of the output arrays if ``out`` is not given.
+
+    Returns:
+        tuple: x, y, z coordinates.
+    """
+    a, e = _ellipsoid(ellipsoid)
+    flat, out, flat_out = _prepare((h, lat, lon), 3, out, dtype)
+    _geodetic2cart(*flat, a, e**2, *flat_out)
+    return _finish(out, flat_out)
+
+
+def cart2geodetic(x, y, z, ellipsoid=None, out=None, dtype="f8"):
+    """Convert from cartesian to geodetic coordinates.
+
+    See :func:`typhon.geodesy.cart2geodetic`.  The iteration for the
+    latitude runs for each point until it has converged to machine
+    precision, and the height is computed with a formula that is stable
+    near the poles.  Therefore, the results are slightly more accurate.
+
+    Parameters:
+        x: Coordinates in x dimension.
+        y: Coordinates in y dimension.
+        z: Coordinates in z dimension.
+        ellipsoid: A tuple with the form (semimajor axis, eccentricity).
+            Default is 'WGS84' from :class:`~typhon.geodesy.ellipsoidmodels`.
+        out: Optional tuple of three arrays for height, latitude and
+            longitude.
+        dtype: Data type of the output arrays if ``out`` is not given.
+
+    Returns:
+        tuple: Geodetic height, latitude and longitude
+    """
+    a, e = _ellipsoid(ellipsoid)
+    flat, out, flat_out = _prepare((x, y, z), 3, out, dtype)
+    _cart2geodetic(*flat, a, e**2, *flat_out)
+    return _finish(out, flat_out)
+
+
+def great_circle_distance(lat1, lon1, lat2, lon2, r=None, out=None,
+                          dtype="f8"):
+    """Calculate the distance between two geographical positions
+
+    See :func:`typhon.geodesy.great_circle_distance`.
+
+    Args:
+        lat1: Latitude of position 1.
+        lon1: Longitude of position 1.
+        lat2: Latitude of position 2.
+        lon2: Longitude of position 2.
+        r (float): The radius (common for both points).
+        out: Optional output array.
+        dtype: Data type of the output array if ``out`` is not given.
+
+    Returns:
+        If the optional argument *r* is given, the distance in m is returned.
+        Otherwise the angular distance in degrees is returned.
+    """
+    if out is not None:
+        out = (out,)
+    flat, out, flat_out = _prepare((lat1, lon1, lat2, lon2), 1, out, dtype)
+    _great_circle_distance(*flat, -1.0 if r is None else float(r),
+                           *flat_out)
+    return _finish(out, flat_out)
+
+
+def tunnel_distance(lat1, lon1, lat2, lon2, out=None, dtype="f8"):
+    """Calculate the tunnel distance between two points on the Earth's surface
+
+    See :func:`typhon.geodesy.tunnel_distance`.
+
+    Args:
+        lat1: Single number or numpy array with latitudes in degrees.
+        lon1: Single number or numpy array with longitudes in degrees.
+        lat2: Single number or numpy array with latitudes in degrees.
+        lon2: Single number or numpy array with longitudes in degrees.
+        out: Optional output array.
+        dtype: Data type of the output array if ``out`` is not given.
+
+    Returns:
+        Tunnel distance in meters
+    """
+    if out is not None:
+        out = (out,)
+    flat, out, flat_out = _prepare((lat1, lon1, lat2, lon2), 1, out, dtype)
+    _tunnel_distance(*flat, float(constants.earth_radius), *flat_out)
+    return _finish(out, flat_out)
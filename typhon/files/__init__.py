@@ -3,6 +3,7 @@
 """This module contains convenience functions for general file handling.
 """
 
+from .bulk import *
 from .fileset import *
 from .handlers import *
 from .utils import *
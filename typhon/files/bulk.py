@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+
+"""Move, copy or delete many files with a pool of threads.
+
+A :class:`BulkOperation` is a plan of file tasks. It is executed by a pool of
+threads since the tasks wait for the file system most of the time. All target
+directories are created once before the first task runs. Moves are renames
+if possible and become a verified copy and a deletion if the target is on
+another device. With a journal, an interrupted operation can be resumed
+without searching the files again.
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import errno
+import hashlib
+import json
+import os
+import shutil
+
+__all__ = [
+    'BulkOperation',
+]
+
+
+def _checksum(filename, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(filename, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _copy_verified(source, target, verify, copy_function=shutil.copy):
+    """Copy a file to a temporary name, verify it and rename it to target
+
+    Hence, an incomplete copy is never found under the name of the target.
+    """
+    temporary = target + ".part"
+    try:
+        copy_function(source, temporary)
+        if verify == "size":
+            ok = os.path.getsize(source) == os.path.getsize(temporary)
+        elif verify == "checksum":
+            ok = _checksum(source) == _checksum(temporary)
+        else:
+            ok = True
+        if not ok:
+            raise IOError(f"Copy of '{source}' to '{target}' is corrupt!")
+        os.replace(temporary, target)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def _execute(action, source, target, verify):
+    """Execute one task
+
+    All tasks can be repeated, so the tasks that were done but not journaled
+    before an interruption are simply done again.
+    """
+    if action == "delete":
+        try:
+            os.remove(source)
+        except FileNotFoundError:
+            pass
+    elif action == "copy":
+        _copy_verified(source, target, verify)
+    elif not os.path.exists(source) and os.path.exists(target):
+        # This file has been moved already
+        pass
+    else:
+        try:
+            os.replace(source, target)
+        except OSError as err:
+            if err.errno != errno.EXDEV:
+                raise
+            # The target is on another device:
+            _copy_verified(source, target, verify, shutil.copy2)
+            os.remove(source)
+
+
+class BulkOperation:
+    """Plan and execute the moving, copying or deleting of many files
+
+    Each task is a tuple of *action* (*move*, *copy* or *delete*), *source*
+    and *target* (None for *delete*). The tasks are executed by a pool of
+    threads. All target directories are created before, one time each.
+
+    If a journal file is given, the plan is written to it before the first
+    task runs and each finished task is appended. An interrupted operation
+    is continued with :meth:`resume`. Tasks that had been done but not
+    journaled are repeated without harm.
+
+    :meth:`FileSet.move` and :meth:`FileSet.delete` use this class.
+
+    Examples:
+
+    .. code-block:: python
+
+        from typhon.files import BulkOperation
+
+        operation = BulkOperation(journal="reorganise.journal")
+        for day in range(1, 32):
+            operation.add(
+                "move", f"archive/2010-01-{day:02}.nc",
+                f"cold/2010/01/{day:02}.nc"
+            )
+        operation.run(max_workers=16, progress=print)
+
+        # After an interruption:
+        BulkOperation.resume("reorganise.journal").run(max_workers=16)
+    """
+
+    actions = ("move", "copy", "delete")
+
+    def __init__(self, tasks=None, journal=None):
+        """Create a plan
+
+        Args:
+            tasks: Iterable of tuples (action, source, target).
+            journal: Path of a new file where the plan and the progress are
+                recorded.
+        """
+        self.tasks = []
+        self.done = set()
+        self.journal = journal
+        self._journaled = False
+
+        if tasks is not None:
+            for task in tasks:
+                self.add(*task)
+
+    @classmethod
+    def resume(cls, journal):
+        """Load an interrupted operation from its journal
+
+        Args:
+            journal: Path of the journal.
+
+        Returns:
+            A BulkOperation object with the tasks that are not done yet.
+        """
+        operation = cls(journal=journal)
+        planned = None
+        with open(journal) as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # The last line may be incomplete after a crash
+                    break
+                if "done" in record:
+                    operation.done.add(record["done"])
+                elif "planned" in record:
+                    planned = record["planned"]
+                else:
+                    operation.tasks.append((
+                        record["action"], record["source"], record["target"]
+                    ))
+
+        if planned != len(operation.tasks):
+            raise ValueError(f"The plan in the journal '{journal}' is "
+                             f"incomplete!")
+        operation._journaled = True
+        return operation
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def add(self, action, source, target=None):
+        """Add a task to the plan
+
+        Args:
+            action: Either *move*, *copy* or *delete*.
+            source: Path of the file.
+            target: New path of the file (not for *delete*).
+
+        Returns:
+            None
+        """
+        if action not in self.actions:
+            raise ValueError(f"Unknown action '{action}'! Allowed are: "
+                             + ", ".join(self.actions))
+        if action == "delete" and target is not None:
+            raise ValueError("The action 'delete' takes no target!")
+        if action != "delete" and target is None:
+            raise ValueError(f"The action '{action}' needs a target!")
+        if self._journaled:
+            raise ValueError("Cannot change a journaled plan!")
+        self.tasks.append((action, source, target))
+
+    @property
+    def pending(self):
+        """The tasks that are not done yet"""
+        return [task for i, task in enumerate(self.tasks)
+                if i not in self.done]
+
+    def directories(self):
+        """All target directories of the pending tasks
+
+        Returns:
+            A sorted list of directory names.
+        """
+        return sorted({
+            os.path.dirname(target) for _, _, target in self.pending
+            if target is not None
+        } - {""})
+
+    def run(self, max_workers=4, verify="size", progress=None, verbose=False,
+            dry_run=False):
+        """Execute all pending tasks
+
+        Args:
+            max_workers: Number of threads.
+            verify: How copies are verified before they are renamed to their
+                target: *size* (default) compares the sizes, *checksum* the
+                SHA-256 hashes of both files. False skips the verification.
+            progress: A function that is called with the number of finished
+                and the number of all tasks after each task.
+            verbose: If true, each task is printed.
+            dry_run: If true, the pending tasks are only printed.
+
+        Returns:
+            The number of tasks that have been done.
+        """
+        pending = [
+            (i, task) for i, task in enumerate(self.tasks)
+            if i not in self.done
+        ]
+
+        if dry_run:
+            for _, task in pending:
+                print("[Dry] " + self._describe(*task))
+            return 0
+
+        for directory in self.directories():
+            os.makedirs(directory, exist_ok=True)
+
+        journal = None
+        if self.journal is not None:
+            if self._journaled:
+                journal = open(self.journal, "a")
+            else:
+                # Never overwrite the journal of another operation:
+                journal = open(self.journal, "x")
+                for action, source, target in self.tasks:
+                    journal.write(json.dumps({
+                        "action": action, "source": source, "target": target
+                    }) + "\n")
+                journal.write(json.dumps({"planned": len(self.tasks)}) + "\n")
+                journal.flush()
+                self._journaled = True
+
+        # Not all tasks are submitted at once since there may be millions:
+        queue = deque()
+        try:
+            with ThreadPoolExecutor(max_workers) as pool:
+                for i, task in pending:
+                    if len(queue) >= 4 * max_workers:
+                        self._finish(*queue.popleft(), journal, progress)
+                    if verbose:
+                        print(self._describe(*task))
+                    queue.append((i, pool.submit(_execute, *task, verify)))
+
+                while queue:
+                    self._finish(*queue.popleft(), journal, progress)
+        finally:
+            if journal is not None:
+                journal.close()
+
+        return len(pending)
+
+    def _finish(self, i, future, journal, progress):
+        future.result()
+        self.done.add(i)
+        if journal is not None:
+            journal.write(json.dumps({"done": i}) + "\n")
+        if progress is not None:
+            progress(len(self.done), len(self.tasks))
+
+    @staticmethod
+    def _describe(action, source, target):
+        if target is None:
+            return f"{action.capitalize()} '{source}'!"
+        return f"{action.capitalize()} '{source}' to '{target}'!"
@@ -5,7 +5,7 @@ Created by John Mrziglod, June 2017
 """
 
 import atexit
-from collections import Counter, defaultdict, deque, OrderedDict
+from collections import Counter, defaultdict, deque, namedtuple, OrderedDict
 from copy import deepcopy
 from datetime import datetime, timedelta
 import gc
@@ -16,9 +16,10 @@ from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import os.path
 import re
 import shutil
-from sys import platform
+from sys import platform, version_info
 import threading
 import traceback
+import uuid
 import warnings
 
 import numpy as np
@@ -27,8 +28,11 @@ import typhon.files
 import typhon.plots
 from typhon.trees import IntervalTree
 from typhon.utils import unique
-from typhon.utils.timeutils import set_time_resolution, to_datetime, to_timedelta
+from typhon.utils.timeutils import (
+    set_time_resolution, timings, to_datetime, to_timedelta
+)
 
+from .bulk import BulkOperation
 from .handlers import expects_file_info, FileInfo
 from .handlers import CSV, NetCDF4
 
@@ -43,6 +47,29 @@ __all__ = [
 ]
 
 
+# Return value of map workers in other processes if the timing registry is
+# enabled:
+_TimedResult = namedtuple("_TimedResult", ["value", "timings", "path"])
+
+
+def _unwrap_timed_result(result):
+    """Merge the timings of a worker process and return its result"""
+    if isinstance(result, _TimedResult):
+        timings.merge(result.timings, prefix=result.path)
+        return result.value
+    return result
+
+
+# The worker contexts (see FileSet.map) that have been sent to this worker
+# process, indexed by their handles:
+_worker_contexts = {}
+
+
+def _set_worker_context(handle, context):
+    """Initialise a map worker process with a worker context"""
+    _worker_contexts[handle] = context
+
+
 class InhomogeneousFilesError(Exception):
     """Should be raised if the files of a fileset do not have the same internal
     structure but it is required.
@@ -919,7 +946,8 @@ class FileSet:
         """
         return deepcopy(self)
 
-    def delete(self, verbose=True, dry_run=False, **kwargs):
+    def delete(self, verbose=True, dry_run=False, max_workers=None,
+               journal=None, progress=None, **kwargs):
         """Remove files in this fileset from the disk
 
         Warnings:
@@ -929,6 +957,15 @@ class FileSet:
         Args:
             verbose: If true, debug messages will be printed.
             dry_run: If true, all files that would be deleted are printed.
+            max_workers: Number of threads that delete the files. Default is
+                :attr:`max_threads`.
+            journal: Path of a journal file, see :class:`BulkOperation`. If
+                it exists already, the files are not searched again but the
+                interrupted deletion in the journal is continued. Raises a
+                ValueError if the journal is complete already or records
+                another operation.
+            progress: A function that is called with the number of deleted
+                files and the number of all files after each file.
             **kwargs: Additional keyword arguments that are allowed
                 for :meth:`find` such as `start`, `end` or `files`.
 
@@ -947,25 +984,63 @@ class FileSet:
             fileset.delete()
         """
 
-        if dry_run:
-            self.map(FileSet._dry_delete, **kwargs)
-        else:
-            # Delete the files
-            self.map(
-                FileSet._delete_single_file,
-                kwargs={"verbose": verbose}, **kwargs
-            )
+        def tasks():
+            for file in self._files_to_process(**kwargs):
+                yield "delete", file.path, None
 
-    @staticmethod
-    def _delete_single_file(file, verbose=False):
-        if verbose:
-            print(f"Delete '{file}'!")
+        operation = self._bulk_operation(tasks, journal, "delete")
+        operation.run(
+            max_workers=self.max_threads if max_workers is None
+            else max_workers,
+            progress=progress, verbose=verbose, dry_run=dry_run,
+        )
 
-        os.remove(file)
+    def _files_to_process(self, files=None, **kwargs):
+        """Yield FileInfo objects of given files or of all found files"""
+        if files is None:
+            yield from self.find(**kwargs)
+            return
+
+        for file in files:
+            if isinstance(file, FileInfo):
+                yield file
+            else:
+                yield self.get_info(file)
 
     @staticmethod
-    def _dry_delete(file):
-        print(f"[Dry] Delete '{file}'!")
+    def _bulk_operation(tasks, journal, action, destination=None):
+        """Create a BulkOperation or resume it from an existing journal
+
+        Args:
+            tasks: A function that returns the tasks of a new operation.
+            journal: Path of the journal or None.
+            action: The action of all tasks.
+            destination: A FileSet whose path all targets must match.
+
+        Raises:
+            ValueError: If the operation in the journal is complete already
+                or is not the requested operation.
+        """
+        if journal is None or not os.path.isfile(journal):
+            return BulkOperation(tasks(), journal)
+
+        operation = BulkOperation.resume(journal)
+        if not operation.pending:
+            raise ValueError(
+                f"The operation in the journal '{journal}' is complete "
+                f"already! Remove the journal to start a new operation.")
+
+        if destination is not None:
+            regex = re.compile(destination._filled_path)
+        for task_action, _, target in operation.tasks:
+            if task_action != action or (
+                    destination is not None and not regex.match(target)):
+                raise ValueError(
+                    f"The journal '{journal}' records another operation: "
+                    f"cannot {action} the files"
+                    + ("." if destination is None
+                       else f" to '{destination.path}'."))
+        return operation
 
     def detect(self, test, *args, **kwargs):
         """Search for anomalies in fileset
@@ -1712,7 +1787,8 @@ class FileSet:
             self, func, args=None, kwargs=None, files=None, on_content=False,
             pass_info=None, read_args=None, output=None,
             max_workers=None, worker_type=None,
-            return_info=False, error_to_warning=False, **find_kwargs
+            return_info=False, error_to_warning=False, worker_context=None,
+            **find_kwargs
     ):
         """Apply a function on files of this fileset with parallel workers
 
@@ -1773,6 +1849,11 @@ class FileSet:
                 reading of a file, this method is aborted. However, if you set
                 this to *true*, only a warning is given and None is returned.
                 This parameter will be ignored if `on_content=True`.
+            worker_context: A dictionary with large read-only objects (e.g.
+                trained models or lookup tables) that will be passed to
+                `func` as additional keyword arguments. In contrast to
+                `kwargs`, they are sent only once to each worker process and
+                not with each file. The tasks refer to them by a handle.
             **find_kwargs: Additional keyword arguments that are allowed
                 for :meth:`find` such as `start` or `end`.
 
@@ -1828,21 +1909,38 @@ class FileSet:
                     calc_statistics, args=("value1",),
                     kwargs={"kwarg1": "value2"}, on_content=True,
                 )
+
+            Large objects that every call needs should be passed via
+            *worker_context*. Then they are not pickled for each file:
+
+            .. code-block:: python
+
+                def apply_model(content, model):
+                    return model.predict(content["data"])
+
+                results = fileset.map(
+                    apply_model, worker_context={"model": model},
+                    on_content=True, worker_type="process",
+                )
         """
 
-        pool_class, pool_args, worker_args = \
-            self._configure_pool_and_worker_args(
-                func, args, kwargs, files, on_content, pass_info, read_args,
-                output, max_workers, worker_type,
-                #worker_initializer, worker_initargs,
-                return_info, error_to_warning, **find_kwargs
-            )
+        with timings.section("FileSet.map"):
+            pool_class, pool_args, worker_args = \
+                self._configure_pool_and_worker_args(
+                    func, args, kwargs, files, on_content, pass_info,
+                    read_args, output, max_workers, worker_type,
+                    #worker_initializer, worker_initargs,
+                    return_info, error_to_warning,
+                    worker_context=worker_context, **find_kwargs
+                )
 
-        with pool_class(**pool_args) as pool:
-            # Process all found files with the arguments:
-            return list(pool.map(
-                self._call_map_function, worker_args,
-            ))
+            with pool_class(**pool_args) as pool:
+                # Process all found files with the arguments:
+                return [
+                    _unwrap_timed_result(result)
+                    for result in pool.map(
+                        self._call_map_function, worker_args)
+                ]
 
     def imap(self, *args, **kwargs):
         """Apply a function on files and return the result immediately
@@ -1876,7 +1974,8 @@ class FileSet:
                 wait = len(worker_queue) >= workers
 
                 if wait:
-                    yield worker_queue.popleft().result()
+                    yield _unwrap_timed_result(
+                        worker_queue.popleft().result())
 
                 worker_queue.append(
                     pool.submit(
@@ -1887,14 +1986,15 @@ class FileSet:
 
             # Flush the rest:
             while worker_queue:
-                yield worker_queue.popleft().result()
+                yield _unwrap_timed_result(worker_queue.popleft().result())
 
     def _configure_pool_and_worker_args(
             self, func, args=None, kwargs=None, files=None,
             on_content=False, pass_info=None, read_args=None, output=None,
             max_workers=None, worker_type=None,
             #worker_initializer=None, worker_initargs=None,
-            return_info=False, error_to_warning=False, **find_args
+            return_info=False, error_to_warning=False, worker_context=None,
+            **find_args
     ):
         if func is None:
             raise ValueError("The parameter `func` must be given!")
@@ -1946,9 +2046,30 @@ class FileSet:
         if files is None:
             files = self.find(**find_args)
 
+        if worker_context is None:
+            context = None
+        elif worker_type == "process" and version_info >= (3, 7):
+            # Each worker process gets the context once when it starts. The
+            # tasks only carry its handle:
+            context = uuid.uuid4().hex
+            pool_args["initializer"] = _set_worker_context
+            pool_args["initargs"] = (context, worker_context)
+        else:
+            # Threads share the context anyway (and the pools of older Python
+            # versions have no initializer):
+            context = worker_context
+
+        # The workers record their timings as children of the running
+        # sections of this thread (e.g. FileSet.map):
+        if timings.enabled:
+            timing_context = worker_type, timings.current_path()
+        else:
+            timing_context = None
+
         worker_args = (
             (self, file, func, args, kwargs, pass_info, output,
-             on_content, read_args, return_info, error_to_warning)
+             on_content, read_args, return_info, error_to_warning,
+             context, timing_context)
             for file in files
         )
 
@@ -1956,13 +2077,36 @@ class FileSet:
 
     @staticmethod
     def _call_map_function(all_args):
+        """Call the map function and collect its timings if required
+
+        Worker processes record into their own registry which is sent back
+        with the result. Worker threads record directly into the shared
+        registry.
+        """
+        *all_args, timing_context = all_args
+        if timing_context is None:
+            return FileSet._apply_map_function(all_args)
+
+        worker_type, path = timing_context
+        if worker_type == "process":
+            return _TimedResult(
+                *timings.run_isolated(FileSet._apply_map_function, all_args),
+                path
+            )
+
+        with timings.within(path):
+            return FileSet._apply_map_function(all_args)
+
+    @staticmethod
+    def _apply_map_function(all_args):
         """ This is a small wrapper function to call the function that is
         called on fileset files via .map().
 
         Args:
             all_args: A tuple containing following elements:
                 (FileSet object, file_info, function,
-                args, kwargs, output, on_content, read_args, return_info)
+                args, kwargs, output, on_content, read_args, return_info,
+                error_to_warning, worker context or its handle)
 
         Returns:
             The return value of *function* called with the arguments *args* and
@@ -1970,10 +2114,16 @@ class FileSet:
             content).
         """
         fileset, file_info, func, args, kwargs, pass_info, output, \
-            on_content, read_args, return_info, error_to_warning = all_args
+            on_content, read_args, return_info, error_to_warning, \
+            context = all_args
 
         args = [] if args is None else list(args)
 
+        if context is not None:
+            if isinstance(context, str):
+                context = _worker_contexts[context]
+            kwargs = {**kwargs, **context}
+
         def _return(file_info, return_value):
             """Small helper for return / not return the file info object."""
 
@@ -2102,7 +2252,8 @@ class FileSet:
                 yield files1[i], matches
 
     def move(
-            self, target=None, convert=None, copy=False, **kwargs,
+            self, target=None, convert=None, copy=False, max_workers=None,
+            journal=None, progress=None, dry_run=False, **kwargs,
     ):
         """Move (or copy) files from this fileset to another location
 
@@ -2120,12 +2271,30 @@ class FileSet:
                 simply moved without converting.
             copy: If true, then the original files will be copied instead of
                 moved.
+            max_workers: Number of threads that move the files. Default is
+                :attr:`max_threads`. Ignored if `convert` is set.
+            journal: Path of a journal file, see :class:`BulkOperation`. If
+                it exists already, the files are not searched again but the
+                interrupted moving in the journal is continued. Raises a
+                ValueError if the journal is complete already or records
+                another operation. Ignored if `convert` is set.
+            progress: A function that is called with the number of moved
+                files and the number of all files after each file. Ignored if
+                `convert` is set.
+            dry_run: If true, the files and their new locations are only
+                printed. Ignored if `convert` is set.
             **kwargs: Additional keyword arguments that are allowed
                 for :meth:`find` such as `start`, `end` or `files`.
 
         Returns:
             New FileSet object with the new files.
 
+        Notes:
+            Without `convert`, the files are moved by a
+            :class:`BulkOperation`: all new directories are created first and
+            the files are renamed by a pool of threads. Files that are moved
+            to another device are copied, verified and then deleted.
+
         Examples:
 
         .. code-block:: python
@@ -2182,17 +2351,37 @@ class FileSet:
         if convert is None:
             convert = False
 
-        if self.single_file:
+        if not self.single_file and destination.single_file:
+            raise ValueError(
+                "Cannot move files from multi-file to single-file set!")
+
+        if not convert:
+            def tasks():
+                if self.single_file:
+                    files = [self.get_info(self.path)]
+                else:
+                    files = self._files_to_process(**kwargs)
+                for file_info in files:
+                    yield (
+                        "copy" if copy else "move", file_info.path,
+                        destination.get_filename(
+                            file_info.times, fill=file_info.attr)
+                    )
+
+            operation = self._bulk_operation(
+                tasks, journal, "copy" if copy else "move", destination)
+            operation.run(
+                max_workers=self.max_threads if max_workers is None
+                else max_workers,
+                progress=progress, dry_run=dry_run,
+            )
+        elif self.single_file:
             file_info = self.get_info(self.path)
 
             FileSet._move_single_file(
                 file_info, self, destination, convert, copy
             )
         else:
-            if destination.single_file:
-                raise ValueError(
-                    "Cannot move files from multi-file to single-file set!")
-
             move_args = {
                 "fileset": self,
                 "destination": destination,
@@ -2636,19 +2825,26 @@ class FileSet:
             raise NoHandlerError(f"Could not read '{file_info.path}'!")
 
         read_args = {**self.read_args, **read_args}
+        handler_section = f"{type(self.handler).__name__}.read"
+
+        with timings.section("FileSet.read"):
+            if self.decompress:
+                with typhon.files.decompress(
+                        file_info.path, tmpdir=self.temp_dir) \
+                        as decompressed_path:
+                    decompressed_file = file_info.copy()
+                    decompressed_file.path = decompressed_path
+                    with timings.section(handler_section):
+                        data = self.handler.read(
+                            decompressed_file, **read_args)
+            else:
+                with timings.section(handler_section):
+                    data = self.handler.read(file_info, **read_args)
 
-        if self.decompress:
-            with typhon.files.decompress(file_info.path, tmpdir=self.temp_dir)\
-                    as decompressed_path:
-                decompressed_file = file_info.copy()
-                decompressed_file.path = decompressed_path
-                data = self.handler.read(decompressed_file, **read_args)
-        else:
-            data = self.handler.read(file_info, **read_args)
-
-        # Maybe the user wants to do some post-processing?
-        if self.post_reader is not None:
-            data = self.post_reader(file_info, data)
+            # Maybe the user wants to do some post-processing?
+            if self.post_reader is not None:
+                with timings.section("FileSet.post_reader"):
+                    data = self.post_reader(file_info, data)
 
         return data
 
@@ -2856,14 +3052,20 @@ class FileSet:
         # themselves.
         self.make_dirs(file_info.path)
 
-        if self.compress:
-            with typhon.files.compress(file_info.path, tmpdir=self.temp_dir) \
-                    as compressed_path:
-                compressed_file = file_info.copy()
-                compressed_file.path = compressed_path
-                self.handler.write(data, compressed_file, **write_args)
-        else:
-            self.handler.write(data, file_info, **write_args)
+        handler_section = f"{type(self.handler).__name__}.write"
+        with timings.section("FileSet.write"):
+            if self.compress:
+                with typhon.files.compress(
+                        file_info.path, tmpdir=self.temp_dir) \
+                        as compressed_path:
+                    compressed_file = file_info.copy()
+                    compressed_file.path = compressed_path
+                    with timings.section(handler_section):
+                        self.handler.write(
+                            data, compressed_file, **write_args)
+            else:
+                with timings.section(handler_section):
+                    self.handler.write(data, file_info, **write_args)
 
 
 class FileSetManager(dict):
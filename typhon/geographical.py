@@ -2,20 +2,28 @@
 
 """General functions for manipulating geographical data.
 """
+import hashlib
 from numbers import Number
+import os
+import tempfile
 
 import imageio
+import numba
 import numpy as np
+import xarray as xr
 from sklearn.neighbors import BallTree, KDTree
+from typhon import config
 from typhon.constants import earth_radius
-from typhon.geodesy import geocentric2cart
+from typhon.fastgeodesy import geocentric2cart
 from typhon.utils import split_units
 
 
 __all__ = [
     'area_weighted_mean',
     'GeoIndex',
+    'GridAccumulator',
     'gridded_mean',
+    'RasterLookup',
     'sea_mask'
 ]
 
@@ -224,9 +232,12 @@ class GeoIndex:
                              "pandas.Series or xarray.DataArray)!")
 
         if self.metric == "minkowski":
-            return np.column_stack(
-                geocentric2cart(earth_radius, lat, lon)
+            points = np.empty((lat.size, 3))
+            geocentric2cart(
+                earth_radius, lat.ravel(), lon.ravel(),
+                out=(points[:, 0], points[:, 1], points[:, 2])
             )
+            return points
         elif self.metric == "haversine":
             return np.radians(
                 np.column_stack([lat, lon])
@@ -320,13 +331,537 @@ def gridded_mean(lat, lon, data, grid):
 
     Returns:
         Two matrices in grid form: the mean and the number of points of `data`.
+
+    See Also:
+        :class:`GridAccumulator` for more statistics, more variables and
+        accumulation over many files.
     """
-    grid_sum, _, _ = np.histogram2d(lat, lon, grid, weights=data)
-    grid_number, _, _ = np.histogram2d(lat, lon, grid)
+    lat_edges, lon_edges = (np.asarray(edges, dtype=float) for edges in grid)
+    shape = (lat_edges.size - 1, lon_edges.size - 1)
+    index = _grid_index(lat, lon, lat_edges, lon_edges)
+    valid = index >= 0
+
+    grid_sum = np.bincount(
+        index[valid], weights=np.ravel(data)[valid],
+        minlength=shape[0] * shape[1]
+    ).reshape(shape)
+    grid_number = np.bincount(
+        index[valid], minlength=shape[0] * shape[1]
+    ).reshape(shape).astype(float)
 
     return grid_sum / grid_number, grid_number
 
 
+def _grid_index(lat, lon, lat_edges, lon_edges):
+    """Flat index of the grid cell of each point, or -1 outside the grid.
+
+    Like in :func:`numpy.histogram2d`, the cells include their lower edge and
+    the last cell also its upper edge.
+    """
+    def cell(x, edges):
+        x = np.ravel(x)
+        step = edges[1] - edges[0]
+        if step > 0 and np.allclose(np.diff(edges), step):
+            return _regular_cell(x.astype(float, copy=False), edges)
+        i = np.searchsorted(edges, x, side="right") - 1
+        i[x == edges[-1]] = edges.size - 2
+        i[(i < 0) | (i > edges.size - 2) | np.isnan(x)] = -1
+        return i
+
+    i_lat = cell(lat, lat_edges)
+    i_lon = cell(lon, lon_edges)
+    return np.where(
+        (i_lat >= 0) & (i_lon >= 0), i_lat * (lon_edges.size - 1) + i_lon, -1)
+
+
+@numba.njit
+def _regular_cell(x, edges):
+    """Cell index of each value on equally spaced edges, or -1 outside
+
+    Much faster than a binary search for many values.  The cell is
+    computed from the value and then corrected for rounding errors, so
+    the result is the same as from the binary search in `_grid_index`.
+    """
+    n = edges.size - 1
+    scale = n / (edges[n] - edges[0])
+    index = np.empty(x.size, dtype=np.int64)
+    for k in range(x.size):
+        value = x[k]
+        # NaN values fail this comparison as well:
+        if not edges[0] <= value <= edges[n]:
+            index[k] = -1
+            continue
+        i = min(int((value - edges[0]) * scale), n - 1)
+        while i > 0 and value < edges[i]:
+            i -= 1
+        while i < n - 1 and value >= edges[i + 1]:
+            i += 1
+        index[k] = i
+    return index
+
+
+@numba.njit
+def _accumulate_grid(index, values, weights, number, weight_sum, mean, m2,
+                     minimum, maximum):
+    """Add points to the running statistics of all variables in one pass.
+
+    Uses the weighted version of Welford's algorithm.  All statistic arrays
+    have the shape (variables, cells), values has (variables, points).
+    Points without weight are skipped.
+    """
+    for i in range(index.size):
+        cell = index[i]
+        w = weights[i]
+        if cell < 0 or w == 0:
+            continue
+        for v in range(values.shape[0]):
+            x = values[v, i]
+            if np.isnan(x):
+                continue
+            number[v, cell] += 1
+            weight_sum[v, cell] += w
+            delta = x - mean[v, cell]
+            mean[v, cell] += delta * w / weight_sum[v, cell]
+            m2[v, cell] += w * delta * (x - mean[v, cell])
+            if number[v, cell] == 1 or x < minimum[v, cell]:
+                minimum[v, cell] = x
+            if number[v, cell] == 1 or x > maximum[v, cell]:
+                maximum[v, cell] = x
+
+
+class GridAccumulator:
+    """Accumulate gridded statistics of many variables over many files
+
+    The grid cell of each point is computed once per call of :meth:`add`,
+    and the mean, standard deviation, minimum, maximum and number of points
+    of all variables are then updated in a single compiled pass over the
+    points.  NaN values are ignored.  The memory needed only depends on the
+    size of the grid and the number of variables, no matter how many points
+    or files are added.  Partial grids (e.g. from different processes) can be
+    combined with :meth:`merge`.
+
+    Examples:
+
+    .. code-block:: python
+
+        grid = GridAccumulator(
+            np.linspace(-90, 90, 181), np.linspace(-180, 180, 361),
+            variables=["temperature", "humidity"]
+        )
+        for file in files:
+            data = read(file)
+            grid.add(data["lat"], data["lon"], data)
+        l3 = grid.to_xarray()  # temperature_mean, temperature_std, ...
+    """
+
+    statistics = ("mean", "std", "min", "max", "count")
+
+    def __init__(self, lat_edges, lon_edges, variables=None,
+                 area_weighted=False):
+        """Initialise an empty grid
+
+        Args:
+            lat_edges: Edges of the grid cells along the latitudes in
+                degrees (1-dimensional array).
+            lon_edges: Edges of the grid cells along the longitudes in
+                degrees (1-dimensional array).
+            variables: Names of the variables to grid.  If None, a single
+                unnamed variable is gridded and data can be passed as array.
+            area_weighted: If True, each point is weighted with the cosine
+                of its latitude, i.e. the area it represents on a regular
+                latitude-longitude grid.  Otherwise, all points are weighted
+                equally.  This only affects mean and standard deviation.
+        """
+        self.lat_edges = np.asarray(lat_edges, dtype=float)
+        self.lon_edges = np.asarray(lon_edges, dtype=float)
+        self.variables = None if variables is None else list(variables)
+        self.area_weighted = area_weighted
+
+        size = (
+            1 if variables is None else len(self.variables),
+            (self.lat_edges.size - 1) * (self.lon_edges.size - 1),
+        )
+        self._number = np.zeros(size, dtype=np.int64)
+        self._weight_sum = np.zeros(size)
+        self._mean = np.zeros(size)
+        self._m2 = np.zeros(size)
+        self._minimum = np.full(size, np.nan)
+        self._maximum = np.full(size, np.nan)
+
+    @property
+    def shape(self):
+        """Shape of the grid (latitudes, longitudes)"""
+        return self.lat_edges.size - 1, self.lon_edges.size - 1
+
+    def add(self, lat, lon, data, weights=None):
+        """Add points to the grid
+
+        Args:
+            lat: Latitudes of the points in degrees.
+            lon: Longitudes of the points in degrees.
+            data: Array with one value per point if the accumulator has no
+                variable names, otherwise a dict-like object (e.g. a dict
+                or xarray.Dataset) with an array per variable.
+            weights: Optional weights of the points.  They are multiplied
+                with the area weights if `area_weighted` is set.  Points with
+                zero weight are ignored, as are NaN values.
+        """
+        index = _grid_index(lat, lon, self.lat_edges, self.lon_edges)
+
+        if self.variables is None:
+            values = np.ravel(data)[np.newaxis, :]
+        else:
+            values = np.empty((len(self.variables), index.size))
+            for i, name in enumerate(self.variables):
+                values[i] = np.ravel(data[name])
+        values = values.astype(float, copy=False)
+
+        if weights is None:
+            weights = np.ones(index.size)
+        else:
+            weights = np.ravel(weights).astype(float)
+        if self.area_weighted:
+            weights = weights * np.cos(np.deg2rad(np.ravel(lat)))
+
+        _accumulate_grid(
+            index, values, weights, self._number, self._weight_sum,
+            self._mean, self._m2, self._minimum, self._maximum
+        )
+
+    def merge(self, other):
+        """Combine the statistics of another grid into this one
+
+        Uses the parallel algorithm by Chan et al.  Both grids must have
+        the same cells and variables.
+
+        Args:
+            other: A GridAccumulator object.
+
+        Returns:
+            This object.
+        """
+        if (self.shape != other.shape or self.variables != other.variables
+                or not np.array_equal(self.lat_edges, other.lat_edges)
+                or not np.array_equal(self.lon_edges, other.lon_edges)):
+            raise ValueError("Can only merge grids with equal cells and "
+                             "variables!")
+
+        weight_sum = self._weight_sum + other._weight_sum
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = other._mean - self._mean
+            fraction = np.where(
+                weight_sum > 0, other._weight_sum / weight_sum, 0.)
+        self._m2 += other._m2 \
+            + delta**2 * self._weight_sum * fraction
+        self._mean += delta * fraction
+        self._weight_sum = weight_sum
+        self._number += other._number
+        self._minimum = np.fmin(self._minimum, other._minimum)
+        self._maximum = np.fmax(self._maximum, other._maximum)
+        return self
+
+    def __iadd__(self, other):
+        return self.merge(other)
+
+    def get(self, statistic, variable=None):
+        """Get a statistic as grid
+
+        Args:
+            statistic: One of *mean*, *std*, *min*, *max* or *count*.
+            variable: Name of the variable.  Not needed if the accumulator
+                has no variable names.
+
+        Returns:
+            A numpy array with the shape of the grid.  Cells without points
+            are NaN (or 0 for *count*).
+        """
+        v = 0 if self.variables is None else self.variables.index(variable)
+        number = self._number[v]
+        empty = number == 0
+        if statistic == "mean":
+            grid = np.where(empty, np.nan, self._mean[v])
+        elif statistic == "std":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                grid = np.sqrt(self._m2[v] / self._weight_sum[v])
+            grid[empty] = np.nan
+        elif statistic == "min":
+            grid = self._minimum[v].copy()
+        elif statistic == "max":
+            grid = self._maximum[v].copy()
+        elif statistic == "count":
+            grid = number.copy()
+        else:
+            raise ValueError(f"Unknown statistic '{statistic}'!")
+        return grid.reshape(self.shape)
+
+    def to_xarray(self, statistics=None):
+        """Get all statistics as xarray.Dataset
+
+        Args:
+            statistics: List of statistics. Default are all of
+                :attr:`statistics`.
+
+        Returns:
+            A xarray.Dataset with a variable *{variable}_{statistic}* (or
+            only *{statistic}* for unnamed data) for each statistic. The
+            coordinates are the centres of the grid cells.
+        """
+        if statistics is None:
+            statistics = self.statistics
+        variables = [None] if self.variables is None else self.variables
+
+        dataset = xr.Dataset(coords={
+            "lat": (self.lat_edges[1:] + self.lat_edges[:-1]) / 2,
+            "lon": (self.lon_edges[1:] + self.lon_edges[:-1]) / 2,
+        })
+        for variable in variables:
+            for statistic in statistics:
+                name = statistic if variable is None \
+                    else f"{variable}_{statistic}"
+                dataset[name] = ("lat", "lon"), self.get(statistic, variable)
+        return dataset
+
+
+class RasterLookup:
+    """Look up values of a global latitude-longitude raster
+
+    The raster is a 2-dimensional array whose rows are equally spaced in
+    latitude and whose columns are equally spaced in longitude.  The first
+    and last row lie on the two latitudes given by `lat_range`, the first and
+    last column on the two longitudes given by `lon_range` (the values are
+    located on the grid nodes).  If the columns span the whole globe,
+    longitudes wrap around, so any longitude can be looked up.
+
+    Rasters from files (see :meth:`from_file`) are converted once into a
+    .npy file in a cache directory and then opened memory-mapped.  All
+    objects and processes using the same file share the same memory.  When
+    such an object is pickled (e.g. to send it to the worker processes of
+    :meth:`~typhon.files.fileset.FileSet.map`), only the path of the cache
+    file is pickled, not the array.
+
+    Examples:
+
+    .. code-block:: python
+
+        elevation = RasterLookup.from_file("elevation.nc")
+        height = elevation.bilinear(lat, lon)
+
+        mask = RasterLookup.from_file("land_water_mask_5min.png")
+        over_sea = mask.nearest(lat, lon)
+    """
+
+    def __init__(self, data, lat_range=(90, -90), lon_range=(0, 360),
+                 bounds_error=True, fill_value=np.nan):
+        """Initialise the lookup
+
+        Args:
+            data: 2-dimensional array with the shape (latitudes, longitudes).
+            lat_range: Latitudes of the first and the last row in degrees.
+            lon_range: Longitudes of the first and the last column in
+                degrees.
+            bounds_error: If True, a ValueError is raised for latitudes
+                outside of `lat_range` (or longitudes outside of `lon_range`
+                if they do not wrap around) and for NaN or infinite
+                coordinates.  Otherwise, `fill_value` is returned for them.
+            fill_value: Value for points outside of the raster if
+                `bounds_error` is False.
+        """
+        data = np.asanyarray(data)
+        if data.ndim != 2 or min(data.shape) < 2:
+            raise ValueError("The raster must be a 2-dimensional array with "
+                             "at least two rows and columns!")
+
+        self.data = data
+        self.lat_range = tuple(float(lat) for lat in lat_range)
+        self.lon_range = tuple(float(lon) for lon in lon_range)
+        self.bounds_error = bounds_error
+        self.fill_value = fill_value
+        self._cache_file = None
+
+        self._lat_step = \
+            (self.lat_range[1] - self.lat_range[0]) / (data.shape[0] - 1)
+        self._lon_step = \
+            (self.lon_range[1] - self.lon_range[0]) / (data.shape[1] - 1)
+
+        # Number of columns after which the longitudes repeat. The last
+        # column may be a copy of the first one:
+        span = abs(self._lon_step) * data.shape[1]
+        if np.isclose(span - abs(self._lon_step), 360):
+            self._period = data.shape[1] - 1
+        elif np.isclose(span, 360):
+            self._period = data.shape[1]
+        else:
+            self._period = None
+
+    @classmethod
+    def from_file(cls, filename, variable="data", cache_dir=None, **kwargs):
+        """Create a lookup from a PNG or NetCDF file
+
+        The file is converted only once to a .npy file in `cache_dir`, all
+        later calls (also from other processes) open this file memory-mapped.
+        The cache file is renewed when the original file changes.
+
+        Args:
+            filename: Path to a monochromatic PNG file (white pixels become
+                True, the rows are flipped as in :func:`sea_mask`) or to a
+                NetCDF file.
+            variable: Name of the variable in the NetCDF file.  Dimensions
+                of length one are removed.
+            cache_dir: Directory for the cache files.  If not given, the
+                option *raster_cache_dir* in the *[geographical]* section of
+                the typhonrc is used, or a directory in the system's
+                temporary directory.
+            **kwargs: Additional keyword arguments for
+                :class:`RasterLookup`, e.g. `lat_range`.
+
+        Returns:
+            A RasterLookup object.
+        """
+        if cache_dir is None:
+            cache_dir = config.conf.get(
+                "geographical", "raster_cache_dir",
+                fallback=os.path.join(tempfile.gettempdir(), "typhon_rasters")
+            )
+
+        filename = os.path.abspath(filename)
+        stat = os.stat(filename)
+        key = hashlib.sha1(
+            f"{filename}|{stat.st_mtime_ns}|{stat.st_size}|{variable}"
+            .encode()).hexdigest()
+        cache_file = os.path.join(cache_dir, f"raster_{key}.npy")
+
+        if not os.path.exists(cache_file):
+            if filename.lower().endswith(".png"):
+                data = np.flip(np.array(imageio.imread(filename) == 255),
+                               axis=0)
+            else:
+                with xr.open_dataset(filename, decode_times=False) as ds:
+                    data = ds[variable].squeeze().values
+
+            os.makedirs(cache_dir, exist_ok=True)
+            # Write to a temporary file first, so that concurrent processes
+            # never see a partially written raster.
+            fd, tmp = tempfile.mkstemp(suffix=".npy", dir=cache_dir)
+            with os.fdopen(fd, "wb") as file:
+                np.save(file, np.ascontiguousarray(data))
+            os.replace(tmp, cache_file)
+
+        lookup = cls(_open_raster(cache_file), **kwargs)
+        lookup._cache_file = cache_file
+        return lookup
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self._cache_file is not None:
+            # The other process opens the cache file by itself
+            del state["data"]
+        return state
+
+    def __setstate__(self, state):
+        if "data" not in state:
+            state["data"] = _open_raster(state["_cache_file"])
+        self.__dict__.update(state)
+
+    def _fractional_indices(self, lat, lon):
+        """Indices of the points in the raster as floats and validity"""
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+
+        row = (lat - self.lat_range[0]) / self._lat_step
+        column = (lon - self.lon_range[0]) / self._lon_step
+        if self._period is not None:
+            with np.errstate(invalid="ignore"):
+                column %= self._period
+
+        # Comparisons with NaN are false, so NaN latitudes are invalid here:
+        valid = (row >= 0) & (row <= self.data.shape[0] - 1)
+        if self._period is None:
+            valid &= (column >= 0) & (column <= self.data.shape[1] - 1)
+        else:
+            # The longitudes are wrapped, only non-finite ones are invalid:
+            valid &= np.isfinite(column)
+
+        if not valid.all() and self.bounds_error:
+            if ((lat < min(self.lat_range)) | (lat > max(self.lat_range))
+                    | np.isnan(lat)).any():
+                raise ValueError("Latitudes out of bounds!")
+            raise ValueError("Longitudes out of bounds!")
+
+        return row, column, valid
+
+    def _fill(self, values, valid):
+        if valid.all():
+            return values
+        values = values.astype(np.result_type(values, self.fill_value))
+        values[~valid] = self.fill_value
+        return values
+
+    def nearest(self, lat, lon):
+        """Get the values of the nearest grid nodes
+
+        Args:
+            lat: Latitudes in degrees.
+            lon: Longitudes in degrees.
+
+        Returns:
+            An array with the same shape as `lat` and `lon`.
+        """
+        row, column, valid = self._fractional_indices(lat, lon)
+
+        row = np.rint(np.where(valid, row, 0)).astype(int)
+        column = np.rint(np.where(valid, column, 0)).astype(int)
+        if self._period is not None:
+            column %= self._period
+
+        return self._fill(self.data[row, column], valid)
+
+    __call__ = nearest
+
+    def bilinear(self, lat, lon):
+        """Interpolate the values bilinearly between the grid nodes
+
+        Args:
+            lat: Latitudes in degrees.
+            lon: Longitudes in degrees.
+
+        Returns:
+            A float array with the same shape as `lat` and `lon`.
+        """
+        row, column, valid = self._fractional_indices(lat, lon)
+        row = np.where(valid, row, 0)
+        column = np.where(valid, column, 0)
+
+        row0 = np.minimum(np.floor(row).astype(int), self.data.shape[0] - 2)
+        column0 = np.floor(column).astype(int)
+        if self._period is None:
+            column0 = np.minimum(column0, self.data.shape[1] - 2)
+        row_weight = row - row0
+        column_weight = column - column0
+
+        column1 = column0 + 1
+        if self._period is not None:
+            column1 %= self._period
+
+        top = (1 - column_weight) * self.data[row0, column0] \
+            + column_weight * self.data[row0, column1]
+        bottom = (1 - column_weight) * self.data[row0 + 1, column0] \
+            + column_weight * self.data[row0 + 1, column1]
+        return self._fill((1 - row_weight) * top + row_weight * bottom, valid)
+
+
+# Memory-mapped cache files that have been opened by this process
+_open_rasters = {}
+
+
+def _open_raster(cache_file):
+    """Open a cache file memory-mapped, only once per process"""
+    raster = _open_rasters.get(cache_file)
+    if raster is None:
+        raster = np.load(cache_file, mmap_mode="r")
+        _open_rasters[cache_file] = raster
+    return raster
+
+
 def sea_mask(lat, lon, mask):
     """Check whether geographical coordinates are over sea
 
@@ -339,9 +874,12 @@ def sea_mask(lat, lon, mask):
                 array.
         lon: Longitudes between -180 and 180 degrees as 1-dimensional numpy
             array. Must have the same length as `lat`.
-        mask: Your own land-sea mask as a 2-dimensional boolean matrix or
-            a path to a monochromatic PNG file. Must be sea pixels must be True
-            or white, respectively.
+        mask: Your own land-sea mask as a 2-dimensional boolean matrix,
+            a path to a monochromatic PNG file or a :class:`RasterLookup`
+            object. Sea pixels must be True or white, respectively. The first
+            row of the matrix is at 90 degrees north, the first column at 0
+            degrees east. The PNG file is converted only once to a
+            memory-mapped cache file (see :meth:`RasterLookup.from_file`).
 
     Returns:
         Returns a boolean array with the same dimensions as `lat`. It is True
@@ -378,14 +916,10 @@ def sea_mask(lat, lon, mask):
         raise ValueError("Latitudes out of bounds!")
 
     if isinstance(mask, str):
-        mask = np.flip(np.array(imageio.imread(mask) == 255), axis=0)
-
-    mask_lat_step = 180 / (mask.shape[0] - 1)
-    mask_lon_step = 360 / (mask.shape[1] - 1)
-
-    lat_cell = (90 - lat) / mask_lat_step
-    lon_cell = lon / mask_lon_step
+        mask = RasterLookup.from_file(mask)
+    elif not isinstance(mask, RasterLookup):
+        mask = RasterLookup(mask)
 
-    return mask[lat_cell.astype(int), lon_cell.astype(int)]
+    return mask.nearest(lat, lon)
 
 
@@ -2,6 +2,7 @@
 """Collection of functions concerning the Optimal Estimation Method (OEM).
 """
 
+from typhon.oem.batch import *  # noqa
 from typhon.oem.common import *  # noqa
 from typhon.oem.error import *  # noqa
 
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""OEM diagnostics for many retrievals that share their covariance matrices.
+"""
+
+import numpy as np
+from scipy.linalg import cho_factor, cho_solve
+
+
+__all__ = [
+    'BatchDiagnostics',
+]
+
+
+class BatchDiagnostics:
+    """OEM diagnostics for stacked Jacobians with shared covariances.
+
+    The functions in :mod:`typhon.oem.common` and :mod:`typhon.oem.error`
+    handle one retrieval and invert the covariance matrices on every call.
+    This class factorizes :math:`S_a` and :math:`S_y` once and then computes
+    the diagnostics for a stack of Jacobians of shape (n, m, k) at once,
+    with n retrievals, m measurements and k state vector elements. All
+    per-retrieval matrices are obtained by solving linear systems, not by
+    inversion.
+
+    Examples:
+        >>> diagnostics = BatchDiagnostics(S_a, S_y)
+        >>> A = diagnostics.averaging_kernel_matrix(K)  # (n, k, k)
+        >>> S = diagnostics.error_covariance_matrix(K)  # (n, k, k)
+    """
+    def __init__(self, S_a, S_y):
+        """Factorize the covariance matrices.
+
+        Parameters:
+            S_a (np.array or CovarianceMatrix): A priori error covariance
+                matrix (k, k).
+            S_y (np.array or CovarianceMatrix): Measurement covariance
+                matrix (m, m).
+        """
+        self._S_y = S_y
+        if not hasattr(S_y, "solve"):
+            self._S_y_factor = cho_factor(np.asarray(S_y))
+
+        if hasattr(S_a, "solve"):
+            self.S_a_inv = S_a.solve(np.eye(S_a.shape[0]))
+        else:
+            S_a = np.asarray(S_a)
+            self.S_a_inv = cho_solve(cho_factor(S_a), np.eye(S_a.shape[0]))
+
+    def _S_y_solve(self, K):
+        """Return :math:`S_y^{-1} K` for stacked K of shape (n, m, k)."""
+        n, m, k = K.shape
+        # One solve with all Jacobians side by side as right-hand sides
+        rhs = K.transpose(1, 0, 2).reshape(m, n * k)
+        if hasattr(self._S_y, "solve"):
+            x = self._S_y.solve(rhs)
+        else:
+            x = cho_solve(self._S_y_factor, rhs)
+        return x.reshape(m, n, k).transpose(1, 0, 2)
+
+    def _normal_equations(self, K):
+        """Return :math:`S_y^{-1} K`, :math:`K^T S_y^{-1} K` and
+        :math:`K^T S_y^{-1} K + S_a^{-1}`.
+        """
+        K = np.asarray(K)
+        if K.ndim != 3:
+            raise ValueError(
+                "Expected stacked Jacobians of shape (n, m, k).")
+        S_y_inv_K = self._S_y_solve(K)
+        K_S_y_inv_K = K.transpose(0, 2, 1) @ S_y_inv_K
+        return S_y_inv_K, K_S_y_inv_K, K_S_y_inv_K + self.S_a_inv
+
+    def error_covariance_matrix(self, K):
+        """Calculate the error covariance matrices.
+
+        Parameters:
+            K (np.array): Stacked Jacobians (n, m, k).
+
+        Returns:
+            np.array: Measurement error covariance matrices (n, k, k).
+        """
+        _, _, M = self._normal_equations(K)
+        eye = np.broadcast_to(np.eye(M.shape[-1]), M.shape)
+        return np.linalg.solve(M, eye)
+
+    def retrieval_gain_matrix(self, K):
+        """Calculate the retrieval gain matrices.
+
+        Parameters:
+            K (np.array): Stacked Jacobians (n, m, k).
+
+        Returns:
+            np.array: Retrieval gain matrices (n, k, m).
+        """
+        S_y_inv_K, _, M = self._normal_equations(K)
+        return np.linalg.solve(M, S_y_inv_K.transpose(0, 2, 1))
+
+    def averaging_kernel_matrix(self, K):
+        """Calculate the averaging kernel matrices.
+
+        Parameters:
+            K (np.array): Stacked Jacobians (n, m, k).
+
+        Returns:
+            np.array: Averaging kernel matrices (n, k, k).
+        """
+        _, K_S_y_inv_K, M = self._normal_equations(K)
+        # A = G K = M^-1 K^T S_y^-1 K, without forming G
+        return np.linalg.solve(M, K_S_y_inv_K)
+
+    def retrieval_noise(self, K, e_y):
+        """Return the retrieval noise.
+
+        Parameters:
+            K (np.array): Stacked Jacobians (n, m, k).
+            e_y (ndarray): Total measurement error, either (m,) shared by all
+                retrievals or (n, m).
+
+        Returns:
+            ndarray: Retrieval noise (n, k).
+        """
+        S_y_inv_K, _, M = self._normal_equations(K)
+        e_y = np.broadcast_to(e_y, (S_y_inv_K.shape[0], S_y_inv_K.shape[1]))
+        rhs = np.einsum("nmk,nm->nk", S_y_inv_K, e_y)
+        return np.linalg.solve(M, rhs[..., np.newaxis])[..., 0]
@@ -2,6 +2,7 @@
 """Functions concerning the Optimal Estimation Method (OEM).
 """
 
+import numpy as np
 from scipy.linalg import inv
 
 
@@ -11,18 +12,37 @@ __all__ = ['error_covariance_matrix',
            ]
 
 
+def _inv_dot(S, M):
+    """Return :math:`S^{-1} M`.
+
+    Covariance matrices that provide a ``solve`` method (e.g.
+    :class:`~typhon.arts.covariancematrix.CovarianceMatrix`) are not
+    inverted explicitly.
+    """
+    if hasattr(S, "solve"):
+        return S.solve(M)
+    return inv(S) @ M
+
+
+def _inv(S):
+    """Return :math:`S^{-1}`."""
+    if hasattr(S, "solve"):
+        return S.solve(np.eye(S.shape[0]))
+    return inv(S)
+
+
 def error_covariance_matrix(K, S_a, S_y):
     """Calculate the error covariance matrix.
 
     Parameters:
         K (np.array): Simulated Jacobians.
-        S_a (np.array): A priori error covariance matrix.
-        S_y (np.array): Measurement covariance matrix.
+        S_a (np.array or CovarianceMatrix): A priori error covariance matrix.
+        S_y (np.array or CovarianceMatrix): Measurement covariance matrix.
 
     Returns:
         np.array: Measurement error covariance matrix.
     """
-    return inv(K.T @ inv(S_y) @ K + inv(S_a))
+    return inv(K.T @ _inv_dot(S_y, K) + _inv(S_a))
 
 
 def averaging_kernel_matrix(K, S_a, S_y):
@@ -30,8 +50,8 @@ def averaging_kernel_matrix(K, S_a, S_y):
 
     Parameters:
         K (np.array): Simulated Jacobians.
-        S_a (np.array): A priori error covariance matrix.
-        S_y (np.array): Measurement covariance matrix.
+        S_a (np.array or CovarianceMatrix): A priori error covariance matrix.
+        S_y (np.array or CovarianceMatrix): Measurement covariance matrix.
 
     Returns:
         np.array: Averaging kernel matrix.
@@ -44,10 +64,11 @@ def retrieval_gain_matrix(K, S_a, S_y):
 
     Parameters:
         K (np.array): Simulated Jacobians.
-        S_a (np.array): A priori error covariance matrix.
-        S_y (np.array): Measurement covariance matrix.
+        S_a (np.array or CovarianceMatrix): A priori error covariance matrix.
+        S_y (np.array or CovarianceMatrix): Measurement covariance matrix.
 
     Returns:
         np.array: Retrieval gain matrix.
     """
-    return inv(inv(S_a) + K.T @ inv(S_y) @ K) @ K.T @ inv(S_y)
+    S_y_inv_K = _inv_dot(S_y, K)
+    return inv(_inv(S_a) + K.T @ S_y_inv_K) @ S_y_inv_K.T
@@ -30,8 +30,8 @@ def retrieval_noise(K, S_a, S_y, e_y):
 
     Parameters:
         K (np.array): Simulated Jacobians.
-        S_a (np.array): A priori error covariance matrix.
-        S_y (np.array): Measurement covariance matrix.
+        S_a (np.array or CovarianceMatrix): A priori error covariance matrix.
+        S_y (np.array or CovarianceMatrix): Measurement covariance matrix.
         e_y (ndarray): Total measurement error.
 
     Returns:
@@ -2,11 +2,12 @@
 
 """Functions directly related to atmospheric sciences.
 """
+import numba
 import numpy as np
+import xarray as xr
 from scipy.interpolate import interp1d
 
 from typhon import constants
-from typhon import math
 from typhon.physics import thermodynamics
 
 
@@ -106,7 +107,7 @@ def vmr2relative_humidity(vmr, p, T, e_eq=None):
     return vmr * p / e_eq(T)
 
 
-def integrate_water_vapor(vmr, p, T=None, z=None, axis=0):
+def integrate_water_vapor(vmr, p, T=None, z=None, axis=0, chunksize=None):
     r"""Calculate the integrated water vapor (IWV).
 
     The basic implementation of the function assumes the atmosphere
@@ -121,36 +122,147 @@ def integrate_water_vapor(vmr, p, T=None, z=None, axis=0):
     .. math::
         \mathrm{IWV} = \int \rho_v(z)\,\mathrm{d}z
 
+    The conversion to specific humidity (or water vapor density) and the
+    trapezoidal integration are fused into one compiled kernel, which only
+    allocates the output.  Multidimensional fields are processed column
+    by column, optionally in chunks of ``chunksize`` columns.  For
+    :class:`xarray.DataArray` input, ``axis`` may also be a dimension name
+    and dask-backed arrays are integrated chunk by chunk.
+
     Parameters:
         vmr (float or ndarray): Volume mixing ratio,
         p (float or ndarray): Pressue [Pa].
         T (float or ndarray): Temperature [K] (see ``z``).
         z (float or ndarray): Height [m]. For non-hydrostatic calculation
             both ``T`` and ``z`` have to be passed.
-        axis (int): Axis to integrate along.
+        axis (int or str): Axis to integrate along.
+        chunksize (int): Number of columns to process at once.  Only
+            relevant for input that is read lazily from disk, e.g.
+            memory-mapped arrays.
 
     Returns:
         float: Integrated water vapor [kg/m**2].
     """
     if T is None and z is None:
         # Calculate IWV assuming hydrostatic equilibrium.
-        q = thermodynamics.vmr2specific_humidity(vmr)
         g = constants.earth_standard_gravity
 
-        return -math.integrate_column(q, p, axis=axis) / g
+        return -_integrate_columns(
+            _specific_humidity, (vmr,), p, axis, chunksize) / g
     elif T is None or z is None:
         raise ValueError(
             'Pass both `T` and `z` for non-hydrostatic calculation of the IWV.'
         )
     else:
         # Integrate the water vapor mass density for non-hydrostatic cases.
-        R_v = constants.gas_constant_water_vapor
-        rho = thermodynamics.density(p, T, R=R_v)  # Water vapor density.
+        return _integrate_columns(
+            _water_vapor_density, (vmr, p, T), z, axis, chunksize)
+
+
+@numba.njit
+def _specific_humidity(vmr, unused1, unused2):
+    Md = constants.molar_mass_dry_air
+    Mw = constants.molar_mass_water
+    return vmr / ((1 - vmr) * Md / Mw + vmr)
+
 
-        return math.integrate_column(vmr * rho, z, axis=axis)
+@numba.njit
+def _water_vapor_density(vmr, p, T):
+    return vmr * p / (constants.gas_constant_water_vapor * T)
 
 
-def moist_lapse_rate(p, T, e_eq=None):
+@numba.njit(nogil=True)
+def _trapz_columns(integrand, a, b, c, x, out):
+    """Integrate integrand(a, b, c) over x along the first axis.
+
+    All arrays have the shape (levels, columns).  The loops run along the
+    axis that is contiguous in memory.
+    """
+    n_levels, n_columns = a.shape
+    if a.strides[0] > a.strides[1]:
+        out[:] = 0.
+        for k in range(n_levels - 1):
+            for j in range(n_columns):
+                out[j] += 0.5 * (
+                    integrand(a[k, j], b[k, j], c[k, j])
+                    + integrand(a[k+1, j], b[k+1, j], c[k+1, j])
+                ) * (x[k+1, j] - x[k, j])
+    else:
+        for j in range(n_columns):
+            total = 0.
+            for k in range(n_levels - 1):
+                total += 0.5 * (
+                    integrand(a[k, j], b[k, j], c[k, j])
+                    + integrand(a[k+1, j], b[k+1, j], c[k+1, j])
+                ) * (x[k+1, j] - x[k, j])
+            out[j] = total
+
+
+def _integrate_columns(integrand, args, x, axis, chunksize):
+    """Integrate integrand(*args) along x with the trapezoidal rule.
+
+    Like numpy.trapz, one-dimensional arguments are taken to lie along
+    ``axis`` of the first argument.  DataArrays are handed to
+    :func:`xarray.apply_ufunc` and integrated blockwise.
+    """
+    if any(isinstance(arg, xr.DataArray) for arg in args + (x,)):
+        return _integrate_columns_xarray(integrand, args, x, axis, chunksize)
+
+    arrays = [np.asarray(arg) for arg in args + (x,)]
+    shape = arrays[0].shape
+    if not shape:
+        raise ValueError('Cannot integrate scalar input.')
+    axis = axis % len(shape)
+    n_levels = shape[axis]
+
+    columns = []
+    for arr in arrays:
+        if arr.ndim == 1 and len(shape) > 1:
+            arr = arr.reshape(
+                [n_levels if i == axis else 1 for i in range(len(shape))])
+        arr = np.moveaxis(np.broadcast_to(arr, shape), axis, 0)
+        columns.append(arr.reshape(n_levels, -1))
+    # Pad the integrand arguments to three
+    columns[len(args):len(args)] = columns[:1] * (3 - len(args))
+
+    n_columns = columns[0].shape[1]
+    out = np.empty(n_columns, dtype=np.result_type(*arrays, np.float64))
+    chunksize = chunksize or max(n_columns, 1)
+    for start in range(0, n_columns, chunksize):
+        chunk = slice(start, start + chunksize)
+        _trapz_columns(integrand, *[col[:, chunk] for col in columns],
+                       out[chunk])
+
+    out = out.reshape(shape[:axis] + shape[axis+1:])
+    return out[()] if out.ndim == 0 else out
+
+
+def _integrate_columns_xarray(integrand, args, x, axis, chunksize):
+    """Apply _integrate_columns to DataArrays, blockwise for dask arrays."""
+    reference = next(
+        arg for arg in args + (x,) if isinstance(arg, xr.DataArray))
+    dim = reference.dims[axis] if isinstance(axis, int) else axis
+
+    inputs = []
+    for arg in args + (x,):
+        if not isinstance(arg, xr.DataArray):
+            arg = np.asarray(arg)
+            arg = xr.DataArray(arg, dims=(dim,) if arg.ndim == 1 else
+                               reference.dims[-arg.ndim:])
+        inputs.append(arg)
+
+    def integrate(*arrays):
+        return _integrate_columns(integrand, arrays[:-1], arrays[-1], -1,
+                                  chunksize)
+
+    return xr.apply_ufunc(
+        integrate, *inputs,
+        input_core_dims=[[dim]] * len(inputs),
+        dask='parallelized', output_dtypes=[np.float64],
+    )
+
+
+def moist_lapse_rate(p, T, e_eq=None, out=None):
     r"""Calculate the moist-adiabatic temperature lapse rate.
 
     Bohren and Albrecht (Equation 6.111, note the **sign change**):
@@ -167,10 +279,17 @@ def moist_lapse_rate(p, T, e_eq=None):
             signature ``e_eq = f(T)`` where ``T`` is temperature in Kelvin.
             If ``None`` the function :func:`~typhon.physics.e_eq_water_mk` is
             used.
+        out (ndarray): Optional array to store the result in.
 
     Returns:
         float or ndarray: Moist-adiabatic lapse rate [K/m].
 
+    Note:
+        With the default ``e_eq``, the calculation is done by a compiled
+        ufunc that evaluates the whole formula per element.  Thus, no
+        intermediate arrays are allocated and dask-backed DataArrays are
+        computed blockwise.
+
     Examples:
         >>> moist_lapse_rate(1013.25e2, 288.15)
         0.004728194612232855
@@ -179,7 +298,7 @@ def moist_lapse_rate(p, T, e_eq=None):
         Bohren C. and Albrecht B., Atmospheric Thermodynamics, p. 287-92
     """
     if e_eq is None:
-        e_eq = thermodynamics.e_eq_water_mk
+        return _moist_lapse_rate_water(p, T, out=out)
 
     # Use short formula symbols for physical constants.
     g = constants.earth_standard_gravity
@@ -198,9 +317,42 @@ def moist_lapse_rate(p, T, e_eq=None):
         )
     )
 
+    if out is not None:
+        out[...] = lapse
+        return out
     return lapse
 
 
+@numba.vectorize(['float32(float32, float32)', 'float64(float64, float64)'])
+def _moist_lapse_rate_water(p, T):
+    """Fused moist_lapse_rate with e_eq_water_mk, see there."""
+    g = constants.earth_standard_gravity
+    Lv = constants.heat_of_vaporization
+    Rd = constants.gas_constant_dry_air
+    Rv = constants.gas_constant_water_vapor
+    Cp = constants.isobaric_mass_heat_capacity
+    Md = constants.molar_mass_dry_air
+    Mw = constants.molar_mass_water
+
+    # e_eq_water_mk
+    e = (54.842763
+         - 6763.22 / T
+         - 4.21 * np.log(T)
+         + 0.000367 * T
+         + np.tanh(0.0415 * (T - 218.8))
+         * (53.878 - 1331.22 / T - 9.44523 * np.log(T) + 0.014025 * T))
+    x = np.exp(e) / p
+    # vmr2mixing_ratio
+    w_saturated = x / (1 - x) * Mw / Md
+
+    return (
+        g / Cp * (
+            (1 + (Lv * w_saturated) / (Rd * T)) /
+            (1 + (Lv**2 * w_saturated) / (Cp * Rv * T**2))
+        )
+    )
+
+
 def standard_atmosphere(z, coordinates='height'):
     """International Standard Atmosphere (ISA).
 
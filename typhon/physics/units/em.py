@@ -14,11 +14,16 @@ has a soft dependency on the pint units library.
 # All those contributions are dual-licensed under the MIT license for use
 # in typhon, and the GNU General Public License version 3.
 
+import hashlib
+import os
+import pathlib
+import tempfile
 import warnings
 import logging
 
 import numpy
 import scipy.interpolate
+import scipy.sparse
 
 import numexpr
 import pint
@@ -33,8 +38,10 @@ from typhon.physics.units.tools import UnitsAwareDataArray as UADA
 
 
 __all__ = [
+    'ChannelIntegrator',
     'FwmuMixin',
     'SRF',
+    'channel_radiances2bt',
     'planck_f',
     'specrad_wavenumber2frequency',
     'specrad_frequency_to_planck_bt',
@@ -106,6 +113,11 @@ class SRF(FwmuMixin):
     lookup_table = None
     L_to_T = None
 
+    # Directory for lookup tables shared between processes, see
+    # make_lookup_table.  If None, the option lookup_table_cache_dir in
+    # the [srf] section of the typhonrc is used, if present.
+    lookup_table_cache_dir = None
+
     def __init__(self, f, W):
         """Initialise SRF object.
 
@@ -285,17 +297,58 @@ class SRF(FwmuMixin):
         then calculating the channel radiance.  This table can then be
         used to get a mapping from radiance to brightness temperature.
 
+        Lookup tables are cached per process, keyed by a hash of the
+        frequencies, the weights and T_lookup_table, such that SRF objects
+        for the same channel share them.  If lookup_table_cache_dir is
+        set, the tables are also stored there as .npy files and reused by
+        other processes.
+
         This method does not return anything, but fill self.lookup_table.
         """
-        self.lookup_table = numpy.zeros(
+        key = self._lookup_table_key()
+        try:
+            self.lookup_table = _lookup_tables[key]
+        except KeyError:
+            self.lookup_table = self._load_or_compute_lookup_table(key)
+            self.lookup_table.flags.writeable = False
+            _lookup_tables[key] = self.lookup_table
+        self.L_to_T = _MonotoneInverse(self.lookup_table[1, :],
+                                       self.lookup_table[0, :],
+                                       left=0, right=2000)
+
+    def _lookup_table_key(self):
+        """Hash of everything the lookup table depends on"""
+        sha = hashlib.sha1()
+        for arr in (self.frequency.to("Hz", "sp").m, self.W,
+                    self.T_lookup_table.to("K").m):
+            sha.update(numpy.ascontiguousarray(arr, dtype="f8").tobytes())
+            sha.update(b"|")
+        return sha.hexdigest()
+
+    def _load_or_compute_lookup_table(self, key):
+        """Get lookup table from lookup_table_cache_dir or compute it"""
+        cachedir = (self.lookup_table_cache_dir
+                    or config.conf.get("srf", "lookup_table_cache_dir",
+                                       fallback=None))
+        if cachedir:
+            path = pathlib.Path(cachedir, "srf_lookup_{:s}.npy".format(key))
+            if path.exists():
+                return numpy.load(str(path))
+
+        lookup_table = numpy.zeros(
             shape=(2, self.T_lookup_table.size), dtype=numpy.float64)
-        self.lookup_table[0, :] = self.T_lookup_table
-        self.lookup_table[1, :] = self.blackbody_radiance(self.T_lookup_table)
-        self.L_to_T = scipy.interpolate.interp1d(self.lookup_table[1, :],
-                                                 self.lookup_table[0, :],
-                                                 kind='linear',
-                                                 bounds_error=False,
-                                                 fill_value=(0, 2000))
+        lookup_table[0, :] = self.T_lookup_table
+        lookup_table[1, :] = self.blackbody_radiance(self.T_lookup_table)
+
+        if cachedir:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first, so that concurrent processes
+            # never see a partially written table.
+            (fd, tmp) = tempfile.mkstemp(suffix=".npy", dir=str(path.parent))
+            with os.fdopen(fd, "wb") as fp:
+                numpy.save(fp, lookup_table)
+            os.replace(tmp, str(path))
+        return lookup_table
 
     def integrate_radiances(self, f, L, spectral=True):
         """From a spectrum of radiances and a SRF, calculate channel (spectral) radiance
@@ -359,13 +412,16 @@ class SRF(FwmuMixin):
         though this is a different quantity), for example, by using
         L.to("K", "radiance", srf=srf)
 
-        :param L: Radiance [W m^-2 sr^-1 Hz^-1] or compatible
+        :param L: Radiance [W m^-2 sr^-1 Hz^-1] or compatible.  If L is a
+            plain ndarray, it must be in W m^-2 sr^-1 Hz^-1 and the result
+            is a plain ndarray in K as well, which avoids the overhead of
+            pint for large arrays.
         """
         if self.lookup_table is None:
             self.make_lookup_table()
-        return self.L_to_T(
-            L.to(ureg.W / (ureg.m**2 * ureg.sr * ureg.Hz),
-                 "radiance")) * ureg.K
+        if not isinstance(L, ureg.Quantity):
+            return self.L_to_T(L)
+        return ureg.Quantity(self.L_to_T(_to_specrad_freq(L)), ureg.K)
 
     def estimate_band_coefficients(self, sat=None, instr=None, ch=None,
             include_shift=True):
@@ -466,9 +522,207 @@ class SRF(FwmuMixin):
         return xarray.DataArray(self.W, dims=(coordinate,),
             coords={coordinate: getattr(self, coordinate)}, name="SRF")
 
+class ChannelIntegrator:
+    """Integrate spectra over the SRFs of many channels at once
+
+    :meth:`SRF.integrate_radiances` interpolates the SRF onto the
+    frequency grid of the spectrum on every call.  When many spectra on
+    the same frequency grid are integrated over the same channels, this
+    class does the interpolation only once.  It stores the integration
+    weights of all channels in a sparse matrix of shape (n_freq,
+    n_channels), such that integrating a (n_spectra, n_freq) array of
+    spectral radiances is a single sparse-dense matrix product.  The
+    result is the same as with :meth:`SRF.integrate_radiances`.
+
+    >>> srfs = [SRF.fromArtsXML("NOAA15", "hirs", ch) for ch in range(1, 20)]
+    >>> integrator = ChannelIntegrator(srfs, f)
+    >>> L_channels = integrator.integrate(L)  # (n_spectra, 19)
+
+    If L is a pint quantity, so is the result.  If L is a plain ndarray,
+    the units are not checked at all; L must then be given in the
+    spectral radiance units that correspond to frequencies in Hz (e.g.
+    W m^-2 sr^-1 Hz^-1) and the result is a plain ndarray, too.
+    """
+
+    def __init__(self, srfs, f, spectral=True, dtype="f8"):
+        """Build the integration weights.
+
+        :param srfs: Sequence of SRF objects, one per channel.
+        :param ndarray f: Frequencies of the spectra.  Can be either a
+            pure ndarray, which will be assumed to be in Hz, or a ureg
+            quantity.
+        :param bool spectral: If true, the integration returns spectral
+            radiance [W m^-2 sr^-1 Hz^-1], otherwise radiance [W m^-2
+            sr^-1].  See :meth:`SRF.integrate_radiances`.
+        :param dtype: Data type of the weights.  Using "f4" halves the
+            memory and speeds up the integration at the expense of
+            precision.
+        """
+        try:
+            f = f.to("Hz", "sp").m
+        except AttributeError:
+            pass
+        f = numpy.asarray(f, dtype="f8")
+        self.f = f
+        self.spectral = spectral
+        df = numpy.diff(f)
+
+        rows = []
+        columns = []
+        values = []
+        for (i, srf) in enumerate(srfs):
+            srf_f = srf.frequency.to("Hz", "sp").m
+            order = numpy.argsort(srf_f)
+            w_on_L_grid = numpy.interp(
+                f, srf_f[order], numpy.asarray(srf.W)[order],
+                left=0.0, right=0.0)
+            # Same quadrature as in SRF.integrate_radiances
+            w = w_on_L_grid[1:] * df
+            if spectral:
+                w = w / w.sum()
+            nonzero = w.nonzero()[0]
+            rows.append(nonzero + 1)
+            columns.append(numpy.full(nonzero.size, i))
+            values.append(w[nonzero])
+        self.weights = scipy.sparse.csc_matrix(
+            (numpy.concatenate(values).astype(dtype),
+             (numpy.concatenate(rows), numpy.concatenate(columns))),
+            shape=(f.size, len(srfs)))
+        # For the product we need the transposed matrix in CSR format
+        self._weights_T = self.weights.T.tocsr()
+
+    @property
+    def n_channels(self):
+        return self.weights.shape[1]
+
+    def integrate(self, L, chunksize=None, out=None):
+        """Integrate spectra over all channels
+
+        :param ndarray L: Spectral radiances, shape (n_spectra, n_freq)
+            or (n_freq,).  Either a pint quantity or a plain ndarray (see
+            class docstring).  Can also be a memory-mapped array.
+        :param int chunksize: If given, process this many spectra at once
+            to limit the memory needed for temporary arrays.
+        :param ndarray out: Optional output array with shape (n_spectra,
+            n_channels).  Only for plain ndarray input.
+        :returns: Channel (spectral) radiances with shape (n_spectra,
+            n_channels) or (n_channels,).
+        """
+        try:
+            units = L.u
+            L = L.m
+        except AttributeError:
+            units = None
+        L = numpy.asarray(L) if not isinstance(L, numpy.ndarray) else L
+        if L.ndim == 1:
+            result = self.integrate(L[numpy.newaxis, :],
+                chunksize=chunksize,
+                out=None if out is None else out[numpy.newaxis, :])[0]
+        else:
+            if out is None:
+                out = numpy.empty(
+                    shape=(L.shape[0], self.n_channels),
+                    dtype=numpy.result_type(L.dtype, self.weights.dtype))
+            chunksize = chunksize or max(L.shape[0], 1)
+            for start in range(0, L.shape[0], chunksize):
+                chunk = L[start:start+chunksize]
+                out[start:start+chunksize] = (self._weights_T @ chunk.T).T
+            result = out
+        if units is None:
+            return result
+        if self.spectral:
+            return ureg.Quantity(result, units)
+        return ureg.Quantity(result, units * ureg.Hz)
+
+    def integrate_chunks(self, chunks):
+        """Integrate spectra that arrive in chunks
+
+        :param chunks: Iterable of arrays with shape (n, n_freq), e.g.
+            spectra read from many files.
+        :returns: Generator yielding the channel radiances for each chunk.
+        """
+        for chunk in chunks:
+            yield self.integrate(chunk)
+
+
 _specrad_freq = ureg.W / (ureg.m**2 * ureg.sr * ureg.Hz)
 
 
+def _to_specrad_freq(L):
+    """Magnitude of L in W m^-2 sr^-1 Hz^-1
+
+    Only enables the radiance context for units that need it, as this
+    is much slower than a plain conversion.
+    """
+    if L.u == _specrad_freq:
+        return L.m
+    try:
+        return L.to(_specrad_freq).m
+    except pint.DimensionalityError:
+        return L.to(_specrad_freq, "radiance").m
+
+
+class _MonotoneInverse:
+    """Piecewise linear inverse of a monotonically increasing table
+
+    Evaluates y(x) with numpy.interp, a vectorised binary search followed
+    by linear interpolation.  Plateaus in x (such as radiances that underflow
+    to zero at low temperatures) are reduced to their first point so that
+    x is strictly increasing.  Values outside the table are set to left
+    and right, respectively.  Accepts plain arrays, or quantities which
+    are converted to spectral radiance in SI units.
+    """
+
+    def __init__(self, x, y, left, right):
+        x = numpy.asarray(x, dtype="f8")
+        y = numpy.asarray(y, dtype="f8")
+        valid = numpy.isfinite(x) & numpy.isfinite(y)
+        (x, y) = (x[valid], y[valid])
+        keep = numpy.r_[True, numpy.diff(x) > 0]
+        self.x = x[keep]
+        self.y = y[keep]
+        self.left = left
+        self.right = right
+
+    def __call__(self, x):
+        if isinstance(x, ureg.Quantity):
+            x = _to_specrad_freq(x)
+        return numpy.interp(x, self.x, self.y,
+                            left=self.left, right=self.right)
+
+
+# Lookup tables of SRF objects in this process, by SRF._lookup_table_key
+_lookup_tables = {}
+
+
+def channel_radiances2bt(L, srfs):
+    """Convert channel radiances of many channels to brightness temperatures
+
+    :param ndarray L: Channel radiances with shape (..., n_channels).
+        Either a pint quantity compatible with W m^-2 sr^-1 Hz^-1, or a
+        plain ndarray in exactly those units.
+    :param srfs: Sequence of n_channels SRF objects.  Their lookup tables
+        are constructed if needed.
+    :returns: Brightness temperatures with the same shape as L.  A
+        quantity in K if L is a quantity, else a plain ndarray.
+    """
+    is_quantity = isinstance(L, ureg.Quantity)
+    if is_quantity:
+        L = _to_specrad_freq(L)
+    L = numpy.asarray(L)
+    if L.shape[-1] != len(srfs):
+        raise ValueError("Last dimension of L has size {:d}, but got {:d} "
+                         "SRFs".format(L.shape[-1], len(srfs)))
+    T = numpy.empty(L.shape, dtype="f8")
+    for (i, srf) in enumerate(srfs):
+        if srf.lookup_table is None:
+            srf.make_lookup_table()
+        T[..., i] = srf.L_to_T(L[..., i])
+    if is_quantity:
+        return ureg.Quantity(T, ureg.K)
+    return T
+
+
 def planck_f(f, T):
     """Planck law expressed in frequency.
 
@@ -485,8 +739,10 @@ def planck_f(f, T):
         return numexpr.evaluate("(2 * h * f**3) / (c**2) * "
                                 "1 / (exp((h*f)/(k*T)) - 1)") * (
                                     radiance_units["si"])
-    return ((2 * ureg.h * f**3) / (ureg.c ** 2) *
-            1 / (numpy.exp(((ureg.h * f) / (ureg.k * T)).to("1")) - 1)).to(
+    # Newer versions of pint read ureg.h as hour:
+    planck = ureg.planck_constant
+    return ((2 * planck * f**3) / (ureg.c ** 2) *
+            1 / (numpy.exp(((planck * f) / (ureg.k * T)).to("1")) - 1)).to(
                 ureg.W / (ureg.m**2 * ureg.sr * ureg.Hz))
 
 
@@ -10,6 +10,7 @@ from typhon.plots.formatter import *  # noqa
 from typhon.plots.plots import *  # noqa
 from typhon.plots.arts_lookup import *  # noqa
 from typhon.plots.ppath import *  # noqa
+from typhon.plots.raster import *  # noqa
 try:
     from typhon.plots.maps import *  # noqa
 except ImportError:
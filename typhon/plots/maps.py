@@ -10,6 +10,9 @@ except ImportError:
                       'located in `typhon.plots.maps`.')
 else:
     from matplotlib import pyplot as plt
+    import numpy as np
+
+    from typhon.plots.raster import RasterAccumulator
 
 
 __all__ = [
@@ -20,7 +23,7 @@ __all__ = [
 
 def worldmap(lat, lon, var=None, fig=None, ax=None, projection=None,
              bg=False, draw_grid=False, draw_coastlines=False,
-             interpolation=False, **kwargs):
+             interpolation=False, aggregate=None, bins=None, **kwargs):
     """Plots the track of a variable on a worldmap.
 
     Args:
@@ -38,10 +41,17 @@ def worldmap(lat, lon, var=None, fig=None, ax=None, projection=None,
         bg: If true, a background image will be drawn.
         draw_grid:
         draw_coastlines:
+        aggregate: Instead of drawing every point of a track, bin the points
+            with :class:`~typhon.plots.RasterAccumulator` and draw the
+            raster as image. This is much faster for many points. Can be
+            True or a reduction (*count*, *sum*, *mean*, *min* or *max*).
+            True means *mean* if *var* is given and *count* otherwise.
+        bins: Number of bins in longitude and latitude if *aggregate* is
+            used. Default is one bin per pixel of the axes.
         **kwargs:
 
     Returns:
-        Scatter plot objects.
+        Scatter plot objects (or an AxesImage if *aggregate* is used).
     """
     # Default keyword arguments to pass to hist2d().
     kwargs_defaults = {
@@ -76,7 +86,23 @@ def worldmap(lat, lon, var=None, fig=None, ax=None, projection=None,
     # It is counter-intuitive but if we want to plot our data with normal
     # latitudes and longitudes, we always have to set the transform to
     # PlateCarree (see https://github.com/SciTools/cartopy/issues/911)
-    if var is None or len(var.shape) == 1:
+    if aggregate and (var is None or len(var.shape) == 1):
+        if aggregate is True:
+            aggregate = "count" if var is None else "mean"
+        raster = RasterAccumulator(
+            (np.nanmin(lon), np.nanmax(lon)), (np.nanmin(lat), np.nanmax(lat)),
+            bins=bins, ax=ax
+        )
+        raster.add(lon, lat, var)
+        kwargs_defaults = {
+            "cmap": "qualitative1",
+            **kwargs
+        }
+        plot = raster.draw(
+            ax, reduction=aggregate, transform=ccrs.PlateCarree(),
+            **kwargs_defaults
+        )
+    elif var is None or len(var.shape) == 1:
         kwargs_defaults = {
             "cmap": "qualitative1",
             "s": 1,
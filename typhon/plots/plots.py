@@ -11,12 +11,14 @@ import warnings
 
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
 from matplotlib.patches import Rectangle
 from matplotlib.ticker import FuncFormatter
 from matplotlib.cm import get_cmap
 import scipy.stats as stats
 
 from typhon.plots import formatter
+from typhon.plots.raster import RasterAccumulator
 from typhon.math import stats as tpstats
 
 
@@ -160,10 +162,13 @@ def plot_distribution_as_percentiles(ax, x, y,
                 **kwargs)
 
 
-def heatmap(x, y, bins=20, bisectrix=True, ax=None, **kwargs):
+def heatmap(x, y, bins=20, bisectrix=True, ax=None, aggregate=False,
+            **kwargs):
     """Plot a heatmap of two data arrays.
 
-    This function is a simple wrapper for :func:`plt.hist2d`.
+    This function is a simple wrapper for :func:`plt.hist2d`. For many
+    points, use ``aggregate=True`` to bin them with
+    :class:`RasterAccumulator` and draw the result as one image.
 
     Parameters:
         x (np.ndarray): x data.
@@ -183,15 +188,20 @@ def heatmap(x, y, bins=20, bisectrix=True, ax=None, **kwargs):
             - If [array, array], the bin edges in each dimension
               (x_edges, y_edges = bins).
 
-            The default value is 20.
+            The default value is 20. If *aggregate* is True, only the
+            numbers of bins are allowed, and None means one bin per pixel
+            of the axes.
 
         bisectrix (bool): Toggle drawing of the bisectrix.
         ax (AxesSubplot, optional): Axes to plot in.
+        aggregate (bool): If True, use :class:`RasterAccumulator` instead
+            of :func:`matplotlib.pyplot.hist2d`.
         **kwargs: Additional keyword arguments passed to
-            :func:`matplotlib.pyplot.hist2d`.
+            :func:`matplotlib.pyplot.hist2d` (or
+            :meth:`RasterAccumulator.draw` if *aggregate* is True).
 
     Returns:
-        AxesImage.
+        QuadMesh or AxesImage (if *aggregate* is True).
 
     Examples:
 
@@ -224,7 +234,17 @@ def heatmap(x, y, bins=20, bisectrix=True, ax=None, **kwargs):
     kwargs_defaults.update(kwargs)
 
     # Plot the heatmap.
-    N, xedges, yedges, img = ax.hist2d(x, y, bins, **kwargs_defaults)
+    if aggregate:
+        if bins is not None and np.ndim(bins) != 0 and not all(
+                np.ndim(b) == 0 for b in bins):
+            raise ValueError("Bin edges cannot be used with aggregate=True!")
+        raster = RasterAccumulator(
+            (np.nanmin(x), np.nanmax(x)), (np.nanmin(y), np.nanmax(y)),
+            bins=bins, ax=ax)
+        raster.add(x, y)
+        img = raster.draw(ax, **kwargs_defaults)
+    else:
+        N, xedges, yedges, img = ax.hist2d(x, y, bins, **kwargs_defaults)
 
     # Plot the bisectrix.
     if bisectrix:
@@ -291,6 +311,23 @@ def histogram(data, kind=None, ax=None, **kwargs):
         raise ValueError(f"Unknown kind of histogram: {kind}!")
 
 
+def _raster_kw_from_hexbin(hexbin_kw):
+    """Translate hexbin keyword arguments for RasterAccumulator
+
+    Returns:
+        The number of bins and the keyword arguments for
+        :meth:`RasterAccumulator.draw`.
+    """
+    raster_kw = {
+        k: v for (k, v) in hexbin_kw.items()
+        if k in {"mincnt", "cmap", "norm", "vmin", "vmax", "alpha",
+                 "zorder", "rasterized"}}
+    if hexbin_kw.get("bins") == "log" and "norm" not in raster_kw:
+        raster_kw["norm"] = LogNorm(
+            raster_kw.pop("vmin", None), raster_kw.pop("vmax", None))
+    return hexbin_kw.get("gridsize"), raster_kw
+
+
 # Any commits made to this module between 2015-05-01 and 2017-03-01
 # by Gerrit Holl are developed for the EC project “Fidelity and
 # Uncertainty in Climate Data Records from Earth Observations (FIDUCEO)”.
@@ -309,6 +346,7 @@ def scatter_density_plot_matrix(
                       "linewidth": 1.5},
         ranges={},
         units=None,
+        aggregate=False,
         **kwargs):
     """Plot a scatter density plot matrix
 
@@ -324,6 +362,9 @@ def scatter_density_plot_matrix(
 
     Plots regular 1-D histograms in the diagonals.
 
+    For many points, use ``aggregate=True`` to bin them on a rectangular
+    grid with :class:`RasterAccumulator` instead of hexbin.
+
     There are three ways to pass the data:
 
     1. As a structured ndarray.  This is the preferred way.  The
@@ -358,6 +399,14 @@ def scatter_density_plot_matrix(
             quantities.  Optional.  If not passed, no unit is shown in the
             graph, unless the quantities to be plotted are pint quantity
             objects.
+        aggregate (bool): If True, draw the 2-D histograms with
+            :class:`RasterAccumulator`.  *gridsize* and *mincnt* in
+            `hexbin_kw` are then used as number of bins (default: one bin
+            per pixel) and minimum count, and ``bins="log"`` as
+            logarithmic colour scale.  Of the other items, only *cmap*,
+            *norm*, *vmin*, *vmax*, *alpha*, *zorder* and *rasterized* are
+            passed to :meth:`RasterAccumulator.draw`, all hexbin-specific
+            ones are ignored.
 
     If not passing `M`, you can instead pass keyword arguments
     referring to the different fields to be plotted.  In this case,
@@ -462,10 +511,16 @@ def scatter_density_plot_matrix(
                 continue
             x = x[inrange]
             y = y[inrange]
-            # NB: hexbin may be better than hist2d
-            a.hexbin(x, y,
-                     extent=[rng[0][0], rng[0][1], rng[1][0], rng[1][1]],
-                     **hexbin_kw)
+            if aggregate:
+                (bins, raster_kw) = _raster_kw_from_hexbin(hexbin_kw)
+                raster = RasterAccumulator(*rng, bins=bins, ax=a)
+                raster.add(x, y)
+                raster.draw(a, **raster_kw)
+            else:
+                # NB: hexbin may be better than hist2d
+                a.hexbin(x, y,
+                         extent=[rng[0][0], rng[0][1], rng[1][0], rng[1][1]],
+                         **hexbin_kw)
             plot_distribution_as_percentiles(
                 a,
                 x, y,
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+"""Aggregate many points into a raster before plotting them.
+"""
+import numpy as np
+import matplotlib.pyplot as plt
+
+from typhon.geographical import GridAccumulator
+
+
+__all__ = [
+    'RasterAccumulator',
+]
+
+
+class RasterAccumulator:
+    """Bin points into a raster with the resolution of the final plot
+
+    Drawing millions of points with scatter, hist2d or hexbin takes long
+    and needs a lot of memory.  This class bins the points into equally
+    spaced pixels with a :class:`~typhon.geographical.GridAccumulator`,
+    which keeps only the number of points and the mean, minimum and maximum
+    of their values per pixel.  Points can be added from many files one
+    after another, and rasters filled in different processes can be
+    combined with :meth:`merge`.  The result is drawn as a single image
+    with :meth:`draw`.
+
+    If no number of bins is given, the raster gets the size of the axes in
+    pixels, so every pixel on the screen (or in the file) is one bin.
+
+    Examples:
+
+    .. code-block:: python
+
+        import matplotlib.pyplot as plt
+        from typhon.plots import RasterAccumulator
+
+        fig, ax = plt.subplots()
+        raster = RasterAccumulator((-180, 180), (-90, 90), ax=ax)
+        for file in files:
+            data = read(file)
+            raster.add(data["lon"], data["lat"], data["temperature"])
+        raster.draw(ax, reduction="mean", cmap="temperature")
+    """
+
+    reductions = ("count", "sum", "mean", "min", "max")
+
+    def __init__(self, x_range, y_range, bins=None, ax=None):
+        """Initialise an empty raster
+
+        Args:
+            x_range: Tuple with the lower and upper limit of the raster in
+                x direction.
+            y_range: Tuple with the lower and upper limit of the raster in
+                y direction.
+            bins: Number of pixels, either an integer for both directions
+                or a tuple (nx, ny).  If not given, the size of *ax* in
+                pixels is used.
+            ax: Axes the raster will be drawn in.  Only needed if *bins* is
+                not given.  Default is the current axes.
+        """
+        if bins is None:
+            if ax is None:
+                ax = plt.gca()
+            extent = ax.get_window_extent()
+            bins = (max(int(round(extent.width)), 1),
+                    max(int(round(extent.height)), 1))
+        elif np.ndim(bins) == 0:
+            bins = (bins, bins)
+
+        self.x_range = tuple(float(limit) for limit in x_range)
+        self.y_range = tuple(float(limit) for limit in y_range)
+        if (self.x_range[1] <= self.x_range[0]
+                or self.y_range[1] <= self.y_range[0]):
+            raise ValueError("The upper limits of the raster must be greater "
+                             "than the lower limits!")
+
+        # The grid's latitudes are the y and its longitudes the x axis:
+        self._grid = GridAccumulator(
+            np.linspace(*self.y_range, int(bins[1]) + 1),
+            np.linspace(*self.x_range, int(bins[0]) + 1),
+        )
+
+    @property
+    def shape(self):
+        """Shape of the raster (ny, nx)"""
+        return self._grid.shape
+
+    @property
+    def extent(self):
+        """The extent of the raster as (left, right, bottom, top)"""
+        return (*self.x_range, *self.y_range)
+
+    def add(self, x, y, values=None):
+        """Add points to the raster
+
+        Args:
+            x: Array with the x coordinates of the points.
+            y: Array with the y coordinates of the points.
+            values: Array with the values of the points.  Only needed for
+                other reductions than *count*.  Points with NaN values are
+                ignored.
+
+        Returns:
+            None
+        """
+        x = np.asarray(x, dtype=float).ravel()
+        y = np.asarray(y, dtype=float).ravel()
+        if x.size != y.size:
+            raise ValueError("x and y must have the same number of points!")
+        if values is None:
+            values = np.zeros(x.size)
+        else:
+            values = np.asarray(values, dtype=float).ravel()
+            if values.size != x.size:
+                raise ValueError(
+                    "values must have the same number of points as x and y!")
+
+        self._grid.add(y, x, values)
+
+    def merge(self, other):
+        """Combine the points of another raster into this one
+
+        Args:
+            other: A RasterAccumulator object with the same pixels.
+
+        Returns:
+            This object.
+        """
+        if (self.shape != other.shape or self.x_range != other.x_range
+                or self.y_range != other.y_range):
+            raise ValueError("Can only merge rasters with equal pixels!")
+
+        self._grid.merge(other._grid)
+        return self
+
+    def __iadd__(self, other):
+        return self.merge(other)
+
+    def get(self, reduction="count", mincnt=None):
+        """Get the raster of one reduction
+
+        Args:
+            reduction: Either *count*, *sum*, *mean*, *min* or *max*.
+            mincnt: Pixels with fewer points are set to NaN.
+
+        Returns:
+            A 2-dimensional numpy array with the shape (ny, nx). The first
+            row is at the lower y limit.  Pixels without points are 0 for
+            *count* and *sum* and NaN otherwise.
+        """
+        if reduction not in self.reductions:
+            raise ValueError(
+                f"Unknown reduction '{reduction}'! Allowed are: "
+                + ", ".join(self.reductions))
+
+        number = self._grid.get("count")
+        if reduction == "count":
+            raster = number.astype(float)
+        elif reduction == "sum":
+            raster = np.where(number > 0, self._grid.get("mean") * number, 0.)
+        else:
+            raster = self._grid.get(reduction)
+
+        if mincnt is not None:
+            raster[number < mincnt] = np.nan
+        return raster
+
+    def draw(self, ax=None, reduction="count", mincnt=None, **kwargs):
+        """Draw the raster with imshow
+
+        Args:
+            ax: Axes to plot in.  Default is the current axes.
+            reduction: Either *count*, *sum*, *mean*, *min* or *max*.
+            mincnt: Pixels with fewer points are not drawn.
+            **kwargs: Additional keyword arguments passed to
+                :func:`matplotlib.pyplot.imshow`, e.g. *cmap* or
+                *transform* for cartopy axes.
+
+        Returns:
+            AxesImage.
+        """
+        if ax is None:
+            ax = plt.gca()
+
+        kwargs_defaults = {
+            "origin": "lower",
+            "extent": self.extent,
+            "aspect": "auto",
+            "interpolation": "nearest",
+            **kwargs
+        }
+        return ax.imshow(self.get(reduction, mincnt), **kwargs_defaults)
@@ -2,12 +2,15 @@ from ast import literal_eval
 import copy
 from importlib import import_module
 import json
+import warnings
 
 import numpy as np
 import pandas as pd
 from sklearn.pipeline import Pipeline
 from typhon.utils import to_array
 
+from .compiled import CompiledEstimator
+
 __all__ = [
     'RetrievalProduct',
 ]
@@ -29,6 +32,11 @@ class RetrievalProduct:
 
     To save this object to a json file, the additional package json_tricks is
     required.
+
+    For large models, the binary format of :meth:`to_npz` is much smaller
+    and faster to load. After calling :meth:`compile`, :meth:`retrieve_array`
+    evaluates the estimator with a
+    :class:`~typhon.retrieval.compiled.CompiledEstimator`.
     """
 
     def __init__(self, verbose=False):
@@ -45,6 +53,9 @@ class RetrievalProduct:
         self._inputs = []
         self._outputs = []
 
+        # The estimator and its compiled version (see compile):
+        self._compiled = None
+
     @property
     def inputs(self):
         return self._inputs
@@ -70,7 +81,7 @@ class RetrievalProduct:
                     "__shape__": item.shape,
                 }
             else:
-                return np.asscalar(item)
+                return item.item()
 
         def _is_numpy(item):
             return type(item).__module__ == np.__name__
@@ -139,16 +150,66 @@ class RetrievalProduct:
         instance = RetrievalProduct._import_class(
             dictionary["module"], dictionary["class"]
         )
+        # Regression trees have one "class" per output:
+        n_classes = coefs.get(
+            "n_classes_", np.ones(coefs["n_outputs_"], dtype=np.intp)
+        )
+        # scikit-learn 1.2 removed n_features_:
+        n_features = coefs.get("n_features_in_", coefs.get("n_features_"))
         tree = instance(
-            to_array(coefs["n_features_"]),
-            to_array(coefs["n_classes_"]),
+            to_array(n_features),
+            to_array(n_classes),
             to_array(coefs["n_outputs_"])
         )
         tree.__setstate__(dictionary["coefs"])
         return tree
 
     @staticmethod
-    def _model_to_dict(model):
+    def _extract_arrays(obj, arrays, key="parameter"):
+        """Move all numeric arrays of a nested object to a dictionary
+
+        The arrays are replaced by placeholders with their keys in `arrays`.
+        Other numpy objects are converted as by :meth:`_encode_numpy`.
+        """
+        if isinstance(obj, dict):
+            return {
+                name: RetrievalProduct._extract_arrays(
+                    value, arrays, f"{key}/{name}")
+                for name, value in obj.items()
+            }
+        elif isinstance(obj, (list, tuple)):
+            items = [
+                RetrievalProduct._extract_arrays(value, arrays, f"{key}/{i}")
+                for i, value in enumerate(obj)
+            ]
+            return items if isinstance(obj, list) else tuple(items)
+        elif isinstance(obj, np.ndarray) and obj.dtype != object:
+            arrays[key] = obj
+            return {"__npz__": key}
+
+        return RetrievalProduct._encode_numpy([obj])[0]
+
+    @staticmethod
+    def _insert_arrays(obj, arrays):
+        """Replace the placeholders of :meth:`_extract_arrays` by arrays"""
+        if isinstance(obj, dict):
+            if "__npz__" in obj:
+                return arrays[obj["__npz__"]]
+            return {
+                name: RetrievalProduct._insert_arrays(value, arrays)
+                for name, value in obj.items()
+            }
+        elif isinstance(obj, (list, tuple)):
+            items = [
+                RetrievalProduct._insert_arrays(value, arrays)
+                for value in obj
+            ]
+            return items if isinstance(obj, list) else tuple(items)
+
+        return obj
+
+    @staticmethod
+    def _model_to_dict(model, encode=True):
         """Convert a sklearn model object to a dictionary"""
         dictionary = {
             "module": type(model).__module__,
@@ -157,7 +218,7 @@ class RetrievalProduct:
             "coefs": {
                 attr: copy.deepcopy(getattr(model, attr))
                 for attr in model.__dir__()
-                if not attr.startswith("__") and attr.endswith("_")
+                if not attr.startswith("_") and attr.endswith("_")
             }
         }
 
@@ -168,6 +229,8 @@ class RetrievalProduct:
                 dictionary["coefs"]["tree_"]
             )
 
+        if not encode:
+            return dictionary
         return RetrievalProduct._encode_numpy(dictionary)
 
     @staticmethod
@@ -192,14 +255,14 @@ class RetrievalProduct:
         return model
 
     @staticmethod
-    def _pipeline_to_dict(pipeline):
+    def _pipeline_to_dict(pipeline, encode=True):
         """Convert a pipeline object to a dictionary"""
         if pipeline is None:
             raise ValueError("No object trained!")
 
         all_steps = {}
         for name, model in pipeline.steps:
-            all_steps[name] = RetrievalProduct._model_to_dict(model)
+            all_steps[name] = RetrievalProduct._model_to_dict(model, encode)
         return all_steps
 
     @staticmethod
@@ -247,14 +310,24 @@ class RetrievalProduct:
         self._outputs = parameter["outputs"]
         return self
 
-    def to_dict(self):
-        """Dump this retrieval product to a dictionary"""
+    def to_dict(self, encode=True):
+        """Dump this retrieval product to a dictionary
+
+        Args:
+            encode: If true (default), numpy arrays are converted to lists
+                so that the dictionary can be written as text.
+
+        Returns:
+            A dictionary with the training parameters.
+        """
         parameter = {}
         if isinstance(self.estimator, Pipeline):
-            parameter["estimator"] = self._pipeline_to_dict(self.estimator)
+            parameter["estimator"] = self._pipeline_to_dict(
+                self.estimator, encode)
             parameter["estimator_is_pipeline"] = True
         else:
-            parameter["estimator"] = self._model_to_dict(self.estimator)
+            parameter["estimator"] = self._model_to_dict(
+                self.estimator, encode)
             parameter["estimator_is_pipeline"] = False
 
         parameter["inputs"] = self.inputs
@@ -304,6 +377,44 @@ class RetrievalProduct:
         with open(filename, 'w') as outfile:
             outfile.write(repr(self.to_dict()))
 
+    @classmethod
+    def from_npz(cls, filename, *args, **kwargs):
+        """Load a retrieval product from a npz file
+
+        Args:
+            filename: The name of the file written by :meth:`to_npz`.
+            *args: Positional arguments allowed for :meth:`__init__`.
+            **kwargs Keyword arguments allowed for :meth:`__init__`.
+
+        Returns:
+            A new :class:`RetrievalProduct` object.
+        """
+
+        with np.load(filename, allow_pickle=False) as arrays:
+            parameter = literal_eval(str(arrays["__parameter__"]))
+            parameter = cls._insert_arrays(parameter, arrays)
+        return cls.from_dict(parameter, *args, **kwargs)
+
+    def to_npz(self, filename):
+        """Save this retrieval product to a binary npz file
+
+        All coefficient arrays are stored as binary arrays in the npz file.
+        Everything else (e.g. the parameters of the estimator and the names
+        of the input and output fields) is stored as text in the array
+        *__parameter__* with the same format as in :meth:`to_txt`.
+
+        Args:
+            filename: The name of the file where to store the training
+                parameters.
+
+        Returns:
+            None
+        """
+
+        arrays = {}
+        parameter = self._extract_arrays(self.to_dict(encode=False), arrays)
+        np.savez(filename, __parameter__=repr(parameter), **arrays)
+
     def retrieve(self, inputs):
         """Predict the target values for data coming from arrays
 
@@ -333,6 +444,54 @@ class RetrievalProduct:
 
         return pd.DataFrame(data=output_data, columns=self.outputs)
 
+    def retrieve_array(self, inputs):
+        """Predict the target values for data in a 2-dimensional array
+
+        In contrast to :meth:`retrieve`, this creates no pandas.DataFrame.
+
+        Args:
+            inputs: A 2-dimensional array with the shape (n, len(inputs)). The
+                columns must be in the same order as :attr:`inputs`.
+
+        Returns:
+            A numpy array with the retrieved data.
+        """
+
+        if self.estimator is None:
+            raise NotTrainedError()
+
+        if inputs.shape[1] != len(self.inputs):
+            raise ValueError(
+                f"Expected {len(self.inputs)} input columns, got "
+                f"{inputs.shape[1]}!")
+
+        if self._compiled is not None \
+                and self._compiled[0] is self.estimator:
+            return self._compiled[1].predict(inputs)
+
+        with warnings.catch_warnings():
+            # Estimators trained with DataFrames complain about the missing
+            # feature names:
+            warnings.filterwarnings("ignore", message=".*feature names")
+            return np.asarray(self.estimator.predict(inputs))
+
+    def compile(self):
+        """Compile the estimator for faster retrievals
+
+        After this, :meth:`retrieve_array` evaluates the estimator with a
+        :class:`~typhon.retrieval.compiled.CompiledEstimator` in single
+        precision instead of with scikit-learn. Must be called again after
+        changing the estimator.
+
+        Returns:
+            The :class:`~typhon.retrieval.compiled.CompiledEstimator`.
+        """
+        if self.estimator is None:
+            raise NotTrainedError()
+
+        self._compiled = self.estimator, CompiledEstimator(self.estimator)
+        return self._compiled[1]
+
     def score(self, inputs, targets):
         """
 
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+
+"""Fast inference for trained scikit-learn estimators
+
+:class:`CompiledEstimator` takes the coefficients of a trained estimator
+and evaluates it with numpy and numba in single precision. It needs no
+scikit-learn after it has been created and is much faster for large
+batches since it skips the input validation and the conversions of
+scikit-learn.
+
+Supported are :class:`~sklearn.pipeline.Pipeline` objects of any number of
+:class:`~sklearn.preprocessing.StandardScaler`,
+:class:`~sklearn.preprocessing.RobustScaler` or
+:class:`~sklearn.preprocessing.MinMaxScaler` steps followed by a
+:class:`~sklearn.neural_network.MLPRegressor`,
+:class:`~sklearn.neural_network.MLPClassifier`,
+:class:`~sklearn.tree.DecisionTreeRegressor` or
+:class:`~sklearn.tree.DecisionTreeClassifier`, or these estimators alone.
+
+Examples:
+
+    .. code-block:: python
+
+        from typhon.retrieval.compiled import CompiledEstimator
+
+        compiled = CompiledEstimator(pipeline)
+        predictions = compiled.predict(inputs)
+"""
+import numba
+import numpy as np
+
+__all__ = [
+    'CompiledEstimator',
+]
+
+
+def _identity(x):
+    return x
+
+
+def _logistic(x):
+    # Same as scipy.special.expit but in place:
+    np.negative(x, out=x)
+    np.exp(x, out=x)
+    x += 1
+    np.reciprocal(x, out=x)
+    return x
+
+
+def _tanh(x):
+    return np.tanh(x, out=x)
+
+
+def _relu(x):
+    return np.maximum(x, 0, out=x)
+
+
+def _softmax(x):
+    x -= x.max(axis=1)[:, np.newaxis]
+    np.exp(x, out=x)
+    x /= x.sum(axis=1)[:, np.newaxis]
+    return x
+
+
+_ACTIVATIONS = {
+    "identity": _identity,
+    "logistic": _logistic,
+    "tanh": _tanh,
+    "relu": _relu,
+    "softmax": _softmax,
+}
+
+
+@numba.njit
+def _apply_tree(inputs, left, right, feature, threshold, leaves):
+    """Find the leaf of each sample in a decision tree
+
+    As in scikit-learn, the inputs are float32 and are compared with the
+    float64 thresholds.
+    """
+    for i in range(inputs.shape[0]):
+        node = 0
+        while left[node] != -1:
+            if inputs[i, feature[node]] <= threshold[node]:
+                node = left[node]
+            else:
+                node = right[node]
+        leaves[i] = node
+
+
+class CompiledEstimator:
+    """Evaluate a trained scikit-learn estimator with numpy and numba
+
+    All scalers are combined into one multiplication and addition per
+    input. The multi-layer perceptrons are evaluated with float32 matrix
+    products. The decision trees are traversed by a compiled kernel which
+    compares the inputs exactly as scikit-learn does, so they yield the
+    same predictions. The predictions of the perceptrons differ only by the
+    rounding errors of the single precision.
+    """
+
+    def __init__(self, estimator):
+        """Extract the coefficients of a trained estimator
+
+        Args:
+            estimator: A trained scikit-learn estimator or pipeline (see
+                above for the supported ones).
+        """
+        steps = [estimator]
+        if hasattr(estimator, "steps"):
+            steps = [step for _, step in estimator.steps]
+
+        self._scalers = [
+            self._scaler_coefficients(scaler) for scaler in steps[:-1]
+        ]
+
+        model = steps[-1]
+        self.classes = getattr(model, "classes_", None)
+        if hasattr(model, "coefs_"):
+            self.kind = "mlp"
+            self._weights = [w.astype("f4") for w in model.coefs_]
+            self._biases = [b.astype("f4") for b in model.intercepts_]
+            self._activation = model.activation
+            self._out_activation = model.out_activation_
+        elif hasattr(model, "tree_"):
+            self.kind = "tree"
+            tree = model.tree_
+            self._left = tree.children_left
+            self._right = tree.children_right
+            self._feature = tree.feature
+            self._threshold = tree.threshold
+            # (nodes, outputs, classes or 1):
+            self._values = tree.value
+        else:
+            raise ValueError(
+                f"Cannot compile a {type(model).__name__} estimator!")
+
+        # For the perceptrons, all scalers together become one float32
+        # multiplication and addition. The trees compare the scaled inputs
+        # with their thresholds, so they are scaled step by step exactly as
+        # by scikit-learn:
+        if self.kind == "mlp" and self._scalers:
+            scale, offset = 1., 0.
+            for subtract, divide, multiply, add in self._scalers:
+                scale = scale / divide * multiply
+                offset = (offset - subtract) / divide * multiply + add
+            self._scalers = [(
+                0., 1., np.asarray(scale, dtype="f4"),
+                np.asarray(offset, dtype="f4")
+            )]
+
+    @staticmethod
+    def _scaler_coefficients(scaler):
+        """Return the coefficients of x' = (x - a) / b * c + d"""
+        name = type(scaler).__name__
+        if name == "StandardScaler":
+            # The scalers keep mean_ even if they do not subtract it:
+            center = scaler.mean_ if scaler.with_mean else None
+            scale = scaler.scale_ if scaler.with_std else None
+        elif name == "RobustScaler":
+            center = scaler.center_ if scaler.with_centering else None
+            scale = scaler.scale_ if scaler.with_scaling else None
+        elif name == "MinMaxScaler":
+            return 0., 1., scaler.scale_, scaler.min_
+        else:
+            raise ValueError(f"Cannot compile a {name} step!")
+
+        return (
+            0. if center is None else center,
+            1. if scale is None else scale,
+            1., 0.
+        )
+
+    def predict(self, inputs):
+        """Predict the target values
+
+        Args:
+            inputs: A 2-dimensional array with the shape (samples, inputs).
+
+        Returns:
+            A numpy array with the predictions. Its shape is (samples,) for
+            estimators with one output and (samples, outputs) otherwise.
+        """
+        inputs = np.asarray(inputs)
+        if self._scalers:
+            # Scale a copy in place as scikit-learn does, i.e. float32 inputs
+            # are rounded to float32 after each step:
+            inputs = inputs.astype(np.result_type(inputs.dtype, "f4"))
+            for subtract, divide, multiply, add in self._scalers:
+                # Skip the steps with the default coefficients:
+                if isinstance(subtract, np.ndarray):
+                    inputs -= subtract
+                if isinstance(divide, np.ndarray):
+                    inputs /= divide
+                if isinstance(multiply, np.ndarray):
+                    inputs *= multiply
+                if isinstance(add, np.ndarray):
+                    inputs += add
+
+        if self.kind == "mlp":
+            return self._predict_mlp(inputs)
+        return self._predict_tree(inputs)
+
+    def _predict_mlp(self, inputs):
+        activation = inputs.astype("f4", copy=False)
+        hidden = _ACTIVATIONS[self._activation]
+        for i, (weights, bias) in enumerate(
+                zip(self._weights, self._biases)):
+            activation = activation @ weights
+            activation += bias
+            if i < len(self._weights) - 1:
+                activation = hidden(activation)
+        activation = _ACTIVATIONS[self._out_activation](activation)
+
+        if self.classes is None:
+            return activation[:, 0] if activation.shape[1] == 1 \
+                else activation
+
+        # As in MLPClassifier.predict:
+        if self._out_activation == "softmax":
+            return self.classes[activation.argmax(axis=1)]
+        elif activation.shape[1] == 1:
+            return self.classes[(activation[:, 0] > 0.5).astype(int)]
+        # Multi-label classification:
+        return (activation > 0.5).astype(int)
+
+    def _predict_tree(self, inputs):
+        inputs = np.ascontiguousarray(inputs, dtype="f4")
+        leaves = np.empty(inputs.shape[0], dtype=np.intp)
+        _apply_tree(
+            inputs, self._left, self._right, self._feature, self._threshold,
+            leaves
+        )
+        values = self._values[leaves]
+
+        if self.classes is None:
+            return values[:, 0, 0] if values.shape[1] == 1 \
+                else values[:, :, 0]
+
+        if values.shape[1] == 1:
+            return self.classes[values[:, 0].argmax(axis=1)]
+        return np.stack([
+            classes[values[:, output].argmax(axis=1)]
+            for output, classes in enumerate(self.classes)
+        ], axis=1)
@@ -10,5 +10,6 @@ simplifies the setup of random walk jump functions as well as diagnostic
 function to assess mixing and convergence of the simulations.
 """
 from typhon.retrieval.mcmc.mcmc import MCMC, r_factor, autocorrelation, \
-                                        split, effective_sample_size
+                                        split, effective_sample_size, \
+                                        split_r_factor, OnlineDiagnostics
 from typhon.retrieval.mcmc.jumping_rules import RandomWalk
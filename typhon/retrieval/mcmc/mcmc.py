@@ -14,6 +14,117 @@ References
 import numpy as np
 
 
+def _as_chains(stats):
+    """
+    Converts MCMC sequences to a float array of shape (m, n, p).
+
+    Args:
+        stats: A list of m sequences of length n, or an array of shape
+            (m, n) or (m, n, p) with m chains of n samples of p parameters.
+
+    Returns:
+        A tuple of the (m, n, p) array and a flag telling whether the input
+        had no parameter dimension.
+    """
+    chains = np.asarray(stats, dtype=np.float64)
+    if chains.ndim == 2:
+        return chains[:, :, np.newaxis], True
+    if chains.ndim != 3:
+        raise ValueError("Expected a list of sequences or an array of shape "
+                         "(m_chains, n_samples[, n_params]).")
+    return chains, False
+
+def _squeeze(result, scalar):
+    """
+    Removes the parameter dimension again if the input did not have one.
+    """
+    if scalar:
+        return result[..., 0]
+    return result
+
+def _pooled_variance(n, means, vars):
+    """
+    Computes the within-sequence variance w and the estimate var_p of the
+    marginal posterior variance, formulas (11.2) and (11.3) in [1].
+
+    Args:
+        n: Number of samples per sequence.
+        means: Array of shape (m, p) with the means of the sequences.
+        vars: Array of shape (m, p) with the unbiased variances of the
+            sequences.
+    """
+    b = n * np.var(means, axis=0, ddof=1)
+    w = np.mean(vars, axis=0)
+    var_p = (n - 1) / n * w + b / n
+    return w, var_p
+
+def _variograms(chains, max_lag):
+    """
+    Computes the sums of squared differences for lags 0 to `max_lag - 1`.
+
+    The lagged products of all lags are computed at once via FFT, so this is
+    O(n log n) per sequence and parameter.
+
+    Args:
+        chains: Array of shape (m, n, p).
+        max_lag: Number of lags.
+
+    Returns:
+        Array of shape (max_lag, p) whose element t is the sum over all
+        sequences of sum_i (s[i + t] - s[i])**2.
+    """
+    m, n, p = chains.shape
+    # The differences do not depend on the mean, but the lagged products
+    # are numerically more accurate without it.
+    x = chains - chains.mean(axis=1, keepdims=True)
+    n_fft = 2 ** int(np.ceil(np.log2(2 * n)))
+    f = np.fft.rfft(x, n=n_fft, axis=1)
+    lagged = np.fft.irfft(f * np.conj(f), n=n_fft, axis=1)[:, :max_lag]
+
+    # sum_{i < n - t} s[i]**2 + sum_{i >= t} s[i]**2
+    squares = np.cumsum(x ** 2, axis=1)
+    total = squares[:, -1:]
+    lags = np.arange(max_lag)
+    head = squares[:, n - 1 - lags]
+    tail = total - np.concatenate(
+        [np.zeros((m, 1, p)), squares[:, lags[1:] - 1]], axis=1)
+    sums = (head + tail - 2.0 * lagged).sum(axis=0)
+    return np.maximum(sums, 0.0)
+
+def _autocorrelation(chains):
+    """
+    Autocorrelation of an (m, n, p) array for lags [0, n // 2), shape
+    (n // 2, p).
+    """
+    m, n, _ = chains.shape
+    _, var_p = _pooled_variance(n, chains.mean(axis=1),
+                                chains.var(axis=1, ddof=1))
+    lags = np.arange(n // 2)
+    vt = _variograms(chains, n // 2) / (m * (n - lags))[:, np.newaxis]
+    return 1.0 - 0.5 * vt / var_p
+
+def _effective_sample_size(rho, m, n):
+    """
+    Effective sample size (11.8) in [1] from autocorrelations `rho` of shape
+    (n_lags, p).
+
+    The sum runs from lag 1 up to the first odd lag T for which
+    rho[T + 1] + rho[T + 2] is negative, or over all lags if there is no
+    such T.
+    """
+    if rho.shape[0] < 2:
+        return np.full(rho.shape[1], float(m * n))
+    # Lag T = 2k - 1 is tested with the pair (2k, 2k + 1), k = 1, 2, ...
+    n_pairs = (rho.shape[0] - 2) // 2
+    pairs = rho[2:2 + 2 * n_pairs:2] + rho[3:3 + 2 * n_pairs:2]
+    negative = pairs < 0.0
+    last_lag = np.where(negative.any(axis=0),
+                        2 * negative.argmax(axis=0) + 1,
+                        rho.shape[0] - 1)
+    cumulative = np.cumsum(rho, axis=0) - rho[0]
+    rho_sum = cumulative[last_lag, np.arange(rho.shape[1])]
+    return m * n / (1.0 + 2.0 * rho_sum)
+
 def r_factor(stats):
     """
     This computes the R-factor as defined in 'Bayesian Data Analysis'
@@ -22,20 +133,28 @@ def r_factor(stats):
 
     Args:
         stats: A list of arrays of statistics (scalar summaries) computed from
-            serveral MCMC runs.
-    """
-    n = stats[0].size
-    m = len(stats)
+            serveral MCMC runs, or an array of shape (m, n) or (m, n, p) of m
+            runs with n samples of p statistics each.
 
-    vars  = np.array([np.var(s) for s in stats])
-    means = np.array([np.mean(s) for s in stats])
-    mean  = np.mean(means)
+    Returns:
+        The R-factor, or an array of shape (p,) with the R-factor of each
+        statistic.
+    """
+    chains, scalar = _as_chains(stats)
+    n = chains.shape[1]
+    w, var_p = _pooled_variance(n, chains.mean(axis=1),
+                                chains.var(axis=1, ddof=1))
+    return _squeeze(np.sqrt(var_p / w), scalar)
 
-    b = n * np.var(means)
-    w = np.mean(vars)
+def split_r_factor(stats):
+    """
+    This computes the R-factor of the sequences split in halves, which also
+    detects sequences that have not reached stationarity.
 
-    var_p = (n - 1) / n * w + b / n
-    return np.sqrt(var_p / w)
+    Args:
+        stats: See :func:`r_factor`.
+    """
+    return r_factor(split(stats))
 
 def variogram(stats, t):
     """
@@ -44,11 +163,13 @@ def variogram(stats, t):
     each sequence.
 
     Args:
-        stats: A list of sequences
+        stats: A list of sequences or an array of shape (m, n) or (m, n, p).
+        t: The lag.
     """
-    m = len(stats)
-    n = stats[0].size
-    return sum([np.sum((s[t+1:] - s[:n-t-1])**2) for s in stats]) / (m * (n - t))
+    chains, scalar = _as_chains(stats)
+    m, n, _ = chains.shape
+    vt = ((chains[:, t:] - chains[:, :n - t]) ** 2).sum(axis=(0, 1))
+    return _squeeze(vt / (m * (n - t)), scalar)
 
 def split(stats):
     """
@@ -58,8 +179,13 @@ def split(stats):
     able to properly diagnose mixing.
 
     Args:
-        stats: A list of sequences
+        stats: A list of sequences, or an array of shape (m, n) or (m, n, p)
+            which is split into an array of shape (2 * m, n // 2, ...).
     """
+    if isinstance(stats, np.ndarray):
+        half = stats.shape[1] // 2
+        return np.concatenate(
+            [stats[:, :half], stats[:, half:2 * half]], axis=0)
     n = stats[0].size
     return [s[i * (n // 2) : (i + 1) * (n // 2)]
             for i in range(2) for s in stats]
@@ -68,49 +194,131 @@ def autocorrelation(stats):
     """
     Estimates the autocorrelation of a list of sequences from a MCMC run.
     This uses formula (11.7) in [1] to approximate the autocorrelation function
-    for lags [0, n // 2].
-    """
-    n = stats[0].size
-    m = len(stats)
+    for lags [0, n // 2).
 
-    vars  = np.array([np.var(s) for s in stats])
-    means = np.array([np.mean(s) for s in stats])
-    mean  = np.mean(means)
-    b = n * np.var(means)
-    w = np.mean(vars)
-    var_p = (n - 1) / n * w + b / n
+    The variograms of all lags are computed via FFT.
 
-    rho_tp1 = 0.0
-    rho_tp2 = 0.0
-    rho = np.zeros(n // 2)
-    for t in range(n // 2):
-        vt     = variogram(stats, t)
-        rho[t] = 1.0 - 0.5 * vt / var_p
-    return rho
+    Args:
+        stats: A list of sequences or an array of shape (m, n) or (m, n, p).
+
+    Returns:
+        An array of shape (n // 2,) or, for (m, n, p) input, (n // 2, p).
+    """
+    chains, scalar = _as_chains(stats)
+    return _squeeze(_autocorrelation(chains), scalar)
 
 def effective_sample_size(stats):
     """
     This estimates the effective sample size of independent samples from the
     posterior distribution using formula (11.8) in [1].
+
+    Args:
+        stats: A list of sequences or an array of shape (m, n) or (m, n, p).
+
+    Returns:
+        The effective sample size, or an array of shape (p,) for (m, n, p)
+        input.
     """
-    n = stats[0].size
-    m = len(stats)
+    chains, scalar = _as_chains(stats)
+    m, n, _ = chains.shape
+    rho = _autocorrelation(chains)
+    return _squeeze(_effective_sample_size(rho, m, n), scalar)
 
-    vars  = np.array([np.var(s) for s in stats])
-    means = np.array([np.mean(s) for s in stats])
-    mean  = np.mean(means)
-    b = n * np.var(means)
-    w = np.mean(vars)
-    var_p = (n - 1) / n * w + b / n
+class OnlineDiagnostics:
+    """
+    Convergence diagnostics that are updated while the MCMC runs.
+
+    Samples are added in chunks with :meth:`update`. Means and variances of
+    the sequences are updated with the parallel algorithm of Chan et al.,
+    the variograms by adding the squared differences of all new pairs of
+    samples up to lag `max_lag`. Only the last `max_lag` samples of each
+    sequence are kept, so memory does not grow with the length of the run.
+    The diagnostics agree with :func:`r_factor`,
+    :func:`autocorrelation` and :func:`effective_sample_size` on all
+    samples added so far, with the autocorrelation truncated at `max_lag`.
+    """
+    def __init__(self, max_lag=1000):
+        """
+        Args:
+            max_lag: Number of lags of the autocorrelation function that
+                are tracked.
+        """
+        self.max_lag = max_lag
+        self.n = 0
+        self._means = None
+        self._m2 = None
+        self._tail = None
+        self._variograms = None
+
+    def update(self, samples):
+        """
+        Adds new samples to all sequences.
 
-    rho = np.zeros(n // 2)
-    for t in range(n // 2):
-        vt     = variogram(stats, t)
-        rho[t] = 1.0 - 0.5 * vt / var_p
-        if t > 2 and (rho[t-1] + rho[t-2]) < 0.0:
-            break
+        Args:
+            samples: Array of shape (m, k) or (m, k, p) with the next k
+                samples of each of the m sequences.
+        """
+        chunk, _ = _as_chains(samples)
+        m, k, p = chunk.shape
+        if k == 0:
+            return
+        if self._means is None:
+            self._means = np.zeros((m, p))
+            self._m2 = np.zeros((m, p))
+            self._tail = np.zeros((m, 0, p))
+            self._variograms = np.zeros((self.max_lag, p))
+
+        means = chunk.mean(axis=1)
+        m2 = ((chunk - means[:, np.newaxis]) ** 2).sum(axis=1)
+        n = self.n + k
+        delta = means - self._means
+        self._m2 += m2 + delta ** 2 * self.n * k / n
+        self._means += delta * k / n
+
+        # Differences of lag t whose later sample is in the new chunk.
+        joined = np.concatenate([self._tail, chunk], axis=1)
+        offset = self._tail.shape[1]
+        for t in range(1, min(self.max_lag, joined.shape[1])):
+            start = max(offset, t)
+            diffs = joined[:, start:] - joined[:, start - t:-t]
+            self._variograms[t] += (diffs ** 2).sum(axis=(0, 1))
+
+        self._tail = joined[:, -self.max_lag:]
+        self.n = n
+
+    def _check(self):
+        if self.n < 2:
+            raise ValueError("At least two samples per sequence are needed.")
+
+    def r_factor(self):
+        """
+        The R-factor of all samples added so far, see :func:`r_factor`.
+        """
+        self._check()
+        w, var_p = _pooled_variance(self.n, self._means,
+                                    self._m2 / (self.n - 1))
+        return np.sqrt(var_p / w)
 
-    return m * n / (1.0 + 2.0 * sum(rho[:t-2]))
+    def autocorrelation(self):
+        """
+        The autocorrelation for lags [0, min(n // 2, max_lag)), see
+        :func:`autocorrelation`.
+        """
+        self._check()
+        m = self._means.shape[0]
+        n_lags = min(self.n // 2, self.max_lag)
+        _, var_p = _pooled_variance(self.n, self._means,
+                                    self._m2 / (self.n - 1))
+        lags = np.arange(n_lags)
+        vt = self._variograms[:n_lags] / (m * (self.n - lags))[:, np.newaxis]
+        return 1.0 - 0.5 * vt / var_p
+
+    def effective_sample_size(self):
+        """
+        The effective sample size, see :func:`effective_sample_size`.
+        """
+        rho = self.autocorrelation()
+        return _effective_sample_size(rho, self._means.shape[0], self.n)
 
 class MCMC:
     """
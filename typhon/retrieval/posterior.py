@@ -0,0 +1,360 @@
+r"""
+Operations on the posterior distributions given by predicted quantiles.
+
+The functions in this module take the quantiles predicted by a quantile
+regression (e.g. by :class:`~typhon.retrieval.qrnn.QRNN`) as an array of
+shape `(n, k)` with one row of `k` quantiles for each of the `n` retrievals
+and handle all retrievals at once. They do not depend on the method that
+predicted the quantiles.
+
+As in the QRNN, the posterior CDF of each retrieval is approximated by a
+piecewise linear function through the predicted quantiles
+:math:`y_{\tau_1}, \ldots, y_{\tau_k}` and the two additional nodes
+
+.. math::
+    y_{0} = 2 y_{\tau_1} - y_{\tau_2} \qquad
+    y_{1} = 2 y_{\tau_k} - y_{\tau_{k - 1}}
+
+at which the CDF is 0 and 1, respectively. The predicted quantiles of each
+retrieval must be sorted in ascending order.
+
+Examples:
+
+    .. code-block:: python
+
+        from typhon.retrieval import posterior
+
+        y_pred = qrnn.predict(x)
+        mean = posterior.posterior_mean(y_pred, qrnn.quantiles)
+        lower, upper = posterior.credible_interval(
+            y_pred, qrnn.quantiles, 0.9)
+        samples = posterior.sample_posterior(
+            y_pred, qrnn.quantiles, n_samples=100)
+"""
+import numpy as np
+
+__all__ = [
+    'cdf',
+    'evaluate_cdf',
+    'pdf',
+    'posterior_quantiles',
+    'sample_posterior',
+    'posterior_mean',
+    'credible_interval',
+    'crps',
+]
+
+
+def _check_quantiles(y_pred, taus):
+    y_pred = np.asarray(y_pred)
+    taus = np.asarray(taus, dtype=float).ravel()
+    if taus.size < 2:
+        raise ValueError("At least two quantiles are required!")
+    if y_pred.shape[-1] != taus.size:
+        raise ValueError(
+            f"The last dimension of y_pred ({y_pred.shape[-1]}) must have the "
+            f"same length as taus ({taus.size})!")
+    return y_pred, taus
+
+
+def cdf(y_pred, taus):
+    r"""
+    The nodes of the piecewise linear posterior CDFs.
+
+    Arguments:
+
+        y_pred(numpy.array): Array of shape `(n, k)` containing the `k`
+                             predicted quantiles for each of the `n`
+                             retrievals.
+
+        taus(numpy.array): 1D array containing the `k` quantile fractions
+                           :math:`\tau` that correspond to the columns in
+                           `y_pred`.
+
+    Returns:
+
+        Tuple (ys, fs) containing the :math:`y`-values of the nodes in `ys`
+        with the shape `(n, k + 2)` and the values of the CDF :math:`F(y)`
+        at the nodes in `fs` with the shape `(k + 2,)`.
+    """
+    y_pred, taus = _check_quantiles(y_pred, taus)
+
+    ys = np.concatenate([
+        2.0 * y_pred[..., :1] - y_pred[..., 1:2],
+        y_pred,
+        2.0 * y_pred[..., -1:] - y_pred[..., -2:-1],
+    ], axis=-1)
+    fs = np.concatenate([[0.0], taus, [1.0]])
+    return ys, fs
+
+
+def evaluate_cdf(y_pred, taus, y):
+    r"""
+    Evaluate the posterior CDFs at given values.
+
+    Arguments:
+
+        y_pred(numpy.array): Array of shape `(n, k)` containing the `k`
+                             predicted quantiles for each of the `n`
+                             retrievals.
+
+        taus(numpy.array): 1D array containing the `k` quantile fractions
+                           :math:`\tau` that correspond to the columns in
+                           `y_pred`.
+
+        y(numpy.array): Array of shape `(n,)` or `(n, m)` containing one or
+                        `m` values for each retrieval.
+
+    Returns:
+
+        Array with the shape of `y` containing the values of the posterior
+        CDFs. They are 0 below the first node and 1 above the last node.
+    """
+    ys, fs = cdf(y_pred, taus)
+    y = np.asarray(y)
+    single = y.ndim == ys.ndim - 1
+    if single:
+        y = y[..., np.newaxis]
+
+    # The number of nodes below each value. The nodes are compared one after
+    # another so that no array of shape (n, m, k + 2) is needed:
+    below = np.zeros(np.broadcast(ys[..., :1], y).shape, dtype=np.intp)
+    for i in range(fs.size):
+        below += ys[..., i:i+1] <= y
+    segment = np.clip(below - 1, 0, fs.size - 2)
+
+    y0 = np.take_along_axis(ys, segment, axis=-1)
+    y1 = np.take_along_axis(ys, segment + 1, axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight = np.where(y1 > y0, (y - y0) / (y1 - y0), 1.0)
+    f = fs[segment] + weight * (fs[segment + 1] - fs[segment])
+    f = np.clip(f, 0.0, 1.0)
+
+    return f[..., 0] if single else f
+
+
+def pdf(y_pred, taus):
+    r"""
+    The posterior PDFs as derivatives of the piecewise linear CDFs.
+
+    Arguments:
+
+        y_pred(numpy.array): Array of shape `(n, k)` containing the `k`
+                             predicted quantiles for each of the `n`
+                             retrievals.
+
+        taus(numpy.array): 1D array containing the `k` quantile fractions
+                           :math:`\tau` that correspond to the columns in
+                           `y_pred`.
+
+    Returns:
+
+        Tuple (ys, ps) of two arrays with the shape `(n, k + 1)`. `ys`
+        contains the centers between the predicted quantiles and the
+        extrapolated boundaries of the PDFs, and `ps` the values of the PDFs
+        at these points. The PDFs are zero at the boundaries.
+    """
+    y_pred, taus = _check_quantiles(y_pred, taus)
+
+    ys = np.concatenate([
+        2.0 * y_pred[..., :1] - y_pred[..., 1:2],
+        0.5 * (y_pred[..., 1:] + y_pred[..., :-1]),
+        2.0 * y_pred[..., -1:] - y_pred[..., -2:-1],
+    ], axis=-1)
+
+    ps = np.zeros(ys.shape)
+    ps[..., 1:-1] = np.diff(taus) / np.diff(y_pred, axis=-1)
+    return ys, ps
+
+
+def posterior_quantiles(y_pred, taus, probabilities):
+    r"""
+    Evaluate the inverse of the posterior CDFs.
+
+    Arguments:
+
+        y_pred(numpy.array): Array of shape `(n, k)` containing the `k`
+                             predicted quantiles for each of the `n`
+                             retrievals.
+
+        taus(numpy.array): 1D array containing the `k` quantile fractions
+                           :math:`\tau` that correspond to the columns in
+                           `y_pred`.
+
+        probabilities(numpy.array): Array of shape `(m,)` with `m`
+                                    probabilities for all retrievals or of
+                                    shape `(n, m)` with own probabilities for
+                                    each retrieval. All must be within
+                                    [0, 1].
+
+    Returns:
+
+        Array of shape `(n, m)` containing the quantiles of the posterior
+        distributions.
+    """
+    ys, fs = cdf(y_pred, taus)
+    probabilities = np.asarray(probabilities, dtype=float)
+    shape = np.broadcast(ys[..., :1], probabilities).shape
+
+    # All CDFs have their nodes at the same probabilities, so the segments
+    # can be found with one search:
+    segment = np.clip(
+        np.searchsorted(fs, probabilities, side="right") - 1,
+        0, fs.size - 2
+    )
+    segment = np.broadcast_to(segment, shape)
+    probabilities = np.broadcast_to(probabilities, shape)
+
+    y0 = np.take_along_axis(ys, segment, axis=-1)
+    y1 = np.take_along_axis(ys, segment + 1, axis=-1)
+    weight = (probabilities - fs[segment]) / (fs[segment + 1] - fs[segment])
+    return y0 + weight * (y1 - y0)
+
+
+def sample_posterior(y_pred, taus, n_samples=1, random_state=None):
+    r"""
+    Draw samples from the posterior distributions.
+
+    The samples are generated with the inverse CDF method.
+
+    Arguments:
+
+        y_pred(numpy.array): Array of shape `(n, k)` containing the `k`
+                             predicted quantiles for each of the `n`
+                             retrievals.
+
+        taus(numpy.array): 1D array containing the `k` quantile fractions
+                           :math:`\tau` that correspond to the columns in
+                           `y_pred`.
+
+        n_samples(int): The number of samples per retrieval.
+
+        random_state: Seed or :class:`numpy.random.RandomState` object for
+                      reproducible samples. Default is the global random
+                      state of numpy.
+
+    Returns:
+
+        Array of shape `(n, n_samples)` containing the samples.
+    """
+    y_pred, taus = _check_quantiles(y_pred, taus)
+    shape = y_pred.shape[:-1] + (n_samples,)
+
+    if random_state is None:
+        probabilities = np.random.random_sample(shape)
+    else:
+        if not isinstance(random_state, np.random.RandomState):
+            random_state = np.random.RandomState(random_state)
+        probabilities = random_state.random_sample(shape)
+
+    return posterior_quantiles(y_pred, taus, probabilities)
+
+
+def posterior_mean(y_pred, taus):
+    r"""
+    The means of the posterior distributions.
+
+    Arguments:
+
+        y_pred(numpy.array): Array of shape `(n, k)` containing the `k`
+                             predicted quantiles for each of the `n`
+                             retrievals.
+
+        taus(numpy.array): 1D array containing the `k` quantile fractions
+                           :math:`\tau` that correspond to the columns in
+                           `y_pred`.
+
+    Returns:
+
+        `n`-element array containing the posterior means.
+    """
+    ys, fs = cdf(y_pred, taus)
+    # The density is constant within each segment of the CDF:
+    return np.sum(np.diff(fs) * 0.5 * (ys[..., 1:] + ys[..., :-1]), axis=-1)
+
+
+def credible_interval(y_pred, taus, probability=0.9):
+    r"""
+    The central credible intervals of the posterior distributions.
+
+    Arguments:
+
+        y_pred(numpy.array): Array of shape `(n, k)` containing the `k`
+                             predicted quantiles for each of the `n`
+                             retrievals.
+
+        taus(numpy.array): 1D array containing the `k` quantile fractions
+                           :math:`\tau` that correspond to the columns in
+                           `y_pred`.
+
+        probability(float): The probability within the interval.
+
+    Returns:
+
+        Tuple (lower, upper) of two `n`-element arrays containing the
+        boundaries of the intervals.
+    """
+    if not 0 <= probability <= 1:
+        raise ValueError("The probability must be within [0, 1]!")
+
+    bounds = posterior_quantiles(
+        y_pred, taus, [0.5 - 0.5 * probability, 0.5 + 0.5 * probability]
+    )
+    return bounds[..., 0], bounds[..., 1]
+
+
+def crps(y_pred, y_test, taus):
+    r"""
+    Compute the Continuous Ranked Probability Score (CRPS).
+
+    This function uses the piecewise linear fit to the approximate posterior
+    CDF obtained from the predicted quantiles in :code:`y_pred` to
+    approximate the continuous ranked probability score (CRPS):
+
+    .. math::
+        CRPS(\mathbf{y}, x) = \int_{-\infty}^\infty (F_{x | \mathbf{y}}(x')
+        - \mathrm{1}_{x < x'})^2 \: dx'
+
+    Arguments:
+
+        y_pred(numpy.array): Array of shape `(n, k)` containing the `k`
+                             predicted quantiles for each of the `n`
+                             retrievals.
+
+        y_test(numpy.array): Array containing the `n` true values, i.e.
+                             samples of the true conditional distributions.
+
+        taus(numpy.array): 1D array containing the `k` quantile fractions
+                           :math:`\tau` that correspond to the columns in
+                           `y_pred`.
+
+    Returns:
+
+        `n`-element array containing the CRPS values for each of the
+        retrievals.
+    """
+    ys, fs = cdf(y_pred, taus)
+    try:
+        y_test = np.reshape(y_test, ys.shape[:-1] + (1,))
+    except ValueError:
+        raise ValueError(
+            "Shape of y_test is incompatible with y_pred and taus.")
+
+    # The integral is exact: the squared difference is quadratic on each
+    # segment of the CDF, which is split at the true value. Below it, the
+    # step function is 0, above it 1.
+    y0, y1 = ys[..., :-1], ys[..., 1:]
+    f0, f1 = fs[:-1], fs[1:]
+    split = np.clip(y_test, y0, y1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f_split = np.where(
+            y1 > y0, f0 + (f1 - f0) * (split - y0) / (y1 - y0), f0)
+
+    below = (split - y0) * (f0**2 + f0 * f_split + f_split**2) / 3
+    above = (y1 - split) * (
+        (f_split - 1)**2 + (f_split - 1) * (f1 - 1) + (f1 - 1)**2) / 3
+
+    # Outside of the nodes, the CDF and the step function differ by 1:
+    tails = np.maximum(ys[..., :1] - y_test, 0) \
+        + np.maximum(y_test - ys[..., -1:], 0)
+    return np.sum(below + above, axis=-1) + tails[..., 0]
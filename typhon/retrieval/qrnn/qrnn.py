@@ -4,6 +4,8 @@ import copy
 import os
 import pickle
 
+from typhon.retrieval import posterior
+
 # Keras Imports
 try:
     import keras
@@ -732,6 +734,8 @@ class QRNN:
 
             x_1.0 = 2.0 x_{\tau_k} - x_{\tau_{k-1}}
 
+        See :func:`typhon.retrieval.posterior.cdf`.
+
         Arguments:
 
             x(np.array): Array of shape `(n, m)` containing `n` inputs for which
@@ -739,21 +743,12 @@ class QRNN:
 
         Returns:
 
-            Tuple (xs, fs) containing the :math: `x`-values in `xs` and corresponding
-            values of the posterior CDF :math: `F(x)` in `fs`.
+            Tuple (xs, fs) containing the :math: `x`-values in `xs` with the
+            shape `(n, k + 2)` and corresponding values of the posterior CDF
+            :math: `F(x)` in `fs` with the shape `(k + 2,)`.
 
         """
-        y_pred = np.zeros(self.quantiles.size + 2)
-        y_pred[1:-1] = self.predict(x)
-        y_pred[0] = 2.0 * y_pred[1] - y_pred[2]
-        y_pred[-1] = 2.0 * y_pred[-2] - y_pred[-3]
-
-        qs = np.zeros(self.quantiles.size + 2)
-        qs[1:-1] = self.quantiles
-        qs[0] = 0.0
-        qs[-1] = 1.0
-
-        return y_pred, qs
+        return posterior.cdf(self.predict(x), self.quantiles)
 
     def pdf(self, x, use_splines = False):
         r"""
@@ -762,7 +757,7 @@ class QRNN:
 
         By default, the PDF is approximated by computing the derivative of the
         piece-wise linear approximation of the CDF as computed by the :code:`cdf`
-        function.
+        function (see :func:`typhon.retrieval.posterior.pdf`).
 
         If :code:`use_splines` is set to :code:`True`, the PDF is computed from
         a spline fit to the approximate CDF.
@@ -778,87 +773,93 @@ class QRNN:
         Returns:
 
             Tuple (xs, fs) containing the :math: `x`-values in `xs` and corresponding
-            values of the approximate posterior PDF :math: `F(x)` in `fs`.
+            values of the approximate posterior PDF :math: `F(x)` in `fs`. Both
+            have the shape `(n, k + 1)`, or `(n, 101)` if splines are used.
 
         """
+        y_pred = self.predict(x)
+        if not use_splines:
+            return posterior.pdf(y_pred, self.quantiles)
+
+        q = np.zeros(self.quantiles.size + 2)
+        q[1:-1] = np.array(self.quantiles)
+        q[0] = 0.0
+        q[-1] = 1.0
+
+        # The spline fits need a loop since each input has its own nodes:
+        ys = np.zeros((y_pred.shape[0], 101))
+        ps = np.zeros((y_pred.shape[0], 101))
+        for i, y_pred_i in enumerate(y_pred):
+            y = np.zeros(y_pred_i.size + 2)
+            y[1:-1] = y_pred_i
+            y[0] = 3 * y_pred_i[0] - 2 * y_pred_i[1]
+            y[-1] = 3 * y_pred_i[-1] - 2 * y_pred_i[-2]
 
-        y_pred = np.zeros(self.quantiles.size)
-        y_pred = self.predict(x).ravel()
+            sr = CubicSpline(y, q, bc_type = "clamped")
+            ys[i] = np.linspace(y[0], y[-1], 101)
+            ps[i] = sr(ys[i], nu = 1)
 
-        y = np.zeros(y_pred.size + 1)
-        y[1:-1] = 0.5 * (y_pred[1:] + y_pred[:-1])
-        y[0] = 2 * y_pred[0] - y_pred[1]
-        y[-1] = 2 * y_pred[-1] - y_pred[-2]
+        return ys, ps
 
-        if not use_splines:
+    def sample_posterior(self, x, n=1):
+        r"""
+        Generates :code:`n` samples from the estimated posterior
+        distribution for each input vector in :code:`x`. The sampling
+        is performed by the inverse CDF method using the estimated
+        CDF obtained from the :code:`cdf` member function (see
+        :func:`typhon.retrieval.posterior.sample_posterior`).
 
-            p = np.zeros(y.size)
-            p[1:-1] = np.diff(self.quantiles) / np.diff(y_pred)
-        else:
+        Arguments:
 
-            y = np.zeros(y_pred.size + 2)
-            y[1:-1] = y_pred
-            y[0] = 3 * y_pred[0] - 2 * y_pred[1]
-            y[-1] = 3 * y_pred[-1] - 2 * y_pred[-2]
-            q = np.zeros(self.quantiles.size + 2)
-            q[1:-1] = np.array(self.quantiles)
-            q[0] = 0.0
-            q[-1] = 1.0
+            x(np.array): Array of shape `(n, m)` containing `n` inputs for which
+                         to predict the conditional quantiles.
 
-            sr = CubicSpline(y, q, bc_type = "clamped")
-            y = np.linspace(y[0], y[-1], 101)
-            p = sr(y, nu = 1)
+            n(int): The number of samples to generate for each input.
+
+        Returns:
 
-        return y, p
+            Array of shape `(n_inputs, n)` containing the samples.
+        """
+        return posterior.sample_posterior(
+            self.predict(x), self.quantiles, n_samples=n)
 
+    def posterior_mean(self, x):
+        r"""
+        Predict the means of the posterior distributions.
 
-        y_pred = np.zeros(self.quantiles.size + 2)
-        y_pred[1:-1] = self.predict(x)
-        y_pred[0] = 2.0 * y_pred[1] - y_pred[2]
-        y_pred[-1] = 2.0 * y_pred[-2] - y_pred[-3]
+        See :func:`typhon.retrieval.posterior.posterior_mean`.
 
-        if use_splines:
-            x_t = np.zeros(x.size + 2)
-            x_t[1:-1] = x
-            x_t[0] = 2 * x[0] - x[1]
-            x_t[-1] = 2 * x[-1] - x[-2]
-            y_t = np.zeros(y.size + 2)
-            y_t[1:-1] = y
-            y_t[-1] = 1.0
+        Arguments:
 
-        else:
-            print(y)
-            x_new = np.zeros(x.size - 1)
-            x_new[2:-2] = 0.5 * (x[2:-3] + x[3:-2])
-            x_new[0:2] = x[0:2]
-            x_new[-2:] = x[-2:]
-            y_new = np.zeros(y.size - 1)
-            y_new[1:-1] = np.diff(y[1:-1]) / np.diff(x[1:-1])
-        return x_new, y_new
+            x(np.array): Array of shape `(n, m)` containing `n` inputs for which
+                         to predict the conditional quantiles.
 
-    def sample_posterior(self, x, n=1):
+        Returns:
+
+            `n`-element array containing the posterior means.
+        """
+        return posterior.posterior_mean(self.predict(x), self.quantiles)
+
+    def credible_interval(self, x, probability=0.9):
         r"""
-        Generates :code:`n` samples from the estimated posterior
-        distribution for the input vector :code:`x`. The sampling
-        is performed by the inverse CDF method using the estimated
-        CDF obtained from the :code:`cdf` member function.
+        Predict the central credible intervals of the posterior distributions.
+
+        See :func:`typhon.retrieval.posterior.credible_interval`.
 
         Arguments:
 
             x(np.array): Array of shape `(n, m)` containing `n` inputs for which
                          to predict the conditional quantiles.
 
-            n(int): The number of samples to generate.
+            probability(float): The probability within the interval.
 
         Returns:
 
-            Tuple (xs, fs) containing the :math: `x`-values in `xs` and corresponding
-            values of the posterior CDF :math: `F(x)` in `fs`.
+            Tuple (lower, upper) of two `n`-element arrays containing the
+            boundaries of the intervals.
         """
-        y_pred, qs = self.cdf(x)
-        p = np.random.rand(n)
-        y = np.interp(p, qs, y_pred)
-        return y
+        return posterior.credible_interval(
+            self.predict(x), self.quantiles, probability)
 
     @staticmethod
     def crps(y_pred, y_test, quantiles):
@@ -874,6 +875,8 @@ class QRNN:
             CRPS(\mathbf{y}, x) = \int_{-\infty}^\infty (F_{x | \mathbf{y}}(x')
             - \mathrm{1}_{x < x'})^2 \: dx'
 
+        See :func:`typhon.retrieval.posterior.crps`.
+
         Arguments:
 
             y_pred(numpy.array): Array of shape `(n, k)` containing the `k`
@@ -892,20 +895,7 @@ class QRNN:
             `n`-element array containing the CRPS values for each of the
             predictions in `y_pred`.
         """
-        y_cdf = np.zeros((y_pred.shape[0], quantiles.size + 2))
-        y_cdf[:, 1:-1] = y_pred
-        y_cdf[:, 0] = 2.0 * y_pred[:, 1] - y_pred[:, 2]
-        y_cdf[:, -1] = 2.0 * y_pred[:, -2] - y_pred[:, -3]
-
-        ind = np.zeros(y_cdf.shape)
-        ind[y_cdf > y_test.reshape(-1, 1)] = 1.0
-
-        qs = np.zeros((1, quantiles.size + 2))
-        qs[0, 1:-1] = quantiles
-        qs[0, 0] = 0.0
-        qs[0, -1] = 1.0
-
-        return np.trapz((qs - ind)**2.0, y_cdf)
+        return posterior.crps(y_pred, y_test, quantiles)
 
     def evaluate_crps(self, x, y_test):
         r"""
@@ -930,7 +920,7 @@ class QRNN:
             inputs in `x`.
 
         """
-        return QRNN.crps(self.predict(x), y, self.quantiles)
+        return QRNN.crps(self.predict(x), y_test, self.quantiles)
 
     def save(self, path):
         r"""
@@ -4,6 +4,8 @@ of retrieval methods.
 """
 import numpy as np
 
+from typhon.retrieval import posterior
+
 
 def mape(y_pred, y_test):
     r"""
@@ -117,3 +119,38 @@ def mean_quantile_score(y_tau, y_test, taus):
     along the first dimension.
     """
     return np.nanmean(quantile_score(y_tau, y_test, taus), axis=0)
+
+
+def crps(y_pred, y_test, taus):
+    r"""
+    The Continuous Ranked Probability Score (CRPS) of predicted quantiles.
+
+    The posterior CDF of each prediction is approximated by a piecewise
+    linear function through the predicted quantiles, see
+    :func:`typhon.retrieval.posterior.crps`.
+
+    Arguments:
+
+        y_pred(numpy.array): Numpy array with shape (n, k) containing one row
+                             of k estimated quantiles for each of the n test
+                             cases.
+
+        y_test(numpy.array): Numpy array with the n observed test values.
+
+        taus(numpy.array): Numpy array containing the k quantile fractions
+                           :math:`\tau` that are estimated by the columns in
+                           `y_pred`.
+
+    Returns:
+
+        Array of shape (n,) containing the CRPS for each test case.
+    """
+    return posterior.crps(y_pred, y_test, taus)
+
+
+def mean_crps(y_pred, y_test, taus):
+    r"""
+    Wrapper around the `crps` function, which computes the mean over all test
+    cases.
+    """
+    return np.nanmean(crps(y_pred, y_test, taus))
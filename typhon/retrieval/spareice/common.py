@@ -59,7 +59,6 @@ import os
 from os.path import join, dirname
 import warnings
 
-import imageio
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
@@ -72,9 +71,9 @@ from sklearn.preprocessing import RobustScaler
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.tree import DecisionTreeClassifier
 from typhon.collocations import collapse, Collocations, Collocator
-from typhon.geographical import sea_mask
+from typhon.geographical import RasterLookup, sea_mask
 from typhon.plots import binned_statistic, heatmap, styles, worldmap
-from typhon.utils import to_array, Timer
+from typhon.utils import Timer
 import xarray as xr
 
 from ..common import RetrievalProduct
@@ -145,20 +144,18 @@ class SPAREICE:
         self.processes = processes
         self.name = "SPARE-ICE"
 
+        # Both rasters are converted once to memory-mapped cache files. Hence,
+        # they are shared by all processes and only their file names are
+        # pickled when this object is sent to the workers.
         if sea_mask_file is None:
             self.sea_mask = None
         else:
-            self.sea_mask = np.flip(
-                np.array(imageio.imread(sea_mask_file) == 255), axis=0
-            )
+            self.sea_mask = RasterLookup.from_file(sea_mask_file)
 
         if elevation_file is None:
             self.elevation_grid = None
         else:
-            ds = xr.open_dataset(
-                elevation_file, decode_times=False
-            )
-            self.elevation_grid = ds.data.squeeze().values
+            self.elevation_grid = RasterLookup.from_file(elevation_file)
 
         if collocator is None:
             self.collocator = Collocator(verbose=verbose)
@@ -293,21 +290,16 @@ class SPAREICE:
             }
             outfile.write(repr(dictionary))
 
-    def standardize_collocations(self, data, fields=None, add_sea_mask=True,
-                                 add_elevation=True):
-        """Convert collocation fields to standard SPARE-ICE fields.
+    @staticmethod
+    def _field_mapping(data):
+        """Return the names of the SPARE-ICE fields in the collocations
 
         Args:
             data: A xarray.Dataset object with collocations either amongst
                 2C-ICE, MHS & AVHRR or MHS & AVHRR.
-            fields (optional): Fields that will be selected from the
-                collocations. If None (default), all fields will be selected.
-            add_sea_mask: Add a flag to the data whether the pixel is over sea
-                or land.
-            add_elevation: Add the surface elevation in meters to each pixel.
 
         Returns:
-            A pandas.DataFrame with all selected fields.
+            A dictionary with the SPARE-ICE field names as keys.
         """
         # Check whether the data is coming from a twice-collocated dataset:
         if "MHS_2C-ICE/MHS/scnpos" in data.variables:
@@ -319,7 +311,7 @@ class SPAREICE:
         # old the names coming from the original collocations. If the value is
         # a list, the variable is 2-dimensional. The first element is the old
         # name, and the rest is the dimnesion that should be selected.
-        mapping = {
+        return {
             "mhs_channel1": [
                 f"{prefix}MHS/Data/btemps", f"{prefix}MHS/channel", 0
             ],
@@ -381,6 +373,24 @@ class SPAREICE:
             "iwp_std": "MHS_2C-ICE/2C-ICE/ice_water_path_std",
         }
 
+    def standardize_collocations(self, data, fields=None, add_sea_mask=True,
+                                 add_elevation=True):
+        """Convert collocation fields to standard SPARE-ICE fields.
+
+        Args:
+            data: A xarray.Dataset object with collocations either amongst
+                2C-ICE, MHS & AVHRR or MHS & AVHRR.
+            fields (optional): Fields that will be selected from the
+                collocations. If None (default), all fields will be selected.
+            add_sea_mask: Add a flag to the data whether the pixel is over sea
+                or land.
+            add_elevation: Add the surface elevation in meters to each pixel.
+
+        Returns:
+            A pandas.DataFrame with all selected fields.
+        """
+        mapping = self._field_mapping(data)
+
         # These fields need a special treatment
         special_fields = ["avhrr_tir_diff", "mhs_diff", "iwp", "ice_cloud"]
 
@@ -443,33 +453,142 @@ class SPAREICE:
             )
 
         if add_elevation:
-            def get_grid_value(grid, lat, lon):
-                lat = to_array(lat)
-                lon = to_array(lon)
+            return_data["elevation"] = self.elevation_grid.nearest(
+                return_data.lat.values, return_data.lon.values
+            )
 
-                if lon.min() < -180 or lon.max() > 180:
-                    raise ValueError("Longitudes out of bounds!")
+            # We do not need the depth of the oceans (this would just
+            # confuse the ANN):
+            return_data["elevation"][return_data.elevation < 0] = 0
 
-                if lat.min() < -90 or lat.max() > 90:
-                    raise ValueError("Latitudes out of bounds!")
+        return return_data
 
-                grid_lat_step = 180 / (grid.shape[0] - 1)
-                grid_lon_step = 360 / (grid.shape[1] - 1)
+    @property
+    def input_layout(self):
+        """Return the order of the columns in :meth:`standardize_inputs`
 
-                lat_cell = (90 - lat) / grid_lat_step
-                lon_cell = lon / grid_lon_step
+        The inputs of the ice cloud classifier come first, so the decision
+        tree can work on a slice of the float32 matrix without copying it.
+        They are followed by the remaining inputs of the IWP regressor.
+        """
+        layout = list(self.ice_cloud.inputs)
+        layout += [field for field in self.iwp.inputs if field not in layout]
+        return layout
 
-                return grid[lat_cell.astype(int), lon_cell.astype(int)]
+    @staticmethod
+    def _field_values(data, key):
+        """Return the values of a mapped field without copying them"""
+        if isinstance(key, list):
+            variable = data.variables[key[0]]
+            index = [slice(None)] * variable.ndim
+            index[variable.dims.index(key[1])] = key[2]
+            return variable.values[tuple(index)]
+
+        return data.variables[key].values
+
+    def standardize_inputs(self, data, inputs=None):
+        """Assemble the SPARE-ICE inputs directly into one float32 matrix
+
+        This is a faster alternative to :meth:`standardize_collocations`
+        for retrieving SPARE-ICE: it creates no pandas.DataFrame. Each field
+        is copied only once from `data` into a preallocated C-contiguous
+        float32 matrix, and the derived fields (*avhrr_tir_diff*,
+        *mhs_diff*, *sea_mask* and *elevation*) are computed in their
+        columns.
 
-            return_data["elevation"] = get_grid_value(
-                self.elevation_grid, return_data.lat, return_data.lon
-            )
+        Args:
+            data: A xarray.Dataset object with collapsed collocations between
+                MHS and AVHRR (and 2C-ICE).
+            inputs: List with the names of the input fields, i.e. the
+                columns of the matrix. Default is :attr:`input_layout`.
 
-            # We do not need the depth of the oceans (this would just
-            # confuse the ANN):
-            return_data["elevation"][return_data.elevation < 0] = 0
+        Returns:
+            A tuple of the matrix with the shape (n, len(inputs)) and a
+            boolean array with the length n. The latter is True for all rows
+            whose inputs and geolocation are finite.
+        """
+        if inputs is None:
+            inputs = self.input_layout
+
+        mapping = self._field_mapping(data)
+
+        lat = data.variables["lat"].values
+        lon = data.variables["lon"].values
+        located = np.isfinite(lat) & np.isfinite(lon)
+        if not located.all():
+            # Points without geolocation are invalid anyway but must not
+            # make the raster lookups fail:
+            lat = np.where(located, lat, 0)
+            lon = np.where(located, lon, 0)
+
+        matrix = np.empty((lat.size, len(inputs)), dtype="f4")
+        for column, field in zip(matrix.T, inputs):
+            if field in mapping:
+                column[:] = self._field_values(data, mapping[field])
+            elif field == "avhrr_tir_diff":
+                np.subtract(
+                    self._field_values(data, mapping["avhrr_channel5"]),
+                    self._field_values(data, mapping["avhrr_channel4"]),
+                    out=column
+                )
+            elif field == "mhs_diff":
+                np.subtract(
+                    self._field_values(data, mapping["mhs_channel5"]),
+                    self._field_values(data, mapping["mhs_channel3"]),
+                    out=column
+                )
+            elif field == "sea_mask":
+                column[:] = self.sea_mask.nearest(lat, lon)
+            elif field == "elevation":
+                column[:] = self.elevation_grid.nearest(lat, lon)
+                # We do not need the depth of the oceans (this would just
+                # confuse the ANN):
+                np.maximum(column, 0, out=column)
+            else:
+                raise ValueError(f"Unknown input field '{field}'!")
 
-        return return_data
+        valid = np.isfinite(matrix).all(axis=1)
+        valid &= located
+        return matrix, valid
+
+    @staticmethod
+    def _select_columns(matrix, layout, fields):
+        """Select the columns of some fields, as a view if possible"""
+        columns = [layout.index(field) for field in fields]
+        first = columns[0]
+        if columns == list(range(first, first + len(columns))):
+            return matrix[:, first:first + len(columns)]
+        return matrix[:, columns]
+
+    def retrieve_matrix(self, matrix, inputs=None, as_log10=False):
+        """Retrieve SPARE-ICE from an input matrix
+
+        Args:
+            matrix: A 2-dimensional array with the inputs of all points,
+                e.g. from :meth:`standardize_inputs`. It must not contain
+                NaNs.
+            inputs: List with the names of the columns of the matrix.
+                Default is :attr:`input_layout`.
+            as_log10: If true, the retrieved IWP will be returned as logarithm
+                of base 10.
+
+        Returns:
+            Two numpy arrays with the retrieved IWP and ice cloud flag.
+        """
+        if inputs is None:
+            inputs = self.input_layout
+
+        iwp = self.iwp.retrieve_array(
+            self._select_columns(matrix, inputs, self.iwp.inputs)
+        ).reshape(-1)
+        if not as_log10:
+            iwp = 10**iwp
+
+        ice_cloud = self.ice_cloud.retrieve_array(
+            self._select_columns(matrix, inputs, self.ice_cloud.inputs)
+        ).reshape(-1)
+
+        return iwp, ice_cloud
 
     def retrieve(self, data, as_log10=False):
         """Retrieve SPARE-ICE for the input variables
@@ -505,21 +624,41 @@ class SPAREICE:
         if "Collocations/pairs" in collocations.variables:
             collocations = collapse(collocations, reference="MHS")
 
-        # However, we do not need the original field names
-        collocations = spareice.standardize_collocations(collocations)
+        # However, we do not need the original field names. The inputs are
+        # assembled directly into one matrix, since a DataFrame would copy
+        # all fields several times.
+        matrix, valid = spareice.standardize_inputs(collocations)
 
-        # Remove NaNs from the data:
-        collocations = collocations.dropna()
+        time = collocations["time"].values
+        scnpos = spareice._field_values(
+            collocations, spareice._field_mapping(collocations)["mhs_scnpos"]
+        )
+        valid &= ~np.isnat(time) & np.isfinite(scnpos)
 
-        if collocations.empty:
+        if not valid.any():
             return None
+        if not valid.all():
+            matrix = matrix[valid]
 
         # Retrieve the IWP and the ice cloud flag:
-        retrieved = spareice.retrieve(collocations).to_xarray()
+        iwp, ice_cloud = spareice.retrieve_matrix(matrix)
+
+        time = time[valid]
+        spareice._debug(
+            f"Retrieve SPARE-ICE from {time.min()} to {time.max()}"
+        )
 
-        start = collocations.time.min()
-        end = collocations.time.max()
-        spareice._debug(f"Retrieve SPARE-ICE from {start} to {end}")
+        retrieved = xr.Dataset(
+            {
+                "iwp": ("index", iwp),
+                "ice_cloud": ("index", ice_cloud),
+                "lat": ("index", collocations["lat"].values[valid]),
+                "lon": ("index", collocations["lon"].values[valid]),
+                "time": ("index", time),
+                "scnpos": ("index", scnpos[valid]),
+            },
+            coords={"index": np.flatnonzero(valid)}
+        )
 
         # Add more information:
         retrieved["iwp"].attrs = {
@@ -533,11 +672,6 @@ class SPAREICE:
             "description": "True if pixel contains an ice cloud (retrieved"
                            " by SPARE-ICE)."
         }
-        retrieved["lat"] = collocations["lat"]
-        retrieved["lon"] = collocations["lon"]
-        retrieved["time"] = collocations["time"]
-        retrieved["scnpos"] = collocations["mhs_scnpos"]
-
         return retrieved
 
     def retrieve_from_collocations(
@@ -580,9 +714,11 @@ class SPAREICE:
 
         timer = Timer.start()
         if isinstance(inputs, Collocations):
-            # Simply apply a map function to all files from these collocations
+            # Simply apply a map function to all files from these collocations.
+            # SPARE-ICE is sent only once to each worker process and not with
+            # each file:
             inputs.map(
-                SPAREICE._retrieve_from_collocations, kwargs={
+                SPAREICE._retrieve_from_collocations, worker_context={
                     "spareice": self,
                 }, on_content=True, pass_info=True, start=start, end=end,
                 max_workers=processes, output=output, worker_type="process"
@@ -26,14 +26,71 @@ class TestCovarianceMatrix:
     def test_xml_io(self):
         save(self.covmat, self.f)
         covmat2 = load(self.f)
-        assert(all([b1 == b2 for (b1, b2) in zip(self.covmat.blocks,
-                                                 covmat2.blocks)]))
+        assert(len(covmat2.blocks) == len(self.covmat.blocks))
+        assert(not covmat2.inverse_blocks)
+        for (b1, b2) in zip(self.covmat.blocks, covmat2.blocks):
+            assert((b1.i, b1.j, b1.row_start, b1.column_start)
+                   == (b2.i, b2.j, b2.row_start, b2.column_start))
+        assert(np.allclose(covmat2.to_dense(), self.covmat.to_dense()))
 
     def test_to_dense(self):
         m = self.covmat.to_dense()
         assert(np.allclose(m[:10, :10], self.covmat.blocks[0].matrix))
         assert(np.allclose(m[10:, 10:], self.covmat.blocks[1].matrix.toarray()))
 
+    def test_linear_algebra(self):
+        covmats = [
+            _random_covariance_matrix(coupled=False),
+            _random_covariance_matrix(coupled=True),
+        ]
+        for covmat in covmats:
+            s = covmat.to_dense()
+            s = np.triu(s) + np.triu(s, 1).T
+            x = np.random.normal(size=(s.shape[0], 3))
+
+            assert(np.allclose(covmat.matvec(x), s @ x))
+            assert(np.allclose(covmat.matvec(x[:, 0]), s @ x[:, 0]))
+            assert(np.allclose(covmat.solve(x), np.linalg.solve(s, x)))
+            assert(np.allclose(covmat.logdet(), np.linalg.slogdet(s)[1]))
+            assert(np.allclose(covmat.inverse_diagonal(),
+                               np.diag(np.linalg.inv(s))))
+
+    def test_inverse_blocks(self):
+        blocks = [
+            Block(0, 0, 0, 0, False, sp.sparse.diags([2.0, 4.0])),
+            Block(1, 1, 2, 2, False, sp.sparse.diags([5.0, 10.0])),
+        ]
+        inverse_blocks = [
+            Block(0, 0, 0, 0, True, sp.sparse.diags([0.5, 0.25])),
+            Block(1, 1, 2, 2, True, sp.sparse.diags([0.2, 0.1])),
+        ]
+        expected = [0.5, 0.25, 0.2, 0.1]
+
+        # Inverse blocks for only some of the diagonal blocks are not used:
+        covmat = CovarianceMatrix(blocks, inverse_blocks[:1])
+        assert(np.allclose(covmat.solve(np.ones(4)), expected))
+        assert(np.allclose(covmat.inverse_diagonal(), expected))
+
+        covmat = CovarianceMatrix(blocks, inverse_blocks)
+        assert(np.allclose(covmat.solve(np.ones(4)), expected))
+        assert(np.allclose(covmat.inverse_diagonal(), expected))
+        assert(covmat._cholesky is None)
+
     def teardown_method(self):
         # Remove temp file
         os.remove(self.f)
+
+
+def _random_covariance_matrix(coupled):
+    """Random positive-definite covariance matrix with dense and sparse blocks
+    """
+    a = np.random.normal(size=(10, 10))
+    b1 = Block(0, 0, 0, 0, False, a @ a.T + 10 * np.eye(10))
+    b2 = Block(1, 1, 10, 10, False, sp.sparse.diags(np.arange(1.0, 6.0)))
+    a = np.random.normal(size=(8, 8))
+    b3 = Block(2, 2, 15, 15, False, sp.sparse.csr_matrix(a @ a.T + np.eye(8)))
+    blocks = [b1, b2, b3]
+    if coupled:
+        blocks.append(Block(0, 2, 0, 15, False,
+                            0.1 * np.random.normal(size=(10, 8))))
+    return CovarianceMatrix(blocks)
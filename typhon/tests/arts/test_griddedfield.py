@@ -305,6 +305,58 @@ class TestGriddedFieldLoad:
         assert a == b
 
 
+class TestRegridder:
+    """Testing the regridding of GriddedFields."""
+
+    def test_regrid(self):
+        """Regrid several axes at once like chained refine_grid calls."""
+        gf3 = griddedfield.GriddedField3(
+            grids=[np.logspace(5, 1, 10), np.linspace(-90, 90, 7),
+                   np.arange(5.)],
+            data=np.random.RandomState(0).rand(10, 7, 5),
+            gridnames=['Pressure', 'Latitude', 'Longitude'],
+        )
+        new_grids = [np.logspace(4.5, 1.5, 13), np.linspace(-80, 80, 4)]
+
+        regridded = gf3.regrid(new_grids, fun=[np.log, None, None])
+        reference = gf3.copy()
+        reference.refine_grid(new_grids[0], axis=0, fun=np.log)
+        reference.refine_grid(new_grids[1], axis=1)
+
+        assert regridded == reference
+        assert gf3.shape == (10, 7, 5)
+
+    def test_regridder_reuse(self):
+        """Apply one Regridder to several fields with the same grids."""
+        grids = [np.arange(4.), np.array([0.])]
+        regridder = griddedfield.Regridder(grids, [[0.5, 2.5], [0, 1, 2]])
+
+        for factor in range(1, 3):
+            gf2 = griddedfield.GriddedField2(
+                grids, factor * np.arange(4.).reshape(4, 1))
+            regridded = regridder(gf2)
+            assert np.allclose(
+                regridded.data, factor * np.array([[0.5] * 3, [2.5] * 3]))
+
+        with pytest.raises(ValueError):
+            regridder(griddedfield.GriddedField2(
+                [np.arange(1, 5.), np.array([0.])], np.ones((4, 1))))
+
+    def test_regrid_bounds(self):
+        """Test new grids outside of the old grids."""
+        gf1 = griddedfield.GriddedField1([np.arange(3.)], 2 * np.arange(3.))
+
+        with pytest.raises(ValueError):
+            gf1.regrid([[-1., 1.]])
+
+        filled = gf1.regrid([[-1., 1.]], bounds_error=False, fill_value=0.)
+        assert np.array_equal(filled.data, [0., 2.])
+
+        extrapolated = gf1.regrid(
+            [[-1., 3.]], bounds_error=False, fill_value="extrapolate")
+        assert np.allclose(extrapolated.data, [-2., 6.])
+
+
 class TestGriddedFieldWrite:
     def setup_method(self):
         """Create a temporary file."""
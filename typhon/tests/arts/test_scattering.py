@@ -0,0 +1,106 @@
+# -*- encoding: utf-8 -*-
+import os
+from tempfile import mkstemp
+
+import numpy as np
+import pytest
+
+from typhon.arts import xml
+from typhon.arts.scattering import (
+    SingleScatteringData, scattering_properties
+)
+
+
+def _henyey_greenstein_ssd(g, f_size=3, T_size=2):
+    """Create totally random scattering data with a Henyey-Greenstein phase
+    function of asymmetry parameter g for all frequencies and temperatures.
+    """
+    ssd = SingleScatteringData()
+    ssd.version = 3
+    ssd.ptype = "totally_random"
+    ssd.description = "Henyey-Greenstein test data"
+    ssd.f_grid = np.linspace(100e9, 200e9, f_size)
+    ssd.T_grid = np.linspace(200, 300, T_size)
+    ssd.za_grid = np.linspace(0, 180, 721)
+    ssd.aa_grid = np.array([])
+
+    cos_za = np.cos(np.radians(ssd.za_grid))
+    phase = (1 - g**2) / (1 + g**2 - 2 * g * cos_za)**1.5 / (4 * np.pi)
+
+    # The scattering cross sections grow with the frequency, and the phase
+    # function is scaled by 2 so that it is not normalised:
+    scattering = np.arange(1, f_size * T_size + 1.).reshape(f_size, T_size)
+    shape = (f_size, T_size, ssd.za_grid.size, 1, 1, 1)
+    ssd.pha_mat_data = np.zeros(shape + (6,))
+    ssd.pha_mat_data[..., 0] = (
+        2 * scattering.reshape(f_size, T_size, 1, 1, 1, 1)
+        * phase.reshape(-1, 1, 1, 1)
+    )
+    ssd.abs_vec_data = np.ones((f_size, T_size, 1, 1, 1))
+    ssd.ext_mat_data = ssd.abs_vec_data + scattering[..., None, None, None]
+    ssd.checksize()
+    return ssd
+
+
+class TestSingleScatteringData:
+    def setup_method(self):
+        """Create a temporary file."""
+        fd, self.f = mkstemp()
+        os.close(fd)
+
+    def teardown_method(self):
+        """Delete temporary file."""
+        for f in [self.f, self.f + '.bin']:
+            if os.path.isfile(f):
+                os.remove(f)
+
+    @pytest.mark.parametrize('g', [0., 0.3, -0.5])
+    def test_assp2g(self, g):
+        """Test the asymmetry parameter of all frequencies and temperatures."""
+        ssd = _henyey_greenstein_ssd(g)
+        assert np.allclose(ssd.assp2g(), g, atol=1e-4)
+
+    def test_assp2ssa(self):
+        """Test the single scattering albedo."""
+        ssd = _henyey_greenstein_ssd(0.3)
+        ssa = ssd.assp2ssa()
+        assert ssa.shape == (3, 2)
+        assert np.allclose(ssa, 1 - 1 / ssd.ext_mat_data[:, :, 0, 0, 0])
+
+    def test_normalise(self):
+        """Normalise Z to E-A."""
+        ssd = _henyey_greenstein_ssd(0.3)
+        assert np.allclose(
+            ssd.integrate(), 2 * np.arange(1, 7.).reshape(3, 2), rtol=1e-4)
+
+        normalised = ssd.normalised()
+        assert np.allclose(
+            normalised.integrate(), np.arange(1, 7.).reshape(3, 2))
+        assert np.allclose(normalised.assp2g(), ssd.assp2g())
+
+    def test_getitem(self):
+        """Slice the data of totally random particles."""
+        ssd = _henyey_greenstein_ssd(0.3)
+        sliced = ssd[1, :, :, :]
+        assert sliced.pha_mat_data.shape == (1, 2, 721, 1, 1, 1, 6)
+        assert np.allclose(sliced.assp2g(), ssd.assp2g()[1:2])
+
+    def test_scattering_properties(self):
+        """Derive the properties of particles in a binary XML file."""
+        habits = [
+            [_henyey_greenstein_ssd(0.1), _henyey_greenstein_ssd(0.2)],
+            [_henyey_greenstein_ssd(0.3)],
+        ]
+        xml.save(habits, self.f, format='binary')
+
+        properties = scattering_properties(self.f, ['g', 'backscatter'])
+        assert set(properties) == {'g', 'backscatter'}
+        assert len(properties['g']) == 2
+        for i, habit in enumerate(habits):
+            for j, ssd in enumerate(habit):
+                assert np.allclose(properties['g'][i][j], ssd.assp2g())
+                assert np.allclose(
+                    properties['backscatter'][i][j], ssd.assp2backcoef())
+
+        with pytest.raises(ValueError):
+            scattering_properties(habits, ['asymmetry'])
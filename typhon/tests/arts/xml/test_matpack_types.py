@@ -336,6 +336,17 @@ class TestSave:
         test_data = xml.load(self.f)
         assert np.array_equal(test_data, reference)
 
+    def test_load_mmap(self):
+        """Memory-map the tensors of a binary file and check the values
+        behind them."""
+        reference = [_create_tensor(7), 2 * _create_tensor(7)]
+        xml.save(reference, self.f, format='binary')
+        test_data = xml.load(self.f, mmap=True)
+        assert isinstance(test_data[1], np.memmap)
+        assert not test_data[1].flags.writeable
+        for data, ref in zip(test_data, reference):
+            assert np.array_equal(data, ref)
+
     @pytest.mark.parametrize('n', range(3, 8))
     def test_save_empty_tensor(self, n):
         """Save empty tensor of dimension n to file, read it and compare data
@@ -26,3 +26,55 @@ class TestXML:
 
         with pytest.raises(KeyError):
             t['vector']
+
+    def test_load_directory_parallel(self):
+        """Test loading a directory with a pool of threads."""
+        sequential = xml.load_directory(self.ref_dir)
+        parallel = xml.load_directory(self.ref_dir, max_workers=2)
+
+        assert list(parallel) == sorted(sequential)
+        assert np.allclose(parallel['tensor3'], sequential['tensor3'])
+
+    def test_load_indexed_parallel(self, tmpdir):
+        """Test loading indexed files with a pool of threads."""
+        for i in range(3):
+            xml.save(np.full(2, float(i)),
+                     str(tmpdir.join('foo.{}.xml'.format(i))))
+
+        vectors = xml.load_indexed(str(tmpdir.join('foo')), max_workers=2)
+
+        assert [v[0] for v in vectors] == [0., 1., 2.]
+
+    def test_make_manifest(self):
+        """Test the types and shapes in the manifest of a directory."""
+        manifest = xml.make_manifest(self.ref_dir)
+
+        assert manifest['tensor3']['type'] == 'Tensor3'
+        assert manifest['tensor3']['shape'] == [2, 2, 2]
+        assert manifest['arrayofvector']['type'] == 'ArrayOfVector'
+        assert manifest['arrayofvector']['shape'] == [2]
+        assert manifest['index']['shape'] == []
+
+    def test_load_directory_manifest(self, tmpdir):
+        """Test loading selected files with a manifest."""
+        manifest = str(tmpdir.join('manifest.json'))
+        directory = tmpdir.mkdir('data')
+        xml.save(np.zeros(2), str(directory.join('a.xml')))
+        xml.save(np.zeros((2, 3)), str(directory.join('b.xml')))
+
+        t = xml.load_directory(str(directory), names=['b'], manifest=manifest)
+        assert list(t) == ['b']
+        assert xml.make_manifest(str(directory), manifest)['b']['shape'] \
+            == [2, 3]
+
+        # Files added later are not found without updating the manifest:
+        xml.save(np.zeros(2), str(directory.join('c.xml')))
+        with pytest.raises(KeyError):
+            xml.load_directory(str(directory), names=['c'], manifest=manifest)
+
+        # Changed files are updated in the manifest:
+        xml.save(np.zeros((4, 5)), str(directory.join('b.xml')))
+        t = xml.load_directory(str(directory), names=['b'], manifest=manifest)
+        assert t['b'].shape == (4, 5)
+        assert xml.make_manifest(str(directory), manifest)['b']['shape'] \
+            == [4, 5]
@@ -2,9 +2,13 @@ from os.path import dirname, join
 import sys
 from tempfile import TemporaryDirectory
 
+import numba
 import numpy as np
 import pytest
-from typhon.collocations import collapse, Collocator, Collocations, expand
+from typhon.collocations import (
+    collapse, Collocator, Collocations, expand, register_collapser
+)
+from typhon.collocations import common
 from typhon.files import FileSet, MHS_HDF
 from typhon.files.utils import get_testfiles_directory
 import xarray as xr
@@ -100,4 +104,64 @@ class TestCollocations:
         collapsed = collapse(collocations)
         expanded = expand(collocations)
 
+    def test_collapse_statistics(self, monkeypatch):
+        """Test the collapser functions against their numpy counterparts"""
+        primary = np.array([0, 0, 0, 1, 2, 2, 1, 0])
+        secondary = np.array([0, 1, 2, 3, 4, 5, 6, 7])
+        values = np.array([
+            [1., 2.], [3., np.nan], [5., 4.], [np.nan, np.nan],
+            [7., 1.], [9., 3.], [2., np.nan], [4., 8.],
+        ])
+        data = xr.Dataset({
+            "a/time": ("a/collocation", np.arange(3)),
+            "b/time": ("b/collocation", np.arange(8)),
+            "b/data": (("b/collocation", "b/channel"), values),
+            "Collocations/pairs": (
+                ("Collocations/group", "Collocations/collocation"),
+                np.array([primary, secondary])
+            ),
+            "Collocations/group": ("Collocations/group", ["a", "b"]),
+        })
+
+        @numba.njit
+        def value_range(values):
+            return values.max() - values.min()
+
+        # Do not leave the test collapser in the global registry:
+        monkeypatch.setattr(common, "_REGISTERED_COLLAPSERS", {})
+        register_collapser("test_range", value_range)
+
+        collapsed = collapse(
+            data, collapser=[
+                "mean", "std", "number", "min", "max", "median",
+                "test_range",
+            ]
+        )
 
+        checks = {
+            "mean": np.nanmean, "std": np.nanstd, "min": np.nanmin,
+            "max": np.nanmax, "median": np.nanmedian,
+            "test_range": lambda x: np.nanmax(x) - np.nanmin(x),
+        }
+        for i in range(3):
+            binned = values[secondary[primary == i]]
+            for name, func in checks.items():
+                for channel in range(2):
+                    result = collapsed[f"b/data_{name}"][i, channel]
+                    if np.isnan(binned[:, channel]).all():
+                        assert np.isnan(result)
+                    else:
+                        assert np.allclose(result, func(binned[:, channel]))
+            assert np.array_equal(
+                collapsed["b/data_number"][i],
+                np.count_nonzero(~np.isnan(binned), axis=0)
+            )
+
+        # Legacy collapser functions that work on a NaN-padded matrix:
+        collapsed = collapse(
+            data, collapser={"max": lambda m, a: np.nanmax(m, axis=a)}
+        )
+        assert np.allclose(
+            collapsed["b/data_max"], [[5., 8.], [2., np.nan], [9., 3.]],
+            equal_nan=True
+        )
@@ -0,0 +1,194 @@
+import datetime
+import os
+
+import numpy as np
+import pytest
+
+from typhon.datasets import dataset, filters
+
+
+class _GranuleDataset(dataset.Dataset):
+    """Granules of six hours in .npy files that overlap by one hour."""
+    name = "typhon_test_granules"
+    basedir = None
+    start_date = datetime.datetime(2000, 1, 1)
+    end_date = datetime.datetime(2000, 1, 3)
+
+    def find_granules(self, start=datetime.datetime.min,
+                      end=datetime.datetime.max, include_last_before=False,
+                      return_time=False):
+        for name in sorted(os.listdir(self.basedir)):
+            g_start = datetime.datetime.strptime(name, "%Y%m%d%H.npy")
+            if start - datetime.timedelta(hours=6) <= g_start < end:
+                path = os.path.join(self.basedir, name)
+                yield (g_start, path) if return_time else path
+
+    find_granules_sorted = find_granules
+
+    def find_most_recent_granule_before(self, instant, **locator_args):
+        raise NotImplementedError()
+
+    def _read(self, f, fields="all"):
+        return np.load(f), {}
+
+
+class _ScanDataset(_GranuleDataset):
+    """Records with the time in another field than "time"."""
+    name = "typhon_test_scans"
+    time_field = "scantime"
+    unique_fields = {"scantime", "lat", "lon"}
+
+
+class _DropSeenFilter(filters.OrbitFilter):
+    """Remove all records that are not later than any previous record."""
+
+    def reset(self):
+        self.latest = None
+
+    def filter(self, scanlines, **extra):
+        if self.latest is not None:
+            scanlines = scanlines[scanlines["time"] > self.latest]
+        if scanlines.size > 0:
+            self.latest = scanlines["time"].max()
+        return scanlines
+
+
+def _write_granules(directory):
+    dtype = [("time", "M8[s]"), ("lat", "f8"), ("lon", "f8"),
+             ("value", "f8")]
+    for i in range(8):
+        g_start = np.datetime64("2000-01-01T00") + np.timedelta64(5 * i, "h")
+        granule = np.zeros(7 * 60, dtype=dtype)
+        granule["time"] = g_start + np.arange(0, 7 * 3600, 60).astype(
+            "m8[s]")
+        granule["value"] = i
+        np.save(os.path.join(directory, "{:%Y%m%d%H}.npy".format(
+            g_start.astype(datetime.datetime))), granule)
+
+
+def _brute_force_join(left_keys, right_keys, timetol):
+    """All matching pairs, in the order sorted_merge_join returns them."""
+    (left_index, right_index) = np.indices(
+        (left_keys[0].size, right_keys[0].size)).reshape(2, -1)
+    matches = np.ones(left_index.size, dtype=bool)
+    for (left, right) in zip(left_keys, right_keys):
+        (left, right) = (left[left_index], right[right_index])
+        if left.dtype.kind == "M":
+            matches &= abs(left - right) < timetol
+        elif left.dtype.kind == "f":
+            matches &= np.isclose(left, right)
+        else:
+            matches &= left == right
+    (left_index, right_index) = (left_index[matches], right_index[matches])
+    order = np.lexsort(
+        (right_index, right_keys[0][right_index], left_index))
+    return (left_index[order], right_index[order])
+
+
+def _random_keys(rng, n, shift):
+    """Keys with repeated times and values, some out of the other's range"""
+    time = np.datetime64("2000-01-01T00:00:00", "ms") + (
+        rng.randint(0, 40, n) * 500 + shift).astype("m8[ms]")
+    lat = rng.choice([0., 1e-9, 0.5, 1.], n)
+    ids = rng.randint(0, 3, n)
+    return [time, lat, ids]
+
+
+class TestSortedMergeJoin:
+    """Testing the join against comparing all pairs."""
+
+    @pytest.mark.parametrize("timetol", [
+        np.timedelta64(1, "ms"), np.timedelta64(500, "ms"),
+        np.timedelta64(2, "s")])
+    @pytest.mark.parametrize("max_candidates", [1 << 24, 1, 7])
+    def test_like_brute_force(self, timetol, max_candidates, monkeypatch):
+        monkeypatch.setattr(dataset, "_MAX_CANDIDATES", max_candidates)
+        rng = np.random.RandomState(0)
+        for (n, m) in [(200, 150), (0, 10), (10, 0), (1, 1)]:
+            left = _random_keys(rng, n, 0)
+            right = _random_keys(rng, m, 3000)
+            (left_index, right_index) = dataset.sorted_merge_join(
+                left, right, timetol)
+            expected = _brute_force_join(left, right, timetol)
+            assert left_index.dtype == right_index.dtype == np.int64
+            np.testing.assert_array_equal(left_index, expected[0])
+            np.testing.assert_array_equal(right_index, expected[1])
+
+    def test_time_tolerance(self):
+        """Times match if they differ by less than timetol."""
+        left = [np.array(["2000-01-01T00:00:00"] * 3, dtype="M8[s]")]
+        right = [np.array(["2000-01-01T00:00:01", "1999-12-31T23:59:59.5",
+                           "2000-01-01T00:00:00.999"], dtype="M8[ms]")]
+        (left_index, right_index) = dataset.sorted_merge_join(
+            left, right, np.timedelta64(1, "s"))
+        np.testing.assert_array_equal(left_index, [0, 0, 1, 1, 2, 2])
+        np.testing.assert_array_equal(right_index, [1, 2, 1, 2, 1, 2])
+
+    def test_unmatched(self):
+        left = [np.array([1, 5, 3]), np.array([1., 2., 3.])]
+        right = [np.array([3, 3, 4, 1]), np.array([3., 3.1, 3., 1.])]
+        (left_index, right_index) = dataset.sorted_merge_join(left, right)
+        np.testing.assert_array_equal(left_index, [0, 2])
+        np.testing.assert_array_equal(right_index, [3, 0])
+
+    def test_number_of_keys(self):
+        with pytest.raises(ValueError):
+            dataset.sorted_merge_join([], [])
+        with pytest.raises(ValueError):
+            dataset.sorted_merge_join([np.arange(3)],
+                                      [np.arange(3), np.arange(3)])
+
+
+class TestDataset:
+    """Testing the reading of periods."""
+
+    def test_read_period_parallel(self, tmpdir):
+        """Parallel reading gives the same result as serial reading."""
+        _write_granules(str(tmpdir))
+        ds = _GranuleDataset(basedir=str(tmpdir))
+
+        periods = [
+            (datetime.datetime(2000, 1, 1, 3),
+             datetime.datetime(2000, 1, 2, 9)),
+            (datetime.datetime(2000, 1, 1, 2),
+             datetime.datetime(2000, 1, 2, 10)),
+        ]
+        for (start, end), max_workers in zip(periods, (2, 3)):
+            serial = ds.read_period(
+                start, end, orbit_filters=[_DropSeenFilter()],
+                enforce_no_duplicates=False)
+            parallel = ds.read_period(
+                start, end, orbit_filters=[_DropSeenFilter()],
+                enforce_no_duplicates=False, max_workers=max_workers)
+
+            # The stateful filter removes the overlaps of the granules:
+            assert (np.diff(serial["time"]) > np.timedelta64(0)).all()
+            assert serial["time"][0] == np.datetime64(start)
+            assert np.array_equal(serial, parallel)
+
+    def test_concatenate_granules(self):
+        """Granules are released after they were copied."""
+        ds = _GranuleDataset()
+        conts = [np.arange(3), np.arange(3, 5)]
+        arr = ds._concatenate_granules(conts, 5)
+        assert np.array_equal(arr, np.arange(5))
+        assert conts == [None, None]
+
+    def test_combine_indices_time_field(self):
+        """The default keys start with time_field."""
+        ds = _ScanDataset()
+        dtype = [("scantime", "M8[ms]"), ("lat", "f8"), ("lon", "f8")]
+        my_data = np.zeros(2, dtype=dtype)
+        my_data["scantime"] = np.datetime64("2000-01-01") \
+            + np.array([0, 10000]).astype("m8[ms]")
+        my_data["lat"] = [0, 1]
+        other_data = np.zeros(3, dtype=dtype)
+        other_data["scantime"] = np.datetime64("2000-01-01") \
+            + np.array([500, -500, 10000]).astype("m8[ms]")
+        other_data["lat"] = [0, 0, 2]
+
+        (my_index, other_index) = ds.combine_indices(my_data, other_data)
+
+        # Pairs are sorted by the first key of other_data:
+        np.testing.assert_array_equal(my_index, [0, 0])
+        np.testing.assert_array_equal(other_index, [1, 0])
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from typhon.datasets import filters
+
+
+class _FlagDataset:
+    """Stands in for a HIRS dataset: the flag score is a field"""
+
+    def flagscore(self, M):
+        return M["flags"] * 1.0
+
+
+class _PerSetFilter(filters.HIRSBestLineFilter):
+    """Overriding select_winner selects the winners one set at a time"""
+
+    def select_winner(self, rep):
+        return super().select_winner(rep)
+
+
+def _scanlines(masked, seed=0, n=300):
+    """Scanlines with many duplicate times and tied flag scores"""
+    rng = np.random.RandomState(seed)
+    arr = np.zeros(
+        n, dtype=[("time", "M8[ms]"), ("flags", "i4"), ("index", "i4")])
+    arr["time"] = np.datetime64("2000-01-01") \
+        + rng.randint(0, n // 3, n).astype("m8[s]")
+    arr["flags"] = rng.randint(0, 3, n)
+    arr["index"] = np.arange(n)
+    if masked:
+        arr = np.ma.masked_array(arr)
+        arr["flags"][rng.rand(n) < 0.2] = np.ma.masked
+    return arr
+
+
+class TestHIRSBestLineFilter:
+    @pytest.mark.parametrize("masked", [False, True])
+    @pytest.mark.parametrize("seed", range(3))
+    def test_finalise_like_per_set(self, masked, seed):
+        arr = _scanlines(masked, seed)
+        vectorised = filters.HIRSBestLineFilter(_FlagDataset()).finalise(
+            arr.copy())
+        per_set = _PerSetFilter(_FlagDataset()).finalise(arr.copy())
+
+        assert np.unique(arr["time"]).size < arr.size
+        np.testing.assert_array_equal(
+            vectorised["index"], per_set["index"])
+        np.testing.assert_array_equal(
+            vectorised["time"], np.unique(arr["time"]))
+
+    def test_finalise_selects_first_best(self):
+        arr = np.zeros(6, dtype=[("time", "M8[s]"), ("flags", "i4"),
+                                 ("index", "i4")])
+        arr["time"] = np.array([2, 1, 2, 1, 2, 3]).astype("M8[s]")
+        arr["flags"] = [1, 2, 0, 2, 0, 5]
+        arr["index"] = np.arange(6)
+
+        result = filters.HIRSBestLineFilter(_FlagDataset()).finalise(arr)
+
+        # Ties are won by the first scanline in time order:
+        np.testing.assert_array_equal(result["index"], [1, 2, 5])
+
+    def test_finalise_without_duplicates(self):
+        arr = _scanlines(False, n=10)[:1]
+
+        result = filters.HIRSBestLineFilter(_FlagDataset()).finalise(arr)
+
+        np.testing.assert_array_equal(result, arr)
@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+import pytest
+
+from typhon.datasets import tovs
+
+
+class _Decoder:
+    """Has the decoded cache of HIRS, but decodes without reading files."""
+    decoded_cache_version = tovs.HIRS.decoded_cache_version
+    _decoded_cache_path = tovs.HIRS._decoded_cache_path
+    _decode_cached = tovs.HIRS._decode_cached
+
+    def __init__(self, decoded_cache_dir):
+        self.decoded_cache_dir = decoded_cache_dir
+        self.decoded = 0
+
+    def _decode(self, path, apply_scale_factors, apply_calibration,
+                radiance_units):
+        self.decoded += 1
+        scanlines = np.ma.zeros(
+            5, dtype=[("time", "M8[ms]"), ("bt", "f4", (3,)),
+                      ("hrs_scnlin", "i4")])
+        scanlines["time"] = np.datetime64("2000-01-01") \
+            + np.arange(5).astype("m8[s]")
+        scanlines["bt"] = np.arange(15).reshape(5, 3)
+        scanlines["hrs_scnlin"] = np.arange(1, 6)
+        scanlines["bt"][1, 2] = np.ma.masked
+        scanlines["hrs_scnlin"][3] = np.ma.masked
+        scanlines.fill_value = ("1970-01-01", -999., -1)
+        header = np.zeros(1, dtype=[("hrs_h_scnlin", "i4")])
+        return (scanlines, header)
+
+
+@pytest.fixture
+def granule(tmpdir):
+    path = tmpdir.join("granule.l1b")
+    path.write_binary(b"\0" * 100)
+    return str(path)
+
+
+class TestHIRSDecodedCache:
+    """Testing the cache of decoded granules."""
+
+    def _read(self, decoder, path, radiance_units="si"):
+        return decoder._decode_cached(path, True, True, radiance_units)
+
+    def test_hit_like_fresh_decode(self, tmpdir, granule):
+        decoder = _Decoder(str(tmpdir.join("cache")))
+        (fresh, fresh_header) = decoder._decode(granule, True, True, "si")
+
+        (missed, _) = self._read(decoder, granule)
+        (hit, header) = self._read(decoder, granule)
+
+        assert decoder.decoded == 2  # once above and once for the miss
+        for scanlines in (missed, hit):
+            assert isinstance(scanlines, np.ma.MaskedArray)
+            assert scanlines.dtype == fresh.dtype
+            np.testing.assert_array_equal(
+                np.ma.getdata(scanlines), np.ma.getdata(fresh))
+            np.testing.assert_array_equal(
+                np.ma.getmaskarray(scanlines), np.ma.getmaskarray(fresh))
+            assert scanlines.fill_value == fresh.fill_value
+            np.testing.assert_array_equal(
+                scanlines.filled(), fresh.filled())
+        np.testing.assert_array_equal(header, fresh_header)
+
+    def test_hit_is_copy_on_write(self, tmpdir, granule):
+        decoder = _Decoder(str(tmpdir.join("cache")))
+        self._read(decoder, granule)
+
+        (hit, _) = self._read(decoder, granule)
+        hit["hrs_scnlin"] = 0
+        hit["bt"][0, 0] = np.ma.masked
+        (again, _) = self._read(decoder, granule)
+
+        assert decoder.decoded == 1
+        np.testing.assert_array_equal(
+            np.ma.getdata(again["hrs_scnlin"]), np.arange(1, 6))
+        assert not np.ma.getmaskarray(again["bt"])[0, 0]
+
+    def test_invalidation(self, tmpdir, granule):
+        decoder = _Decoder(str(tmpdir.join("cache")))
+        self._read(decoder, granule)
+        assert decoder.decoded == 1
+
+        # The options of the reader:
+        self._read(decoder, granule, radiance_units="ir")
+        assert decoder.decoded == 2
+
+        # The modification time of the granule:
+        stat = os.stat(granule)
+        os.utime(granule, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self._read(decoder, granule)
+        assert decoder.decoded == 3
+
+        # The size of the granule, with the same modification time:
+        stat = os.stat(granule)
+        with open(granule, "ab") as file:
+            file.write(b"\0")
+        os.utime(granule, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self._read(decoder, granule)
+        assert decoder.decoded == 4
+
+        # The version of the decoded content:
+        decoder.decoded_cache_version += 1
+        self._read(decoder, granule)
+        assert decoder.decoded == 5
+
+        # Nothing changed anymore:
+        self._read(decoder, granule)
+        assert decoder.decoded == 5
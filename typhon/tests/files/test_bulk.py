@@ -0,0 +1,113 @@
+import errno
+import os
+
+import pytest
+
+from typhon.files import BulkOperation
+
+
+def _write_files(directory, n):
+    sources = []
+    for i in range(n):
+        file = directory.join(f"{i}.txt")
+        file.write(str(i))
+        sources.append(str(file))
+    return sources
+
+
+class TestBulkOperation:
+    """Testing the bulk file operations."""
+
+    def test_move_copy_delete(self, tmpdir):
+        """Execute all actions and create the target directories."""
+        a, b, c = _write_files(tmpdir, 3)
+        operation = BulkOperation([
+            ("move", a, str(tmpdir.join("x", "y", "a.txt"))),
+            ("copy", b, str(tmpdir.join("x", "b.txt"))),
+            ("delete", c, None),
+        ])
+
+        progress = []
+        assert operation.run(
+            max_workers=2, progress=lambda *args: progress.append(args)) == 3
+        assert progress[-1] == (3, 3)
+
+        assert not os.path.exists(a)
+        assert tmpdir.join("x", "y", "a.txt").read() == "0"
+        assert tmpdir.join("x", "b.txt").read() == "1"
+        assert os.path.exists(b)
+        assert not os.path.exists(c)
+        assert not operation.pending
+
+    def test_dry_run(self, tmpdir, capsys):
+        """A dry run only prints the plan."""
+        source, = _write_files(tmpdir, 1)
+        target = str(tmpdir.join("new", "0.txt"))
+        BulkOperation([("move", source, target)]).run(dry_run=True)
+
+        assert capsys.readouterr().out \
+            == f"[Dry] Move '{source}' to '{target}'!\n"
+        assert os.path.exists(source)
+        assert not tmpdir.join("new").check()
+
+    def test_invalid_tasks(self):
+        with pytest.raises(ValueError):
+            BulkOperation([("rename", "a", "b")])
+        with pytest.raises(ValueError):
+            BulkOperation([("move", "a", None)])
+        with pytest.raises(ValueError):
+            BulkOperation([("delete", "a", "b")])
+
+    def test_resume(self, tmpdir):
+        """Continue an interrupted operation from its journal."""
+        sources = _write_files(tmpdir, 5)
+        journal = str(tmpdir.join("journal"))
+        target = tmpdir.mkdir("target")
+
+        def interrupt(done, total):
+            if done == 2:
+                raise KeyboardInterrupt
+
+        operation = BulkOperation(
+            [("move", source, str(target.join(os.path.basename(source))))
+             for source in sources],
+            journal=journal
+        )
+        with pytest.raises(KeyboardInterrupt):
+            operation.run(max_workers=1, progress=interrupt)
+
+        # Never overwrite the journal of another operation:
+        with pytest.raises(FileExistsError):
+            BulkOperation([("delete", sources[0], None)], journal).run()
+
+        resumed = BulkOperation.resume(journal)
+        assert len(resumed) == 5
+        assert len(resumed.pending) == 3
+        assert resumed.run(max_workers=2) == 3
+        assert sorted(os.listdir(str(target))) \
+            == [f"{i}.txt" for i in range(5)]
+        assert not BulkOperation.resume(journal).pending
+
+    def test_incomplete_journal(self, tmpdir):
+        journal = tmpdir.join("journal")
+        journal.write('{"action": "delete", "source": "a", "target": null}\n')
+        with pytest.raises(ValueError):
+            BulkOperation.resume(str(journal))
+
+    @pytest.mark.parametrize("verify", ["size", "checksum"])
+    def test_move_across_devices(self, tmpdir, monkeypatch, verify):
+        """Copy, verify and delete files that cannot be renamed."""
+        source, = _write_files(tmpdir, 1)
+        target = str(tmpdir.join("new", "0.txt"))
+        replace = os.replace
+
+        def cross_device_replace(src, dst):
+            if not src.endswith(".part"):
+                raise OSError(errno.EXDEV, "Invalid cross-device link")
+            replace(src, dst)
+
+        monkeypatch.setattr(os, "replace", cross_device_replace)
+        BulkOperation([("move", source, target)]).run(verify=verify)
+
+        assert not os.path.exists(source)
+        assert sorted(os.listdir(str(tmpdir.join("new")))) == ["0.txt"]
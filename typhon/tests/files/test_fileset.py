@@ -1,10 +1,13 @@
 from os.path import dirname, join
 
 import datetime
+import os
+from sys import version_info
 import numpy as np
 import pytest
 
 from typhon.files import FileHandler, FileInfo, FileSet, FileSetManager
+from typhon.files.fileset import _worker_contexts
 from typhon.files.utils import get_testfiles_directory
 
 
@@ -432,6 +435,46 @@ class TestFileSet:
             ]
             assert np.allclose(results, check)
 
+    def test_map_worker_context(self, tmpdir):
+        """Test whether the worker context is passed to each call."""
+        for name in ["a.txt", "b.txt", "c.txt"]:
+            tmpdir.join(name).write(name)
+        fileset = FileSet(join(str(tmpdir), "{name}.txt"))
+
+        context = {"offset": np.arange(3)}
+        results = fileset.map(
+            TestFileSet._map_with_context, kwargs={"factor": 2},
+            worker_context=context, worker_type="thread", max_workers=2,
+        )
+        assert sorted(results) == [("a", 2), ("b", 2), ("c", 2)]
+
+        # The process workers get the context once when they start and the
+        # tasks carry only its handle (Python 3.7+). Hence, each call gets
+        # the very object stored in the worker:
+        results = fileset.map(
+            TestFileSet._map_with_context_in_process, kwargs={"factor": 2},
+            worker_context=context, worker_type="process", max_workers=2,
+        )
+        assert sorted(result[:2] for result in results) \
+            == [("a", 2), ("b", 2), ("c", 2)]
+        for _, _, pid, from_worker in results:
+            assert pid != os.getpid()
+            assert from_worker or version_info < (3, 7)
+        assert not _worker_contexts
+
+    @staticmethod
+    def _map_with_context(file_info, factor, offset):
+        return file_info.attr["name"], offset.sum() // 3 * factor
+
+    @staticmethod
+    def _map_with_context_in_process(file_info, factor, offset):
+        from_worker = any(
+            offset is context["offset"]
+            for context in _worker_contexts.values()
+        )
+        return (*TestFileSet._map_with_context(file_info, factor, offset),
+                os.getpid(), from_worker)
+
     @staticmethod
     def _tutorial_map(file_info):
         return file_info.attr["satellite"]
@@ -727,3 +770,64 @@ class TestFileSet:
         return "FileInfo(\n\t{}, \t{}, \t{}),".format(
             path, repr(file_info.times), repr(file_info.attr)
         )
+
+    def test_move_journal_of_other_operation(self, tmpdir):
+        """An interrupted journal is only resumed by the same operation."""
+        for day in (1, 2, 3):
+            tmpdir.join(f"old-2018-01-0{day}.txt").write(str(day))
+        fileset = FileSet(join(str(tmpdir), "old-{year}-{month}-{day}.txt"))
+        journal = join(str(tmpdir), "journal")
+        target = join(str(tmpdir), "new", "{year}", "{doy}.txt")
+
+        def interrupt(done, total):
+            raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            fileset.move(target, journal=journal, progress=interrupt,
+                         max_workers=1)
+
+        with pytest.raises(ValueError):
+            fileset.delete(journal=journal, verbose=False)
+        with pytest.raises(ValueError):
+            fileset.move(target, journal=journal, copy=True)
+        with pytest.raises(ValueError):
+            fileset.move(join(str(tmpdir), "other", "{year}", "{doy}.txt"),
+                         journal=journal)
+        assert not tmpdir.join("other").check()
+
+        fileset.move(target, journal=journal)
+        assert not list(fileset.find(no_files_error=False))
+        assert len(list(FileSet(target).find())) == 3
+
+    def test_move_and_delete(self, tmpdir):
+        """Move, copy and delete the files of a fileset."""
+        for day in (1, 2, 3):
+            tmpdir.join(f"old-2018-01-0{day}.txt").write(str(day))
+        fileset = FileSet(join(str(tmpdir), "old-{year}-{month}-{day}.txt"))
+        journal = join(str(tmpdir), "journal")
+
+        moved = fileset.move(
+            join(str(tmpdir), "new", "{year}", "{doy}.txt"),
+            journal=journal, start="2018-01-02"
+        )
+        assert sorted(f.path for f in moved.find()) == [
+            join(str(tmpdir), "new", "2018", f"00{day}.txt") for day in (2, 3)
+        ]
+        assert [f.path for f in fileset.find()] \
+            == [join(str(tmpdir), "old-2018-01-01.txt")]
+
+        # The finished journal is neither applied again nor ignored:
+        with pytest.raises(ValueError):
+            fileset.move(
+                join(str(tmpdir), "other", "{year}", "{doy}.txt"),
+                journal=journal
+            )
+        assert not tmpdir.join("other").check()
+
+        copied = moved.move(
+            join(str(tmpdir), "copy", "{year}", "{doy}.txt"), copy=True)
+        assert len(list(copied.find())) == 2
+        assert len(list(moved.find())) == 2
+
+        copied.delete(verbose=False, max_workers=2)
+        assert not list(copied.find(no_files_error=False))
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Testing the OEM diagnostics for stacked Jacobians.
+"""
+import numpy as np
+import pytest
+import scipy.sparse
+
+from typhon import oem
+from typhon.arts.covariancematrix import Block, CovarianceMatrix
+
+
+def _covariances(random, size, as_covariance_matrix):
+    """Positive-definite matrix, optionally with a dense and a sparse block
+    """
+    a = random.normal(size=(size - 2, size - 2))
+    dense = a @ a.T + np.eye(size - 2)
+    diagonal = np.array([0.5, 2.0])
+    if as_covariance_matrix:
+        return CovarianceMatrix([
+            Block(0, 0, 0, 0, False, dense),
+            Block(1, 1, size - 2, size - 2, False,
+                  scipy.sparse.diags(diagonal)),
+        ])
+    S = np.zeros((size, size))
+    S[:-2, :-2] = dense
+    S[-2:, -2:] = np.diag(diagonal)
+    return S
+
+
+class TestBatchDiagnostics:
+    n, m, k = 7, 6, 5
+
+    def setup_method(self):
+        self.random = np.random.RandomState(0)
+        self.K = self.random.normal(size=(self.n, self.m, self.k))
+
+    def _diagnostics(self, covariance_matrices):
+        S_a = _covariances(self.random, self.k, covariance_matrices)
+        S_y = _covariances(self.random, self.m, covariance_matrices)
+        return S_a, S_y, oem.BatchDiagnostics(S_a, S_y)
+
+    @pytest.mark.parametrize("covariance_matrices", [False, True])
+    @pytest.mark.parametrize("name", [
+        "error_covariance_matrix",
+        "retrieval_gain_matrix",
+        "averaging_kernel_matrix",
+    ])
+    def test_like_single_retrievals(self, name, covariance_matrices):
+        """Same matrices as the functions for one retrieval."""
+        S_a, S_y, diagnostics = self._diagnostics(covariance_matrices)
+
+        result = getattr(diagnostics, name)(self.K)
+
+        expected = [getattr(oem, name)(K, S_a, S_y) for K in self.K]
+        assert np.allclose(result, expected, rtol=1e-10, atol=1e-12)
+
+    @pytest.mark.parametrize("covariance_matrices", [False, True])
+    def test_retrieval_noise(self, covariance_matrices):
+        S_a, S_y, diagnostics = self._diagnostics(covariance_matrices)
+        e_y = self.random.normal(size=(self.n, self.m))
+
+        for errors in [e_y, e_y[0]]:
+            result = diagnostics.retrieval_noise(self.K, errors)
+
+            expected = [
+                oem.retrieval_noise(K, S_a, S_y, e)
+                for K, e in zip(self.K, np.broadcast_to(errors, e_y.shape))
+            ]
+            assert np.allclose(result, expected, rtol=1e-10, atol=1e-12)
+
+    def test_jacobian_dimensions(self):
+        _, _, diagnostics = self._diagnostics(False)
+
+        with pytest.raises(ValueError):
+            diagnostics.error_covariance_matrix(self.K[0])
@@ -3,6 +3,7 @@
 """
 import numpy as np
 import pytest
+import xarray as xr
 
 from typhon.physics import atmosphere
 
@@ -46,6 +47,41 @@ class TestAtmosphere:
 
         assert np.allclose(iwv, np.repeat(43.8845, 5))
 
+    def test_integrate_water_vapor_fields(self):
+        """Test IWV of 3-D fields along different axes and in chunks."""
+        p = np.linspace(1000e2, 500e2, 10)
+        T = np.linspace(288, 250, p.size)
+        z = np.linspace(0, 5000, p.size)
+        vmr = np.linspace(0.025, 0.0025, p.size)
+        scale = np.arange(1, 7).reshape(2, 3)
+        vmr_field = vmr[:, np.newaxis, np.newaxis] * scale / 6
+        T_field = np.broadcast_to(T[:, np.newaxis, np.newaxis], vmr_field.shape)
+
+        reference = np.array([
+            [atmosphere.integrate_water_vapor(vmr * s / 6, p) for s in row]
+            for row in scale
+        ])
+        iwv = atmosphere.integrate_water_vapor(vmr_field, p, chunksize=4)
+        assert np.allclose(iwv, reference)
+
+        iwv = atmosphere.integrate_water_vapor(
+            np.moveaxis(vmr_field, 0, -1), p, axis=-1)
+        assert np.allclose(iwv, reference)
+
+        iwv = atmosphere.integrate_water_vapor(
+            xr.DataArray(vmr_field, dims=('level', 'lat', 'lon')), p,
+            axis='level')
+        assert iwv.dims == ('lat', 'lon')
+        assert np.allclose(iwv, reference)
+
+        reference = np.array([
+            [atmosphere.integrate_water_vapor(vmr * s / 6, p, T, z)
+             for s in row]
+            for row in scale
+        ])
+        iwv = atmosphere.integrate_water_vapor(vmr_field, p, T_field, z)
+        assert np.allclose(iwv, reference)
+
     def test_vmr2relative_humidity(self):
         """Test conversion from VMR into relative humidity."""
         rh = atmosphere.vmr2relative_humidity(0.025, 1013e2, 300)
@@ -69,6 +105,20 @@ class TestAtmosphere:
 
         assert np.allclose(vmr, 0.025)
 
+    def test_moist_lapse_rate_fused(self):
+        """Test the compiled lapse rate against the generic formula."""
+        from typhon.physics import e_eq_water_mk
+
+        p = np.linspace(1000e2, 500e2, 10)
+        T = np.linspace(300, 250, p.size)
+        out = np.empty_like(T)
+
+        gamma = atmosphere.moist_lapse_rate(p, T, out=out)
+
+        assert gamma is out
+        assert np.allclose(
+            gamma, atmosphere.moist_lapse_rate(p, T, e_eq=e_eq_water_mk))
+
     def test_moist_lapse_rate(self):
         """Test calculation of moist-adiabatic lapse rate."""
         gamma = atmosphere.moist_lapse_rate(1000e2, 300)
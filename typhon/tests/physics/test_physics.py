@@ -151,3 +151,70 @@ class TestThermodynamics:
         """Test conversion of VMR to specific humidity."""
         q = physics.vmr2specific_humidity(0.04)
         assert np.isclose(q, 0.025261087474946833)
+
+
+class TestChannelIntegrator:
+    """Testing typhon.physics.units.em.ChannelIntegrator."""
+    def test_integrate(self):
+        """Compare batched integration against SRF.integrate_radiances."""
+        from typhon.physics.units.common import ureg
+        from typhon.physics.units.em import ChannelIntegrator, SRF
+
+        srfs = [
+            SRF(ureg.Quantity(np.linspace(f0, f0 + 0.5, 6), "GHz"),
+                np.array([0, 0.5, 1, 1, 0.5, 0]))
+            for f0 in (200, 200.3, 201)
+        ]
+        f = ureg.Quantity(np.linspace(199, 202, 301), "GHz").to("Hz")
+        L = ureg.Quantity(
+            np.random.RandomState(0).rand(7, f.size) * 1e-15,
+            "W / (m**2 * sr * Hz)")
+
+        for spectral in (True, False):
+            integrator = ChannelIntegrator(srfs, f, spectral=spectral)
+            result = integrator.integrate(L, chunksize=3)
+            for i, srf in enumerate(srfs):
+                check = srf.integrate_radiances(f, L, spectral=spectral)
+                assert np.allclose(
+                    result[:, i].m, check.to(result.u).m, rtol=1e-10)
+
+        # Plain ndarrays are handled without units:
+        assert np.allclose(integrator.integrate(L.m[0]), result[0].m)
+
+
+class TestSRF:
+    """Testing typhon.physics.units.em.SRF."""
+    def test_channel_radiance2bt(self, tmpdir):
+        """Round trip of brightness temperatures through the lookup table."""
+        from typhon.physics.units import em
+        from typhon.physics.units.common import ureg
+
+        srfs = [
+            em.SRF(ureg.Quantity(np.linspace(wl, wl + 0.5, 6), "um"),
+                   np.array([0, 0.5, 1, 1, 0.5, 0]))
+            for wl in (6.5, 11)
+        ]
+        T = ureg.Quantity(np.array([[200., 210.], [250., 260.]]), "K")
+        L = ureg.Quantity(np.stack(
+            [srf.blackbody_radiance(T[:, i]) for i, srf in enumerate(srfs)],
+            axis=-1))
+        assert np.allclose(em.channel_radiances2bt(L, srfs).m, T.m,
+                           atol=0.01)
+        assert np.allclose(em.channel_radiances2bt(L.m, srfs), T.m,
+                           atol=0.01)
+        assert np.allclose(L[:, 0].to("K", "radiance", srf=srfs[0]).m,
+                           T[:, 0].m, atol=0.01)
+
+        # A new SRF object with a persistent cache gets the same table:
+        em.SRF.lookup_table_cache_dir = str(tmpdir)
+        try:
+            em._lookup_tables.clear()
+            srf = em.SRF(srfs[0].frequency, srfs[0].W)
+            srf.make_lookup_table()
+            assert len(tmpdir.listdir()) == 1
+            em._lookup_tables.clear()
+            srf = em.SRF(srfs[0].frequency, srfs[0].W)
+            srf.make_lookup_table()
+            assert np.array_equal(srf.lookup_table, srfs[0].lookup_table)
+        finally:
+            em.SRF.lookup_table_cache_dir = None
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""Testing the functions in typhon.plots.maps.
+"""
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+pytest.importorskip("cartopy")
+
+from typhon.plots import maps  # noqa
+
+
+class TestWorldmap:
+    """Testing the world map."""
+
+    @pytest.mark.parametrize("aggregate, var, reduction", [
+        (True, False, "count"),
+        (True, True, "mean"),
+        ("max", True, "max"),
+    ])
+    def test_aggregate(self, monkeypatch, aggregate, var, reduction):
+        """Points are binned into one raster and drawn as image."""
+        rasters = []
+
+        class Raster(maps.RasterAccumulator):
+            def draw(self, ax=None, reduction="count", **kwargs):
+                rasters.append((self, reduction))
+                return super().draw(ax, reduction, **kwargs)
+
+        monkeypatch.setattr(maps, "RasterAccumulator", Raster)
+        lat = np.random.uniform(-60, 60, 1000)
+        lon = np.random.uniform(-150, 150, 1000)
+        values = np.random.randn(1000) if var else None
+
+        fig = plt.figure()
+        image = maps.worldmap(lat, lon, values, fig=fig, aggregate=aggregate,
+                              bins=(30, 12))
+
+        (raster, used_reduction), = rasters
+        assert used_reduction == reduction
+        assert image.axes in fig.axes
+        assert raster.shape == (12, 30)
+        assert raster.extent == (lon.min(), lon.max(), lat.min(), lat.max())
+        assert raster.get("count").sum() == lat.size
+        if var:
+            assert np.nanmax(raster.get("max")) == values.max()
+        plt.close(fig)
@@ -3,6 +3,9 @@
 """
 import os
 
+from matplotlib.colors import LogNorm
+import matplotlib.pyplot as plt
+import numpy as np
 import pytest
 
 from typhon import plots
@@ -40,3 +43,55 @@ class TestPlots:
         assert isinstance(style_paths, list)
         assert len(style_paths) > 0
         assert all(os.path.isfile(plots.styles(s)) for s in style_paths)
+
+
+class TestRasterAccumulator:
+    """Testing the RasterAccumulator."""
+    def test_reductions(self):
+        """Compare the reductions with numpy.histogram2d."""
+        x = np.random.uniform(-1, 1, 1000)
+        y = np.random.uniform(0, 2, 1000)
+        values = np.random.randn(1000)
+        values[:10] = np.nan
+        x[10:20] = np.nan
+
+        raster = plots.RasterAccumulator((-1, 1), (0, 2), bins=(8, 4))
+        raster.add(x[:500], y[:500], values[:500])
+        other = plots.RasterAccumulator((-1, 1), (0, 2), bins=(8, 4))
+        other.add(x[500:], y[500:], values[500:])
+        raster.merge(other)
+
+        valid = ~np.isnan(values) & ~np.isnan(x)
+        bins = (np.linspace(0, 2, 5), np.linspace(-1, 1, 9))
+        count, _, _ = np.histogram2d(y[valid], x[valid], bins)
+        total, _, _ = np.histogram2d(
+            y[valid], x[valid], bins, weights=values[valid])
+
+        assert np.array_equal(raster.get("count"), count)
+        assert np.allclose(raster.get("sum"), total)
+        assert np.allclose(raster.get("mean"), total / count)
+        assert np.isnan(raster.get("mean", mincnt=count.max() + 1)).all()
+
+        iy = np.digitize(y[valid], bins[0][1:-1])
+        ix = np.digitize(x[valid], bins[1][1:-1])
+        minimum = np.full(count.shape, np.inf)
+        maximum = np.full(count.shape, -np.inf)
+        np.minimum.at(minimum, (iy, ix), values[valid])
+        np.maximum.at(maximum, (iy, ix), values[valid])
+        assert np.array_equal(raster.get("min"), minimum)
+        assert np.array_equal(raster.get("max"), maximum)
+
+    def test_scatter_density_plot_matrix(self):
+        """Only keywords that imshow understands are taken from hexbin_kw."""
+        x = np.random.randn(1000)
+        fig = plots.scatter_density_plot_matrix(
+            x=x, y=x + np.random.randn(x.size), aggregate=True,
+            hexbin_kw={"mincnt": 1, "cmap": "viridis", "gridsize": (10, 5),
+                       "bins": "log", "linewidths": 0.2,
+                       "edgecolors": "none", "xscale": "linear"})
+
+        image = fig.axes[1].get_images()[0]
+        assert image.get_array().shape == (5, 10)
+        assert isinstance(image.norm, LogNorm)
+        assert image.get_cmap().name == "viridis"
+        plt.close(fig)
@@ -0,0 +1,151 @@
+import warnings
+
+import numpy as np
+import pytest
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.neural_network import MLPRegressor
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import RobustScaler
+from sklearn.tree import DecisionTreeClassifier
+import xarray as xr
+
+# typhon.retrieval imports the plotting functions of typhon.plots.maps:
+pytest.importorskip("cartopy")
+
+from typhon.geographical import RasterLookup  # noqa
+from typhon.retrieval import SPAREICE  # noqa
+
+
+# The inputs of the standard parameters:
+IWP_INPUTS = [
+    "mhs_channel1", "mhs_channel2", "mhs_channel3", "mhs_channel4",
+    "mhs_channel5", "avhrr_tir_diff", "lat", "sea_mask", "elevation",
+    "mhs_scnpos", "solar_azimuth_angle", "solar_zenith_angle",
+    "avhrr_channel3", "avhrr_channel4", "avhrr_channel5",
+    "avhrr_channel5_std", "mhs_diff",
+]
+ICE_CLOUD_INPUTS = [
+    "mhs_channel2", "mhs_channel3", "mhs_channel4", "mhs_channel5",
+    "solar_azimuth_angle", "solar_zenith_angle", "avhrr_channel2",
+    "avhrr_channel3", "avhrr_channel5", "avhrr_channel2_std",
+    "avhrr_channel5_std", "avhrr_tir_diff", "mhs_diff", "lat", "elevation",
+]
+
+
+def _collocations(n=2000, seed=0):
+    """Collapsed MHS-AVHRR collocations with some missing values"""
+    random = np.random.RandomState(seed)
+
+    def channels(low, high):
+        return random.uniform(low, high, (n, 5)).astype("f4")
+
+    mhs = channels(200, 280)
+    avhrr = channels(200, 300)
+    avhrr_std = channels(0, 5)
+    # Missing inputs, also in fields that are only used for derived fields:
+    avhrr[random.rand(n) < 0.05, 2] = np.nan
+    mhs[random.rand(n) < 0.02, 4] = np.nan
+
+    dims = ("collocation",)
+    return xr.Dataset({
+        "MHS/Data/btemps": (dims + ("MHS/channel",), mhs),
+        "AVHRR/Data/btemps_mean": (dims + ("AVHRR/channel",), avhrr),
+        "AVHRR/Data/btemps_std": (dims + ("AVHRR/channel",), avhrr_std),
+        "MHS/scnpos": (dims, random.randint(1, 91, n).astype("f4")),
+        "MHS/Geolocation/Solar_azimuth_angle":
+            (dims, random.uniform(-180, 180, n).astype("f4")),
+        "MHS/Geolocation/Solar_zenith_angle":
+            (dims, random.uniform(0, 180, n).astype("f4")),
+        "lat": (dims, random.uniform(-89, 89, n)),
+        "lon": (dims, random.uniform(-180, 180, n)),
+        "time": (dims, np.datetime64("2010-01-01")
+                 + np.arange(n).astype("m8[s]")),
+    })
+
+
+def _standardized(spareice, collocations):
+    """The inputs, lon and time as DataFrame without rows with NaNs"""
+    return spareice.standardize_collocations(
+        collocations, fields=IWP_INPUTS + ICE_CLOUD_INPUTS + ["lon", "time"]
+    ).dropna()
+
+
+@pytest.fixture(scope="module")
+def spareice():
+    """SPARE-ICE trained on synthetic data with the standard inputs"""
+    random = np.random.RandomState(1)
+    with warnings.catch_warnings():
+        # The standard parameters may not fit the installed scikit-learn:
+        warnings.simplefilter("ignore")
+        spareice = SPAREICE(verbose=0)
+    spareice.sea_mask = RasterLookup(random.rand(19, 37) > 0.5)
+    spareice.elevation_grid = RasterLookup(
+        random.uniform(-2000, 4000, (19, 37)))
+
+    data = _standardized(spareice, _collocations(seed=1))
+    data["iwp"] = (data["mhs_channel3"] - data["mhs_channel5"]) / 20 \
+        + data["sea_mask"]
+    data["ice_cloud"] = data["iwp"] > 0
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", ConvergenceWarning)
+        spareice.train(
+            data, IWP_INPUTS, ICE_CLOUD_INPUTS,
+            iwp_model=make_pipeline(
+                RobustScaler(),
+                MLPRegressor((5,), max_iter=100, random_state=0)),
+            ice_cloud_model=DecisionTreeClassifier(
+                max_depth=5, random_state=0),
+        )
+    return spareice
+
+
+class TestSPAREICE:
+    def test_standardize_inputs(self, spareice):
+        """The matrix holds the same rows as the DataFrame without NaNs"""
+        collocations = _collocations()
+        expected = _standardized(spareice, collocations)
+
+        matrix, valid = spareice.standardize_inputs(collocations)
+
+        assert matrix.dtype == np.float32 and matrix.flags.c_contiguous
+        assert 0 < valid.sum() < valid.size
+        np.testing.assert_array_equal(
+            np.flatnonzero(valid), expected.index.values)
+        np.testing.assert_allclose(
+            matrix[valid],
+            expected[spareice.input_layout].to_numpy(dtype="f8"), rtol=1e-6)
+
+    def test_retrieve_matrix(self, spareice):
+        """Same retrievals as from the DataFrame"""
+        collocations = _collocations()
+        data = _standardized(spareice, collocations)
+        expected = spareice.retrieve(data)
+
+        matrix, valid = spareice.standardize_inputs(collocations)
+        iwp, ice_cloud = spareice.retrieve_matrix(matrix[valid])
+
+        np.testing.assert_allclose(iwp, expected["iwp"], rtol=1e-4)
+        np.testing.assert_array_equal(ice_cloud, expected["ice_cloud"])
+
+    def test_retrieve_from_collocations(self, spareice):
+        collocations = _collocations()
+        data = _standardized(spareice, collocations)
+        # Points without geolocation are dropped:
+        collocations["lat"][:3] = np.nan
+        data = data[data.index >= 3]
+        expected = spareice.retrieve(data)
+
+        retrieved = SPAREICE._retrieve_from_collocations(
+            collocations, None, spareice)
+
+        np.testing.assert_array_equal(
+            retrieved["index"].values, data.index.values)
+        for field in ["lat", "lon", "time"]:
+            np.testing.assert_array_equal(
+                retrieved[field].values, data[field].values)
+        np.testing.assert_array_equal(
+            retrieved["scnpos"].values, data["mhs_scnpos"].values)
+        np.testing.assert_allclose(
+            retrieved["iwp"].values, expected["iwp"], rtol=1e-4)
+        np.testing.assert_array_equal(
+            retrieved["ice_cloud"].values, expected["ice_cloud"])
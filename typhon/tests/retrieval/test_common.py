@@ -0,0 +1,79 @@
+from os.path import join
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.neural_network import MLPRegressor
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeRegressor
+
+# typhon.retrieval imports the plotting functions of typhon.plots.maps:
+pytest.importorskip("cartopy")
+
+from typhon.retrieval import RetrievalProduct  # noqa
+
+
+def _trained_product(estimator):
+    random = np.random.RandomState(0)
+    inputs = pd.DataFrame(
+        random.normal(size=(200, 2)) * [1., 10.] + [5., -3.],
+        columns=["a", "b"]
+    )
+    targets = pd.DataFrame({"y": inputs["a"] - 0.2 * inputs["b"]})
+
+    product = RetrievalProduct()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", ConvergenceWarning)
+        product.train(estimator, inputs, targets)
+    return product, inputs
+
+
+class TestRetrievalProduct:
+    """Testing the storage and the compilation of retrieval products."""
+
+    @pytest.mark.parametrize("estimator", [
+        make_pipeline(StandardScaler(), MLPRegressor(
+            hidden_layer_sizes=(4,), max_iter=20, random_state=0)),
+        make_pipeline(StandardScaler(with_mean=False),
+                      DecisionTreeRegressor(max_depth=4, random_state=0)),
+        DecisionTreeRegressor(max_depth=4, random_state=0),
+    ])
+    def test_npz(self, tmpdir, estimator):
+        """Save to and load from a npz file."""
+        product, inputs = _trained_product(estimator)
+        filename = join(str(tmpdir), "product.npz")
+        product.to_npz(filename)
+        loaded = RetrievalProduct.from_npz(filename)
+
+        assert loaded.inputs == product.inputs
+        assert loaded.outputs == product.outputs
+        assert np.array_equal(
+            loaded.retrieve_array(inputs.values),
+            product.retrieve_array(inputs.values)
+        )
+
+    def test_tree_without_n_features(self):
+        """Load trees saved by scikit-learn 1.2, which has no n_features_."""
+        product, inputs = _trained_product(
+            DecisionTreeRegressor(max_depth=4, random_state=0))
+        tree = product.estimator
+        dictionary = RetrievalProduct._model_to_dict(tree, encode=False)
+        dictionary["coefs"].pop("n_features_", None)
+        loaded = RetrievalProduct._model_from_dict(dictionary)
+
+        assert np.array_equal(
+            loaded.predict(inputs.values), tree.predict(inputs.values))
+
+    def test_compile(self):
+        """Compiled retrievals match the ones of scikit-learn."""
+        product, inputs = _trained_product(make_pipeline(
+            StandardScaler(with_mean=False),
+            DecisionTreeRegressor(max_depth=4, random_state=0)
+        ))
+        expected = product.retrieve_array(inputs.values)
+        product.compile()
+
+        assert np.array_equal(product.retrieve_array(inputs.values), expected)
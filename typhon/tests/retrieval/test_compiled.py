@@ -0,0 +1,93 @@
+import warnings
+
+import numpy as np
+import pytest
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.linear_model import LinearRegression
+from sklearn.neural_network import MLPClassifier, MLPRegressor
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import MinMaxScaler, RobustScaler, StandardScaler
+from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
+
+# typhon.retrieval imports the plotting functions of typhon.plots.maps:
+pytest.importorskip("cartopy")
+
+from typhon.retrieval.compiled import CompiledEstimator  # noqa
+
+
+def _training_data():
+    random = np.random.RandomState(0)
+    # Features with offsets and scales far from zero and one, so that wrong
+    # scaling coefficients change the predictions:
+    inputs = random.normal(size=(300, 3)) * [1., 10., 100.] + [50., -20., 5.]
+    targets = np.stack([
+        inputs[:, 0] + 0.1 * inputs[:, 1],
+        np.sin(inputs[:, 2] / 100.),
+    ], axis=1)
+    return inputs, targets
+
+
+def _fit(model, inputs, targets):
+    with warnings.catch_warnings():
+        # Few iterations are enough for the comparison:
+        warnings.simplefilter("ignore", ConvergenceWarning)
+        return model.fit(inputs, targets)
+
+
+SCALERS = [
+    [],
+    [StandardScaler()],
+    [StandardScaler(with_mean=False)],
+    [StandardScaler(with_std=False)],
+    [RobustScaler()],
+    [RobustScaler(with_centering=False)],
+    [RobustScaler(with_scaling=False)],
+    [MinMaxScaler(), StandardScaler()],
+]
+
+
+class TestCompiledEstimator:
+    """Compare the compiled estimators with scikit-learn."""
+
+    @pytest.mark.parametrize("scalers", SCALERS)
+    def test_mlp_regressor(self, scalers):
+        inputs, targets = _training_data()
+        model = make_pipeline(*scalers, MLPRegressor(
+            hidden_layer_sizes=(8,), max_iter=50, random_state=0))
+        _fit(model, inputs, targets)
+
+        assert np.allclose(
+            CompiledEstimator(model).predict(inputs), model.predict(inputs),
+            rtol=1e-4, atol=1e-3 * np.abs(targets).max()
+        )
+
+    @pytest.mark.parametrize("scalers", SCALERS)
+    def test_tree_regressor(self, scalers):
+        inputs, targets = _training_data()
+        model = make_pipeline(
+            *scalers, DecisionTreeRegressor(max_depth=6, random_state=0))
+        model.fit(inputs, targets[:, 0])
+
+        predictions = CompiledEstimator(model).predict(inputs)
+        assert predictions.shape == (inputs.shape[0],)
+        assert np.array_equal(predictions, model.predict(inputs))
+
+    @pytest.mark.parametrize("model", [
+        DecisionTreeClassifier(max_depth=4, random_state=0),
+        MLPClassifier(hidden_layer_sizes=(8,), max_iter=200, random_state=0),
+    ])
+    def test_classifier(self, model):
+        inputs, targets = _training_data()
+        labels = np.digitize(targets[:, 0], [45., 50., 55.])
+        model = make_pipeline(StandardScaler(with_mean=False), model)
+        _fit(model, inputs, labels)
+
+        compiled = CompiledEstimator(model).predict(inputs)
+        # Only samples right at the decision boundary of the perceptron may
+        # differ due to the single precision:
+        assert np.mean(compiled == model.predict(inputs)) > 0.99
+
+    def test_unsupported(self):
+        inputs, targets = _training_data()
+        with pytest.raises(ValueError):
+            CompiledEstimator(LinearRegression().fit(inputs, targets))
@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+
+# typhon.retrieval imports the plotting functions of typhon.plots.maps:
+pytest.importorskip("cartopy")
+
+from typhon.retrieval import mcmc  # noqa
+from typhon.retrieval.mcmc.mcmc import variogram  # noqa
+
+
+def _chains(m=4, n=200, p=2, phi=0.7, seed=0):
+    """AR(1) chains with different offsets and correlations."""
+    random = np.random.RandomState(seed)
+    noise = random.normal(size=(m, n, p))
+    chains = np.zeros((m, n, p))
+    for i in range(1, n):
+        chains[:, i] = phi * chains[:, i - 1] + noise[:, i]
+    return chains + 0.2 * np.arange(m)[:, None, None]
+
+
+def _direct_r_factor(s):
+    """Formulas (11.2) - (11.4) in Gelman et al., BDA3."""
+    m, n = s.shape
+    means = s.mean(axis=1)
+    b = n / (m - 1) * np.sum((means - means.mean())**2)
+    w = np.mean(np.sum((s - means[:, None])**2, axis=1) / (n - 1))
+    return np.sqrt(((n - 1) / n * w + b / n) / w), (n - 1) / n * w + b / n
+
+
+def _direct_variogram(s, t):
+    """Formula (11.7) in Gelman et al., BDA3."""
+    m, n = s.shape
+    return sum(
+        np.sum((s[j, t:] - s[j, :n - t])**2) for j in range(m)
+    ) / (m * (n - t))
+
+
+def _direct_ess(s):
+    """Formula (11.8) in Gelman et al., BDA3."""
+    m, n = s.shape
+    _, var_p = _direct_r_factor(s)
+    rho = [1 - _direct_variogram(s, t) / (2 * var_p)
+           for t in range(n // 2)]
+    total = 0.
+    for t in range(1, n // 2):
+        total += rho[t]
+        # Stop at the first odd T with rho[T + 1] + rho[T + 2] < 0:
+        if t % 2 == 1 and t + 2 < n // 2 and rho[t + 1] + rho[t + 2] < 0:
+            break
+    return m * n / (1 + 2 * total)
+
+
+class TestDiagnostics:
+    """Compare the MCMC diagnostics with the formulas of Gelman et al."""
+
+    def test_r_factor(self):
+        chains = np.array([[0., 1., 2., 3.], [1., 2., 3., 4.]])
+        assert np.isclose(mcmc.r_factor(chains), np.sqrt(1.05))
+        assert np.isclose(mcmc.r_factor(list(chains)), np.sqrt(1.05))
+
+        chains = _chains()
+        r = mcmc.r_factor(chains)
+        assert r.shape == (2,)
+        for i in range(2):
+            assert np.isclose(r[i], _direct_r_factor(chains[..., i])[0])
+            assert np.isclose(
+                mcmc.split_r_factor(chains)[i],
+                _direct_r_factor(np.concatenate(
+                    [chains[:, :100, i], chains[:, 100:, i]]))[0]
+            )
+
+    def test_variogram(self):
+        chains = _chains()
+        for t in (0, 1, 5, 99):
+            assert np.allclose(
+                variogram(chains, t),
+                [_direct_variogram(chains[..., i], t) for i in range(2)]
+            )
+
+    def test_autocorrelation(self):
+        chains = _chains()
+        rho = mcmc.autocorrelation(chains)
+        assert rho.shape == (100, 2)
+        for i in range(2):
+            _, var_p = _direct_r_factor(chains[..., i])
+            expected = [1 - _direct_variogram(chains[..., i], t) / (2 * var_p)
+                        for t in range(100)]
+            assert np.allclose(rho[:, i], expected)
+        assert np.allclose(rho[0], 1)
+
+    @pytest.mark.parametrize("phi", [0., 0.7, 0.95])
+    def test_effective_sample_size(self, phi):
+        chains = _chains(phi=phi)
+        ess = mcmc.effective_sample_size(chains)
+        assert ess.shape == (2,)
+        for i in range(2):
+            assert np.isclose(ess[i], _direct_ess(chains[..., i]))
+        assert np.isclose(
+            mcmc.effective_sample_size(chains[..., 0]), ess[0])
+
+    @pytest.mark.parametrize(
+        "chunks", [[200], [1, 50, 7, 142], [3] * 66 + [2]])
+    def test_online_diagnostics(self, chunks):
+        """The online diagnostics match the batch functions."""
+        chains = _chains()
+        online = mcmc.OnlineDiagnostics(max_lag=100)
+        start = 0
+        for size in chunks:
+            online.update(chains[:, start:start + size])
+            start += size
+        assert online.n == 200
+
+        assert np.allclose(online.r_factor(), mcmc.r_factor(chains))
+        assert np.allclose(
+            online.autocorrelation(), mcmc.autocorrelation(chains))
+        assert np.allclose(online.effective_sample_size(),
+                           mcmc.effective_sample_size(chains))
+
+        # With fewer lags, the autocorrelation is truncated:
+        online = mcmc.OnlineDiagnostics(max_lag=10)
+        online.update(chains)
+        assert np.allclose(online.autocorrelation(),
+                           mcmc.autocorrelation(chains)[:10])
+
+        with pytest.raises(ValueError):
+            mcmc.OnlineDiagnostics().r_factor()
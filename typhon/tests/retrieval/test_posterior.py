@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+# typhon.retrieval imports the plotting functions of typhon.plots.maps:
+pytest.importorskip("cartopy")
+
+from typhon.retrieval import posterior, scores  # noqa
+
+TAUS = np.array([0.1, 0.3, 0.5, 0.7, 0.9])
+Y_PRED = np.array([
+    [0.0, 1.0, 2.0, 3.0, 5.0],
+    [-1.0, -0.5, 0.0, 0.5, 1.0],
+    [10.0, 10.1, 10.5, 12.0, 13.0],
+])
+
+
+class TestPosterior:
+    """Testing the operations on posterior distributions."""
+
+    def test_cdf(self):
+        ys, fs = posterior.cdf(Y_PRED, TAUS)
+        assert ys.shape == (3, 7)
+        assert np.allclose(fs, [0, 0.1, 0.3, 0.5, 0.7, 0.9, 1])
+        assert np.allclose(ys[:, 1:-1], Y_PRED)
+        assert np.allclose(ys[0, [0, -1]], [-1.0, 7.0])
+
+        with pytest.raises(ValueError):
+            posterior.cdf(Y_PRED, TAUS[:-1])
+
+    def test_quantile_round_trip(self):
+        """The quantiles are the inverse of the CDF."""
+        probabilities = np.linspace(0, 1, 21)
+        quantiles = posterior.posterior_quantiles(
+            Y_PRED, TAUS, probabilities)
+        assert quantiles.shape == (3, 21)
+        assert np.allclose(
+            posterior.evaluate_cdf(Y_PRED, TAUS, quantiles),
+            probabilities
+        )
+        assert np.allclose(
+            posterior.posterior_quantiles(Y_PRED, TAUS, TAUS), Y_PRED)
+
+        # One value per retrieval and values outside of the nodes:
+        assert np.allclose(
+            posterior.evaluate_cdf(Y_PRED, TAUS, Y_PRED[:, 2]), 0.5)
+        assert np.allclose(
+            posterior.evaluate_cdf(Y_PRED, TAUS, [-100, 100, 11.5]),
+            [0, 1, 0.5 + 0.2 / 1.5]
+        )
+
+    def test_pdf(self):
+        """The PDF is the slope of the CDF between the quantiles."""
+        ys, ps = posterior.pdf(Y_PRED, TAUS)
+        assert ys.shape == ps.shape == (3, 6)
+        assert np.allclose(ps[:, [0, -1]], 0)
+        assert np.allclose(
+            ps[:, 1:-1], np.diff(TAUS) / np.diff(Y_PRED, axis=1))
+
+    def test_mean_and_samples(self):
+        """The mean and the quantiles of many samples."""
+        samples = posterior.sample_posterior(
+            Y_PRED, TAUS, n_samples=200000, random_state=1)
+        assert samples.shape == (3, 200000)
+        assert np.allclose(
+            samples.mean(axis=1), posterior.posterior_mean(Y_PRED, TAUS),
+            atol=0.02
+        )
+        assert np.allclose(
+            np.quantile(samples, TAUS, axis=1).T, Y_PRED, atol=0.02)
+
+        assert np.array_equal(
+            posterior.sample_posterior(Y_PRED, TAUS, 5, random_state=2),
+            posterior.sample_posterior(Y_PRED, TAUS, 5, random_state=2),
+        )
+
+        # A symmetric posterior has its mean at the median:
+        assert np.isclose(posterior.posterior_mean(Y_PRED, TAUS)[1], 0)
+
+    def test_credible_interval(self):
+        lower, upper = posterior.credible_interval(Y_PRED, TAUS, 0.8)
+        assert np.allclose(lower, Y_PRED[:, 0])
+        assert np.allclose(upper, Y_PRED[:, -1])
+        assert np.allclose(
+            posterior.evaluate_cdf(
+                Y_PRED, TAUS,
+                np.stack(posterior.credible_interval(Y_PRED, TAUS), axis=1)
+            ),
+            [0.05, 0.95]
+        )
+
+        with pytest.raises(ValueError):
+            posterior.credible_interval(Y_PRED, TAUS, 1.5)
+
+    @pytest.mark.parametrize("y_test", [
+        [1.5, 0.0, 11.0],
+        [2.0, -0.75, 10.0],
+        # Outside of the nodes of the CDFs:
+        [-3.0, 4.0, 20.0],
+    ])
+    def test_crps(self, y_test):
+        """Compare the CRPS with a numerical integral of the CDF."""
+        x = np.linspace(-20, 40, 600001)
+        expected = [
+            np.trapz(
+                (posterior.evaluate_cdf(y_pred[None], TAUS, x[None])[0]
+                 - (x >= y)) ** 2,
+                x
+            )
+            for y_pred, y in zip(Y_PRED, y_test)
+        ]
+
+        assert np.allclose(
+            posterior.crps(Y_PRED, y_test, TAUS), expected, atol=1e-4)
+        assert np.allclose(
+            scores.crps(Y_PRED, y_test, TAUS), expected, atol=1e-4)
+        assert np.isclose(
+            scores.mean_crps(Y_PRED, y_test, TAUS), np.mean(expected),
+            atol=1e-4)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Testing the functions in typhon.fastgeodesy.
+"""
+import subprocess
+import sys
+from textwrap import dedent
+
+import numpy as np
+
+from typhon import fastgeodesy
+from typhon import geodesy
+
+
+class TestFastGeodesy:
+    """Testing the compiled geodesy functions against typhon.geodesy."""
+    lat = np.array([[-90., -45.5, 0.], [12.3, 60., 89.9]])
+    lon = np.array([[0., 170., -179.], [45., -60., 10.]])
+    h = np.array([[0., 100., 1e4], [-50., 3e3, 5e5]])
+
+    def test_geocentric2cart(self):
+        """Test geocentric2cart with broadcast radius."""
+        ref = geodesy.geocentric2cart(6371e3, self.lat, self.lon)
+        conversion = fastgeodesy.geocentric2cart(6371e3, self.lat, self.lon)
+        assert np.allclose(ref, conversion)
+
+    def test_geodetic2cart2geodetic(self):
+        """Test round trip geodetic -> cartesian -> geodetic."""
+        cart = fastgeodesy.geodetic2cart(self.h, self.lat, self.lon)
+        assert np.allclose(
+            cart, geodesy.geodetic2cart(self.h, self.lat, self.lon))
+
+        h, lat, lon = fastgeodesy.cart2geodetic(*cart)
+        assert np.allclose(h, self.h, atol=1e-6)
+        assert np.allclose(lat, self.lat)
+        assert np.allclose(lon[:, 1:], self.lon[:, 1:])
+
+    def test_cart2geodetic_poles(self):
+        """Test cart2geodetic exactly at the poles."""
+        a, e = geodesy.ellipsoidmodels()['WGS84']
+        b = a * np.sqrt(1 - e**2)
+        z = np.array([b, -b, b + 1e3, -b + 50.])
+        h, lat, lon = fastgeodesy.cart2geodetic(0., 0., z)
+
+        # geodesy.cart2geodetic divides by zero but gets the latitude:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            _, ref_lat, ref_lon = geodesy.cart2geodetic(
+                np.zeros(z.size), np.zeros(z.size), z)
+        assert np.allclose(lat, ref_lat)
+        assert np.allclose(lon, ref_lon)
+        assert np.allclose(h, [0., 0., 1e3, -50.], atol=1e-6)
+
+    def test_great_circle_distance(self):
+        """Test great_circle_distance with and without radius."""
+        args = (self.lat, self.lon, self.lat[::-1], self.lon[::-1])
+        for r in (None, 6371e3):
+            assert np.allclose(
+                fastgeodesy.great_circle_distance(*args, r=r),
+                geodesy.great_circle_distance(*args, r=r))
+
+    def test_tunnel_distance(self):
+        """Test tunnel_distance."""
+        args = (self.lat.ravel(), self.lon.ravel(), 0., 0.)
+        assert np.allclose(
+            fastgeodesy.tunnel_distance(*args),
+            geodesy.tunnel_distance(*args))
+
+    def test_out_and_dtype(self):
+        """Test writing float32 results into columns of an existing array."""
+        points = np.empty((self.lat.size, 3), dtype=np.float32)
+        out = (points[:, 0], points[:, 1], points[:, 2])
+        result = fastgeodesy.geocentric2cart(
+            6371e3, self.lat.ravel(), self.lon.ravel(), out=out)
+
+        assert result[0] is out[0]
+        assert np.allclose(
+            points,
+            np.column_stack(
+                geodesy.geocentric2cart(6371e3, self.lat.ravel(),
+                                        self.lon.ravel())),
+            rtol=1e-6)
+        assert fastgeodesy.great_circle_distance(
+            self.lat, self.lon, 0, 0, dtype="f4").dtype == np.float32
+
+    def test_fork_after_kernel(self):
+        """Test that a process pool can fork after a kernel has run."""
+        script = dedent("""
+            from concurrent.futures import ProcessPoolExecutor
+            from typhon import fastgeodesy
+
+            fastgeodesy.great_circle_distance([0., 1.], 0., 1., 1.)
+            with ProcessPoolExecutor(2) as pool:
+                assert list(pool.map(abs, [-1, -2])) == [1, 2]
+        """)
+        # The interpreter hung at exit if numba's threads were running:
+        subprocess.run([sys.executable, "-c", script], check=True,
+                       timeout=60)
@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 """Testing the functions in typhon.geographical.
 """
+import pickle
+
 import numpy as np
+import pytest
 
 from typhon import geographical
 
@@ -17,6 +20,171 @@ class TestGeographical:
 
         assert np.allclose(mean, 1.7852763105888174)
 
+    def test_gridded_mean(self):
+        """Test gridded_mean against numpy.histogram2d."""
+        lat = np.array([-89., -10., 0., 10., 90., 95.])
+        lon = np.array([-180., 20., 20., 170., 180., 0.])
+        data = np.arange(lat.size, dtype=float)
+        grid = (np.linspace(-90, 90, 4), np.linspace(-180, 180, 5))
+
+        mean, number = geographical.gridded_mean(lat, lon, data, grid)
+
+        check_number, _, _ = np.histogram2d(lat, lon, grid)
+        check_sum, _, _ = np.histogram2d(lat, lon, grid, weights=data)
+        assert np.array_equal(number, check_number)
+        assert np.allclose(mean, check_sum / check_number, equal_nan=True)
+
+
+class TestGridAccumulator:
+    """Testing the GridAccumulator class."""
+
+    def test_statistics(self):
+        """Test statistics of partial grids against numpy."""
+        rng = np.random.RandomState(0)
+        lat = rng.uniform(-90, 90, 1000)
+        lon = rng.uniform(-180, 180, 1000)
+        data = {"a": rng.randn(1000), "b": rng.randn(1000)}
+        data["a"][::10] = np.nan
+        edges = (np.linspace(-90, 90, 4), np.linspace(-180, 180, 3))
+
+        grid = geographical.GridAccumulator(*edges, variables=["a", "b"])
+        partial = geographical.GridAccumulator(*edges, variables=["a", "b"])
+        grid.add(lat[:300], lon[:300], {k: v[:300] for k, v in data.items()})
+        partial.add(lat[300:], lon[300:], {k: v[300:] for k, v in data.items()})
+        grid += partial
+
+        result = grid.to_xarray()
+        in_cell = (lat >= 30) & (lon < 0)
+        for variable, values in data.items():
+            values = values[in_cell]
+            check = {
+                "mean": np.nanmean, "std": np.nanstd, "min": np.nanmin,
+                "max": np.nanmax, "count": lambda x: np.sum(~np.isnan(x)),
+            }
+            for statistic, func in check.items():
+                assert np.isclose(
+                    result[f"{variable}_{statistic}"].values[2, 0],
+                    func(values))
+
+    def test_zero_weights(self):
+        """Points with zero weight are ignored."""
+        grid = geographical.GridAccumulator([-1., 1.], [-1., 1.])
+        grid.add([0., 0., 0.], [0., 0., 0.], [1., 2., 3.],
+                 weights=[0., 1., 0.])
+
+        result = grid.to_xarray()
+        assert result["mean"].item() == 2.
+        assert result["std"].item() == 0.
+        assert result["min"].item() == result["max"].item() == 2.
+        assert result["count"].item() == 1
+
+    @pytest.mark.parametrize("edges", [
+        np.linspace(-1, 1, 11),
+        np.array([-1, -0.5, 0.1, 0.2, 1]),
+    ])
+    def test_grid_index(self, edges):
+        """Cells as numpy.histogram, also for values on the edges."""
+        rng = np.random.RandomState(0)
+        x = np.concatenate(
+            [rng.uniform(-1.2, 1.2, 1000), edges, edges + 1e-16,
+             edges - 1e-16, [np.nan, np.inf, -np.inf]])
+
+        index = geographical._grid_index(
+            x, np.zeros(x.size), edges, np.array([0., 1.]))
+
+        inside = (x >= edges[0]) & (x <= edges[-1])
+        assert np.array_equal(index < 0, ~inside)
+        assert np.array_equal(
+            np.bincount(index[inside], minlength=edges.size - 1),
+            np.histogram(x[inside], edges)[0])
+        assert np.all(edges[index[inside]] <= x[inside])
+        upper = index[inside] < edges.size - 2
+        assert np.all(x[inside][upper] < edges[index[inside][upper] + 1])
+
+
+class TestRasterLookup:
+    """Testing the RasterLookup class."""
+
+    def test_lookup(self):
+        """Test nearest and bilinear lookup with wrapping longitudes."""
+        # 5 x 5 degree grid from 90N to 90S and from 0E to 355E:
+        data = np.arange(37 * 72, dtype=float).reshape(37, 72)
+        lookup = geographical.RasterLookup(data, lon_range=(0, 355))
+
+        lat = np.array([90., 87.6, -90., 0., 0.])
+        lon = np.array([0., -2.6, 357.6, -180., 357.5])
+        assert np.array_equal(
+            lookup.nearest(lat, lon),
+            [data[0, 0], data[0, 71], data[36, 0], data[18, 36],
+             data[18, 0]]
+        )
+
+        # Linear data is interpolated exactly, also across 0E:
+        assert np.allclose(lookup.bilinear([2.5], [2.5]), 1260.5)
+        assert np.allclose(lookup.bilinear([0.], [357.5]),
+                           (data[18, 71] + data[18, 0]) / 2)
+
+        with pytest.raises(ValueError):
+            lookup.nearest([91.], [0.])
+        lookup = geographical.RasterLookup(
+            data, lon_range=(0, 355), bounds_error=False)
+        assert np.isnan(lookup.bilinear([91.], [0.]))[0]
+
+    @pytest.mark.parametrize("lon_range", [(0, 355), (0, 100)])
+    @pytest.mark.parametrize("method", ["nearest", "bilinear"])
+    def test_non_finite(self, lon_range, method):
+        """NaN or infinite coordinates are out of bounds."""
+        data = np.arange(37 * 72, dtype=float).reshape(37, 72)
+        lat = np.array([0., np.nan, 0., 0.])
+        lon = np.array([10., 10., np.nan, np.inf])
+
+        lookup = geographical.RasterLookup(data, lon_range=lon_range)
+        for i in range(1, lat.size):
+            with pytest.raises(ValueError):
+                getattr(lookup, method)(lat[[0, i]], lon[[0, i]])
+
+        lookup = geographical.RasterLookup(
+            data, lon_range=lon_range, bounds_error=False)
+        values = getattr(lookup, method)(lat, lon)
+        assert np.isfinite(values[0])
+        assert np.isnan(values[1:]).all()
+
+    def test_from_file(self, tmpdir):
+        """Test the memory-mapped cache files."""
+        imageio = pytest.importorskip("imageio")
+        data = np.random.rand(19, 37) > 0.5
+        filename = str(tmpdir.join("mask.png"))
+        # The first row of the image is at 90N:
+        imageio.imwrite(filename, np.flip(data * 255, axis=0).astype("u1"))
+
+        cache_dir = str(tmpdir.join("cache"))
+        lookup = geographical.RasterLookup.from_file(
+            filename, cache_dir=cache_dir, lat_range=(-90, 90),
+            lon_range=(-180, 180))
+        assert isinstance(lookup.data, np.memmap)
+        assert np.array_equal(lookup.data, data)
+        assert np.array_equal(
+            lookup.nearest([-90., 0.], [-180., 180.]),
+            [data[0, 0], data[9, 0]]
+        )
+        assert np.array_equal(
+            geographical.RasterLookup.from_file(
+                filename, cache_dir=cache_dir).data, data)
+
+        # Only the path of the cache file is pickled:
+        pickled = pickle.dumps(lookup)
+        assert len(pickled) < data.nbytes
+        assert np.array_equal(pickle.loads(pickled).data, data)
+
+    def test_sea_mask(self):
+        """Test sea_mask with a boolean matrix."""
+        mask = np.zeros((181, 361), dtype=bool)
+        mask[:, 180:] = True
+        assert np.array_equal(
+            geographical.sea_mask([10., -10.], [-10., 10.], mask),
+            [True, False]
+        )
+
 
 class TestGeoIndex:
     """Testing the GeoIndex functions."""
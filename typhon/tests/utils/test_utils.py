@@ -74,3 +74,98 @@ class TestUtils:
             return
 
         foo()
+
+    def test_TimingRegistry(self):
+        """Test hierarchical recording and merging of `TimingRegistry`."""
+        registry = utils.TimingRegistry(max_samples=10)
+
+        with registry.section("outer"):
+            registry.record("inner", 1.)
+        assert not registry.summary()
+
+        registry.enable()
+        with utils.Timer(name="outer", verbose=False, registry=registry):
+            for seconds in range(1, 21):
+                registry.record("inner", seconds)
+
+        @registry.timed("decorated")
+        def foo():
+            return 1
+
+        assert foo() == 1
+
+        worker = utils.TimingRegistry()
+        _, snapshot = worker.run_isolated(
+            lambda: worker.record("read", 2.))
+        registry.merge(snapshot, prefix="outer")
+
+        summary = registry.summary()
+        assert set(summary) == {
+            "outer", "outer/inner", "outer/read", "decorated"}
+        inner = summary["outer/inner"]
+        assert inner["calls"] == 20
+        assert inner["total"] == 210.
+        assert (inner["min"], inner["max"]) == (1., 20.)
+        assert 1. <= inner["p50"] <= 20.
+        assert summary["outer/read"]["calls"] == 1
+        assert "outer/inner" in registry.to_json()
+
+    def test_array_cache(self):
+        """Test the LRU eviction and statistics of `array_cache`."""
+        calls = []
+
+        @utils.array_cache(maxbytes=2 * 8 * 100)
+        def create(value, fields=None):
+            calls.append(value)
+            return numpy.full(100, value, dtype="f8")
+
+        a = create(1, fields=["a", "b"])
+        assert create(1, fields=["a", "b"]) is a
+        assert not a.flags.writeable
+        create(2)
+        create(1, fields=["a", "b"])  # 1 is now the most recently used
+        create(3)  # evicts 2
+        create(1, fields=["a", "b"])
+        create(2)
+        assert calls == [1, 2, 3, 2]
+        assert create.cache_info() == utils.cache.CacheInfo(
+            hits=3, misses=4, evictions=2, disk_hits=0, currbytes=1600,
+            maxbytes=1600)
+
+    def test_array_cache_writeable(self):
+        """Changes of the results do not affect the cache."""
+        calls = []
+
+        @utils.array_cache(readonly=False)
+        def create(value, fields=None):
+            calls.append(value)
+            return numpy.full(3, value, dtype="f8")
+
+        first = create(1)
+        first[:] = -1
+        second = create(1)
+        second[:] = -2
+        assert numpy.array_equal(create(1), [1, 1, 1])
+        assert calls == [1]
+
+        # Unhashable arguments are not cached:
+        class Unhashable:
+            __hash__ = None
+
+        assert numpy.array_equal(create(2, Unhashable()), [2, 2, 2])
+        assert numpy.array_equal(create(2, fields=Unhashable()), [2, 2, 2])
+        assert calls == [1, 2, 2]
+
+    def test_array_cache_disk(self, tmpdir):
+        """Test the disk tier of `array_cache`."""
+        def create(value):
+            return numpy.ma.masked_less(numpy.arange(5.), value)
+
+        cached = utils.array_cache(cache_dir=str(tmpdir))(create)
+        first = cached(2)
+        # A new cache (e.g. in another process) uses the files on disk:
+        cached = utils.array_cache(cache_dir=str(tmpdir))(create)
+        second = cached(2)
+        assert cached.cache_info().disk_hits == 1
+        assert numpy.array_equal(first.mask, second.mask)
+        assert numpy.array_equal(first.data, second.data)
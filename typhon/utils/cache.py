@@ -9,17 +9,32 @@
 # All those contributions are dual-licensed under the MIT license for use
 # in typhon, and the GNU General Public License version 3.
 
+import collections
+import copy
 import functools
+import hashlib
 import logging
-import copy
+import os
+import threading
+
+import numpy
+import xarray
 
 
 __all__ = [
+    'array_cache',
     'mutable_cache',
 ]
 
 
 logger = logging.getLogger(__name__)
+
+
+CacheInfo = collections.namedtuple(
+    "CacheInfo", ["hits", "misses", "evictions", "disk_hits", "currbytes",
+                  "maxbytes"])
+
+
 def mutable_cache(maxsize=10):
     """In-memory cache like functools.lru_cache but for any object
 
@@ -35,6 +50,10 @@ def mutable_cache(maxsize=10):
     cache at all.  Be careful with functions returning large objects, such
     as reading routines for datasets like IASI.  Everything is kept in RAM!
 
+    Consider using :func:`array_cache` instead, which keys on hashable
+    arguments and bounds the cache by the size of the cached objects in
+    bytes rather than by their number.
+
     Args:
         maxsize (int): Maximum number of return values to be remembered.
 
@@ -89,3 +108,249 @@ def mutable_cache(maxsize=10):
         return functools.update_wrapper(wrapper, user_function)
 
     return decorating_function
+
+
+def _nbytes(obj):
+    """Estimate the memory size of an object in bytes"""
+    if isinstance(obj, numpy.ma.MaskedArray):
+        return obj.nbytes + numpy.ma.getmaskarray(obj).nbytes
+    elif hasattr(obj, "nbytes"):
+        return int(obj.nbytes)
+    elif isinstance(obj, (tuple, list)):
+        return sum(_nbytes(item) for item in obj)
+    elif isinstance(obj, dict):
+        return sum(_nbytes(item) for item in obj.values())
+    return 0
+
+
+def _set_readonly(obj):
+    """Make all numpy arrays in an object read-only (in-place)"""
+    if isinstance(obj, numpy.ma.MaskedArray):
+        obj.flags.writeable = False
+        if obj.mask is not numpy.ma.nomask:
+            obj.mask.flags.writeable = False
+    elif isinstance(obj, numpy.ndarray):
+        obj.flags.writeable = False
+    elif isinstance(obj, (xarray.Dataset, xarray.DataArray)):
+        variables = obj.variables.values() \
+            if isinstance(obj, xarray.Dataset) else [obj.variable]
+        for var in variables:
+            if isinstance(var.data, numpy.ndarray):
+                var.data.flags.writeable = False
+    elif isinstance(obj, (tuple, list)):
+        for item in obj:
+            _set_readonly(item)
+    elif isinstance(obj, dict):
+        for item in obj.values():
+            _set_readonly(item)
+
+
+def _copy(obj):
+    """Copy an object (and the items of tuples and lists)"""
+    if isinstance(obj, (tuple, list)):
+        return type(obj)(copy.copy(item) for item in obj)
+    return copy.copy(obj)
+
+
+def _freeze(obj):
+    """Convert lists, dicts and sets recursively to hashable counterparts"""
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(item) for item in obj)
+    elif isinstance(obj, dict):
+        return tuple(sorted(
+            ((key, _freeze(value)) for key, value in obj.items()), key=repr))
+    elif isinstance(obj, (set, frozenset)):
+        return frozenset(_freeze(item) for item in obj)
+    return obj
+
+
+def _disk_key(function, args, kwds):
+    """Create a key that is stable between processes (or None)"""
+    text = repr(args) + repr(sorted(kwds.items()))
+    # Objects with the default representation contain their memory address
+    # that differs between processes:
+    if " at 0x" in text:
+        return None
+    text = f"{function.__module__}.{function.__qualname__}:{text}"
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def _save_to_disk(filename, result):
+    """Save a result to the disk tier, return False if not possible"""
+    if isinstance(result, xarray.Dataset):
+        result.to_netcdf(filename + ".nc")
+    elif isinstance(result, numpy.ndarray) and result.dtype != object:
+        arrays = {"data": numpy.ma.getdata(result)}
+        if isinstance(result, numpy.ma.MaskedArray):
+            arrays["mask"] = numpy.ma.getmaskarray(result)
+        # Write to a temporary file first so that other processes never see
+        # incomplete files:
+        with open(filename + ".tmp", "wb") as file:
+            numpy.savez(file, **arrays)
+        os.replace(filename + ".tmp", filename + ".npz")
+    else:
+        return False
+    return True
+
+
+def _load_from_disk(filename):
+    """Load a result from the disk tier, return None if not existing"""
+    if os.path.exists(filename + ".npz"):
+        with numpy.load(filename + ".npz") as file:
+            if "mask" in file:
+                return numpy.ma.MaskedArray(file["data"], mask=file["mask"])
+            return file["data"]
+    elif os.path.exists(filename + ".nc"):
+        with xarray.open_dataset(filename + ".nc") as file:
+            return file.load()
+    return None
+
+
+def array_cache(maxbytes=2**30, cache_dir=None, readonly=True):
+    """Size-bounded LRU cache for functions returning large objects
+
+    This is an alternative to :func:`mutable_cache` for functions returning
+    numpy arrays, masked arrays, xarray objects or tuples of them, e.g. the
+    reading routines of datasets. The results are evicted in
+    least-recently-used order as soon as their total size (measured with
+    their `nbytes` attribute) exceeds `maxbytes`. The arguments of the
+    function must be hashable (lists, dicts and sets are converted to
+    their hashable counterparts); calls with other unhashable arguments are
+    not cached.
+
+    Optionally, the results can be stored in `cache_dir` as well (numpy
+    arrays as uncompressed npz files, xarray.Dataset objects as NetCDF
+    files). This disk tier survives process restarts and is not limited in
+    size. It is only used if all arguments have a representation that is
+    stable between processes (i.e. not the default ``<... at 0x...>``).
+
+    Like with :func:`mutable_cache`, you can call the *resulting* function
+    with the keyword argument `CLEAR_CACHE=True` to clear the in-memory
+    cache, or with `NO_CACHE=True` to bypass the cache. Additionally, the
+    resulting function has the methods `cache_info()` returning the
+    statistics of the cache (hits, misses, evictions, hits from the disk
+    tier, current and maximum size in bytes) and `cache_clear()`.
+
+    Args:
+        maxbytes: Maximum size of all remembered return values in bytes.
+        cache_dir: If given, results are also stored in this directory.
+        readonly: If true (default), all arrays in the results are made
+            read-only and cache hits return the very same objects without
+            copying them. Otherwise, all calls return copies of the cached
+            results like :func:`mutable_cache` does, so that callers can
+            change them.
+
+    Returns:
+        New function that has caching implemented.
+
+    Examples:
+
+    .. code-block:: python
+
+        @array_cache(maxbytes=4*2**30, cache_dir="/scratch/cache")
+        def read_granule(filename, channel):
+            ...
+
+        data = read_granule("granule.nc", 3)
+        print(read_granule.cache_info())
+    """
+
+    sentinel = object()
+    make_key = functools._make_key
+
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def decorating_function(user_function):
+        cache = collections.OrderedDict()
+        sizes = {}
+        lock = threading.RLock()
+        stats = {"hits": 0, "misses": 0, "evictions": 0, "disk_hits": 0,
+                 "currbytes": 0}
+
+        def store(key, result):
+            size = _nbytes(result)
+            if size > maxbytes:
+                logger.debug(f"Result of {user_function} ({size} bytes) is "
+                             f"larger than the cache ({maxbytes} bytes)")
+                return False
+            with lock:
+                if key in cache:
+                    return True
+                cache[key] = result
+                sizes[key] = size
+                stats["currbytes"] += size
+                while stats["currbytes"] > maxbytes:
+                    old_key, _ = cache.popitem(last=False)
+                    stats["currbytes"] -= sizes.pop(old_key)
+                    stats["evictions"] += 1
+            return True
+
+        def wrapper(*args, **kwds):
+            if kwds.pop("CLEAR_CACHE", False):
+                cache_clear()
+            if kwds.pop("NO_CACHE", False):
+                return user_function(*args, **kwds)
+
+            try:
+                # make_key hashes the arguments already in most cases:
+                key = make_key(
+                    _freeze(args),
+                    {name: _freeze(value) for name, value in kwds.items()},
+                    False)
+                hash(key)
+            except TypeError:
+                logger.debug(f"Cannot cache {user_function}: unhashable "
+                             f"arguments")
+                return user_function(*args, **kwds)
+
+            with lock:
+                result = cache.get(key, sentinel)
+                if result is not sentinel:
+                    cache.move_to_end(key)
+                    stats["hits"] += 1
+                    return result if readonly else _copy(result)
+                stats["misses"] += 1
+
+            disk_key = None
+            if cache_dir is not None:
+                disk_key = _disk_key(user_function, args, kwds)
+            if disk_key is not None:
+                filename = os.path.join(cache_dir, disk_key)
+                result = _load_from_disk(filename)
+                if result is not None:
+                    with lock:
+                        stats["disk_hits"] += 1
+                else:
+                    result = user_function(*args, **kwds)
+                    if not _save_to_disk(filename, result):
+                        logger.debug(f"Cannot store result of "
+                                     f"{user_function} on disk")
+            else:
+                result = user_function(*args, **kwds)
+
+            if readonly:
+                _set_readonly(result)
+            if store(key, result) and not readonly:
+                # The caller must not change the cached object:
+                return _copy(result)
+            return result
+
+        def cache_info():
+            with lock:
+                return CacheInfo(
+                    stats["hits"], stats["misses"], stats["evictions"],
+                    stats["disk_hits"], stats["currbytes"], maxbytes)
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+                sizes.clear()
+                stats.update(hits=0, misses=0, evictions=0, disk_hits=0,
+                             currbytes=0)
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return functools.update_wrapper(wrapper, user_function)
+
+    return decorating_function
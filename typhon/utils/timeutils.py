@@ -2,7 +2,11 @@
 
 """This module contains functions for python's datetime/timedelta objects
 """
+from contextlib import contextmanager
 import functools
+import json
+import random
+import threading
 import time
 from datetime import datetime, timedelta
 from numbers import Number
@@ -18,6 +22,8 @@ __all__ = [
     "to_datetime",
     "to_timedelta",
     "Timer",
+    "TimingRegistry",
+    "timings",
 ]
 
 
@@ -226,6 +232,396 @@ def num2date(times, units, calendar=None):
     return converted_data
 
 
+class _NullSection:
+    """Context manager that does nothing (used for disabled registries)"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NULL_SECTION = _NullSection()
+
+
+class _Section:
+    """Context manager that times a block and records it in a registry"""
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+        self.starttime = None
+
+    def __enter__(self):
+        self.registry._push(self.name)
+        self.starttime = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.registry._pop(time.perf_counter() - self.starttime)
+        return False
+
+
+class TimingRegistry:
+    """Collect timing statistics of named code blocks
+
+    Each block is recorded under its name and the names of all blocks it is
+    nested in, e.g. *FileSet.map/FileSet.read/NetCDF4.read*. For each of
+    these paths, the registry counts the calls and keeps the total, minimum
+    and maximum duration and a random sample of the durations for the
+    percentiles.
+
+    A registry is disabled by default. Then, sections and decorated
+    functions only check the *enabled* attribute and do nothing else. The
+    registry :data:`timings` is used by :class:`Timer` and by the hot paths
+    in :class:`~typhon.files.fileset.FileSet`, its file handlers and
+    :class:`~typhon.collocations.Collocator`. Timings from worker processes
+    of :meth:`FileSet.map` and :meth:`Collocator.collocate_filesets` are
+    merged back into the registry of the parent process.
+
+    Examples:
+
+    .. code-block:: python
+
+        from typhon.utils import timings
+
+        timings.enable()
+        fileset.map(process, on_content=True, max_workers=4)
+        print(timings.report())
+        timings.to_json("timings.json")
+
+        # Own code can be timed as well:
+        with timings.section("regridding"):
+            ...
+
+        @timings.timed()
+        def retrieve(data):
+            ...
+    """
+
+    #: The percentiles given in the summaries
+    percentiles = (50, 90, 99)
+
+    def __init__(self, max_samples=1000, enabled=False):
+        """Create an empty registry
+
+        Args:
+            max_samples: Maximum number of durations that are kept for each
+                path to estimate the percentiles.
+            enabled: If true, start recording immediately.
+        """
+        self.max_samples = max_samples
+        self.enabled = enabled
+
+        # path -> [calls, total, minimum, maximum, samples]
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._random = random.Random()
+
+    def enable(self):
+        """Start recording"""
+        self.enabled = True
+
+    def disable(self):
+        """Stop recording (the collected timings are kept)"""
+        self.enabled = False
+
+    def reset(self):
+        """Delete all collected timings"""
+        with self._lock:
+            self._counters = {}
+        self._stack.clear()
+
+    @contextmanager
+    def recording(self):
+        """Enable the registry within a with-block
+
+        Yields:
+            This registry.
+        """
+        enabled = self.enabled
+        self.enabled = True
+        try:
+            yield self
+        finally:
+            self.enabled = enabled
+
+    @property
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def current_path(self):
+        """Return the path of the innermost running section
+
+        Returns:
+            A string with the names of all running sections of this thread,
+            separated by "/". Empty if no section is running.
+        """
+        return "/".join(self._stack)
+
+    @contextmanager
+    def within(self, path):
+        """Record the blocks of this thread as children of a path
+
+        This is used by worker threads to record their timings under the
+        path of the section that started them.
+
+        Args:
+            path: Names of the parent sections separated by "/".
+        """
+        stack = self._stack
+        outer = stack.copy()
+        stack[:] = path.split("/") if path else []
+        try:
+            yield
+        finally:
+            stack[:] = outer
+
+    def _push(self, name):
+        self._stack.append(name)
+
+    def _pop(self, seconds):
+        stack = self._stack
+        if not stack:
+            # The registry has been reset while the block was running
+            return
+        path = "/".join(stack)
+        stack.pop()
+        self._add(path, seconds)
+
+    def _add(self, path, seconds):
+        with self._lock:
+            counter = self._counters.get(path)
+            if counter is None:
+                self._counters[path] = \
+                    [1, seconds, seconds, seconds, [seconds]]
+                return
+
+            counter[0] += 1
+            counter[1] += seconds
+            counter[2] = min(counter[2], seconds)
+            counter[3] = max(counter[3], seconds)
+
+            # Reservoir sampling keeps a uniform sample of all durations:
+            samples = counter[4]
+            if len(samples) < self.max_samples:
+                samples.append(seconds)
+            else:
+                index = self._random.randrange(counter[0])
+                if index < self.max_samples:
+                    samples[index] = seconds
+
+    def record(self, name, seconds):
+        """Record the duration of a block that has been timed elsewhere
+
+        Args:
+            name: Name of the block. It is recorded as a child of the
+                running sections.
+            seconds: Duration in seconds.
+
+        Returns:
+            None
+        """
+        if not self.enabled:
+            return
+        path = self.current_path()
+        self._add(f"{path}/{name}" if path else name, seconds)
+
+    def section(self, name):
+        """Time a with-block
+
+        Args:
+            name: Name of the block.
+
+        Returns:
+            A context manager.
+        """
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, name)
+
+    def timed(self, name=None):
+        """Decorator that times each call of a function
+
+        Args:
+            name: Name under which the calls are recorded. Default is the
+                qualified name of the function.
+
+        Returns:
+            A decorator.
+        """
+        def decorator(func):
+            section_name = func.__qualname__ if name is None else name
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Section(self, section_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Return the collected timings as picklable object
+
+        The snapshot can be sent to another process and merged into its
+        registry with :meth:`merge`.
+
+        Returns:
+            A dictionary.
+        """
+        with self._lock:
+            return {
+                path: [*counter[:4], list(counter[4])]
+                for path, counter in self._counters.items()
+            }
+
+    def merge(self, other, prefix=None):
+        """Merge the timings of another registry into this one
+
+        Args:
+            other: A TimingRegistry object or a snapshot of one.
+            prefix: Path under which the timings are recorded. Default is
+                the path of the running sections of this thread.
+
+        Returns:
+            None
+        """
+        if isinstance(other, TimingRegistry):
+            other = other.snapshot()
+        if prefix is None:
+            prefix = self.current_path()
+
+        with self._lock:
+            for path, (calls, total, minimum, maximum, samples) \
+                    in other.items():
+                if prefix:
+                    path = f"{prefix}/{path}"
+                counter = self._counters.get(path)
+                if counter is None:
+                    self._counters[path] = \
+                        [calls, total, minimum, maximum, list(samples)]
+                    continue
+
+                # Draw the merged sample so that each duration represents
+                # the same number of calls:
+                merged = counter[4] + list(samples)
+                if len(merged) > self.max_samples:
+                    weights = [counter[0] / len(counter[4])] \
+                        * len(counter[4]) + [calls / len(samples)] \
+                        * len(samples)
+                    merged = _weighted_sample(
+                        self._random, merged, weights, self.max_samples)
+
+                counter[0] += calls
+                counter[1] += total
+                counter[2] = min(counter[2], minimum)
+                counter[3] = max(counter[3], maximum)
+                counter[4] = merged
+
+    def run_isolated(self, func, *args, **kwargs):
+        """Call a function and collect only its timings
+
+        This is meant for worker processes: the registry is reset and
+        enabled, the function is called and the collected timings are
+        returned together with the result.
+
+        Returns:
+            A tuple of the return value of *func* and a snapshot of the
+            collected timings.
+        """
+        self.reset()
+        self.enable()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            self.disable()
+        timings_snapshot = self.snapshot()
+        self.reset()
+        return result, timings_snapshot
+
+    def summary(self):
+        """Summarise the collected timings
+
+        Returns:
+            A dictionary with the path of each block as key and a
+            dictionary with *calls*, *total*, *mean*, *min*, *max* and the
+            percentiles (e.g. *p90*) of its duration in seconds as value.
+        """
+        result = {}
+        for path, (calls, total, minimum, maximum, samples) \
+                in sorted(self.snapshot().items()):
+            result[path] = {
+                "calls": calls,
+                "total": total,
+                "mean": total / calls,
+                "min": minimum,
+                "max": maximum,
+                **{
+                    f"p{percentile}": value
+                    for percentile, value in zip(
+                        self.percentiles,
+                        np.percentile(samples, self.percentiles)
+                    )
+                },
+            }
+        return result
+
+    def to_json(self, filename=None):
+        """Export the summary of the collected timings as JSON
+
+        Args:
+            filename: If given, the JSON is written to this file.
+
+        Returns:
+            The JSON string.
+        """
+        text = json.dumps(self.summary(), indent=2)
+        if filename is not None:
+            with open(filename, "w") as file:
+                file.write(text)
+        return text
+
+    def report(self):
+        """Format the collected timings as table
+
+        Returns:
+            A string with one line per block, indented by its level.
+        """
+        percentiles = [f"p{percentile}" for percentile in self.percentiles]
+        lines = [
+            f"{'block':<50} {'calls':>8} {'total':>10} {'mean':>10} "
+            + " ".join(f"{p:>10}" for p in percentiles)
+        ]
+        for path, stats in self.summary().items():
+            level = path.count("/")
+            name = "  " * level + path.rsplit("/", 1)[-1]
+            lines.append(
+                f"{name:<50} {stats['calls']:>8d} {stats['total']:>10.4f} "
+                f"{stats['mean']:>10.4f} "
+                + " ".join(f"{stats[p]:>10.4f}" for p in percentiles)
+            )
+        return "\n".join(lines)
+
+
+def _weighted_sample(rng, population, weights, k):
+    """Draw k elements without replacement (Efraimidis & Spirakis)"""
+    keys = [rng.random() ** (1 / weight) for weight in weights]
+    order = sorted(range(len(population)), key=keys.__getitem__,
+                   reverse=True)
+    return [population[i] for i in order[:k]]
+
+
+#: The registry used by :class:`Timer` and the instrumented functions of
+#: typhon. It is disabled by default.
+timings = TimingRegistry()
+
+
 class Timer:
     """Provide a simple time profiling utility
 
@@ -234,6 +630,12 @@ class Timer:
         info (str): Allows to add additional information to output.
             The given string is printed before the measured time.
             If `None`, default information is added depending on the use case.
+        name (str): If given, the measured durations are recorded under this
+            name in the registry if it is enabled. Blocks that are timed
+            within a with-block or a decorated function are recorded as its
+            children.
+        registry (TimingRegistry): The registry to record into. Default is
+            :data:`timings`.
 
     Returns:
         datetime.timedelta: The duration between start and end time.
@@ -269,14 +671,26 @@ class Timer:
         >>> timer = Timer().start()
         >>> print(f"{timer} elapsed")
         0:00:00.000111 hours elapsed
+
+        Record the durations in the timing registry:
+
+        >>> from typhon.utils import timings
+        >>> timings.enable()
+        >>> with Timer(name="read", verbose=False):
+        ...     time.sleep(1)
+        >>> timings.summary()["read"]["calls"]
+        1
     """
-    def __init__(self, info=None, verbose=True):
+    def __init__(self, info=None, verbose=True, name=None, registry=None):
         """Create a timer object."""
         self.verbose = verbose
         self.info = info
+        self.name = name
+        self.registry = timings if registry is None else registry
 
         self.starttime = None
         self.endtime = None
+        self._in_registry = False
 
     def __call__(self, func):
         """Allows to use a Timer object as a decorator."""
@@ -294,6 +708,10 @@ class Timer:
         return wrapper
 
     def __enter__(self):
+        # Named blocks become the parent of all blocks timed within them:
+        if self.name is not None and self.registry.enabled:
+            self.registry._push(self.name)
+            self._in_registry = True
         return self.start()
 
     def __exit__(self, *args):
@@ -333,6 +751,12 @@ class Timer:
 
         dt = timedelta(seconds=self.endtime - self.starttime)
 
+        if self._in_registry:
+            self._in_registry = False
+            self.registry._pop(self.endtime - self.starttime)
+        elif self.name is not None:
+            self.registry.record(self.name, self.endtime - self.starttime)
+
         # If no additional information is specified add default information
         # to make the output more readable.
         if self.info is None: